@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 
 class Repository(ABC):
@@ -33,14 +33,47 @@ class Repository(ABC):
         """Récupère le premier objet dont l'attribut == valeur."""
         raise NotImplementedError
 
+    @abstractmethod
+    def get_all_by_attribute(self, attr_name: str, attr_value: Any) -> List[Any]:
+        """Récupère tous les objets dont l'attribut == valeur."""
+        raise NotImplementedError
+
 
 class InMemoryRepository(Repository):
+    """Dépôt en mémoire basé sur un dict.
+
+    ``indexed_attributes`` déclare des index secondaires par hachage
+    (valeur -> ids des objets qui la portent), maintenus par ``add``,
+    ``update`` et ``delete`` : la recherche par attribut indexé est en
+    O(1) au lieu d'un parcours complet. Un index peut être non unique
+    (ex. ``place_id`` sur les reviews).
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, indexed_attributes: Iterable[str] = ()) -> None:
         self._data: Dict[str, Any] = {}
+        # dict utilisé comme ensemble ordonné d'ids
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {
+            attr: {} for attr in indexed_attributes
+        }
+
+    def _index(self, obj: Any) -> None:
+        for attr, index in self._indexes.items():
+            value = getattr(obj, attr, None)
+            if value is not None:
+                index.setdefault(value, {})[obj.id] = None
+
+    def _unindex(self, obj: Any) -> None:
+        for attr, index in self._indexes.items():
+            value = getattr(obj, attr, None)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(obj.id, None)
+                if not bucket:
+                    del index[value]
 
     def add(self, obj: Any) -> None:
         self._data[obj.id] = obj
+        self._index(obj)
 
     def get(self, obj_id: str) -> Optional[Any]:
         return self._data.get(obj_id)
@@ -56,24 +89,40 @@ class InMemoryRepository(Repository):
         if not obj:
             return None
 
-        if hasattr(obj, "update") and callable(getattr(obj, "update")):
-            obj.update(data)
-        else:
-            for key, value in data.items():
-                if hasattr(obj, key):
-                    setattr(obj, key, value)
+        self._unindex(obj)
+        try:
+            if hasattr(obj, "update") and callable(getattr(obj, "update")):
+                obj.update(data)
+            else:
+                for key, value in data.items():
+                    if hasattr(obj, key):
+                        setattr(obj, key, value)
 
-            if hasattr(obj, "save") and callable(getattr(obj, "save")):
-                obj.save()
+                if hasattr(obj, "save") and callable(getattr(obj, "save")):
+                    obj.save()
+        finally:
+            self._index(obj)
 
         return obj
 
     def delete(self, obj_id: str) -> None:
         if obj_id in self._data:
+            self._unindex(self._data[obj_id])
             del self._data[obj_id]
 
     def get_by_attribute(self, attr_name: str, attr_value: Any) -> Optional[Any]:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            bucket = index.get(attr_value)
+            return self._data[next(iter(bucket))] if bucket else None
         for obj in self._data.values():
             if getattr(obj, attr_name, None) == attr_value:
                 return obj
-        return None
\ No newline at end of file
+        return None
+
+    def get_all_by_attribute(self, attr_name: str, attr_value: Any) -> List[Any]:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return [self._data[i] for i in index.get(attr_value, ())]
+        return [obj for obj in self._data.values()
+                if getattr(obj, attr_name, None) == attr_value]
@@ -10,10 +10,10 @@ class HBnBFacade:
     """
 
     def __init__(self):
-        self.user_repo = InMemoryRepository()
+        self.user_repo = InMemoryRepository(indexed_attributes=("email",))
         self.amenity_repo = InMemoryRepository()
         self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
+        self.review_repo = InMemoryRepository(indexed_attributes=("place_id",))
 
 
     def create_user(self, data: dict):
@@ -34,8 +34,7 @@ class HBnBFacade:
         user = self.user_repo.get(user_id)
         if not user:
             return None
-        user.update(data)
-        return user
+        return self.user_repo.update(user_id, data)
 
     def create_amenity(self, data: dict):
         from app.models.amenity import Amenity
@@ -220,10 +219,9 @@ class HBnBFacade:
 
     def get_reviews_by_place(self, place_id: str):
         """Lister les reviews pour une place donnée."""
-        place = self.place_repo.get(place_id)
-        if not place:
+        if not self.place_repo.get(place_id):
             return None
-        return getattr(place, "reviews", [])
+        return self.review_repo.get_all_by_attribute("place_id", place_id)
 
     def update_review(self, review_id: str, data: dict):
         """Mettre à jour une review (text et/ou rating)."""
@@ -0,0 +1,50 @@
+"""Tests for InMemoryRepository secondary indexes."""
+
+import unittest
+from app.models.user import User
+from app.models.review import Review
+from app.persistence.repository import InMemoryRepository
+
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+    """Test cases for indexed attribute lookups."""
+
+    def test_unique_index_follows_update_and_delete(self):
+        """Test email index is maintained by update and delete."""
+        repo = InMemoryRepository(indexed_attributes=("email",))
+        user = User(first_name="Alice", last_name="Smith", email="alice@example.com")
+        repo.add(user)
+        self.assertIs(repo.get_by_attribute("email", "alice@example.com"), user)
+
+        repo.update(user.id, {"email": "alice.new@example.com"})
+        self.assertIsNone(repo.get_by_attribute("email", "alice@example.com"))
+        self.assertIs(repo.get_by_attribute("email", "alice.new@example.com"), user)
+
+        repo.delete(user.id)
+        self.assertIsNone(repo.get_by_attribute("email", "alice.new@example.com"))
+
+    def test_non_unique_index(self):
+        """Test multi-value index returns every matching object."""
+        repo = InMemoryRepository(indexed_attributes=("place_id",))
+        first = Review(text="Nice", rating=4, place_id="p1", user_id="u1")
+        second = Review(text="Great", rating=5, place_id="p1", user_id="u2")
+        other = Review(text="Meh", rating=2, place_id="p2", user_id="u1")
+        for review in (first, second, other):
+            repo.add(review)
+
+        self.assertEqual(repo.get_all_by_attribute("place_id", "p1"), [first, second])
+        repo.delete(first.id)
+        self.assertEqual(repo.get_all_by_attribute("place_id", "p1"), [second])
+        self.assertEqual(repo.get_all_by_attribute("place_id", "p3"), [])
+
+    def test_unindexed_attribute_falls_back_to_scan(self):
+        """Test lookups on undeclared attributes still work."""
+        repo = InMemoryRepository()
+        review = Review(text="Nice", rating=4, place_id="p1", user_id="u1")
+        repo.add(review)
+        self.assertEqual(repo.get_all_by_attribute("user_id", "u1"), [review])
+        self.assertIs(repo.get_by_attribute("user_id", "u1"), review)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -163,6 +163,11 @@ class TestReviewEndpoints(unittest.TestCase):
         self.assertIsInstance(response.json, list)
         self.assertGreaterEqual(len(response.json), 2)
 
+        review_id = response.json[0]["id"]
+        self.client.delete(f'/api/v1/reviews/{review_id}')
+        response = self.client.get(f'/api/v1/reviews/places/{self.place_id}/reviews')
+        self.assertNotIn(review_id, [r["id"] for r in response.json])
+
     def test_get_nonexistent_review(self):
         """Test getting a review that doesn't exist."""
         response = self.client.get('/api/v1/reviews/nonexistent-id')
@@ -4,9 +4,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from config import config
+from app.persistence.replica import RoutingSession
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
 
@@ -17,7 +18,15 @@ def create_app(config_name: str = 'development'):
 
 
     db.init_app(app)
+    from app.persistence.unit_of_work import init_app as init_unit_of_work
+    init_unit_of_work(app, db)
+    from app.persistence.versions import init_app as init_versions
+    init_versions(app, db)
+    from app.persistence.engine import init_app as init_engine
+    init_engine(app, db)
     bcrypt.init_app(app)
+    from app.passwords import init_app as init_passwords
+    init_passwords(app)
     jwt.init_app(app)
 
     from app.api.v1.users import api as users_ns
@@ -27,6 +36,10 @@ def create_app(config_name: str = 'development'):
     from app.api.v1.auth import api as auth_ns
 
     api = Api(app, version='1.0', title='HBnB API', description='HBnB Application API')
+    from app.api.representations import output_json
+    api.representations['application/json'] = output_json
+    from app.api.compression import init_app as init_compression
+    init_compression(app)
 
 
     api.add_namespace(auth_ns, path='/api/v1/auth')
@@ -0,0 +1,88 @@
+"""Response compression negotiated with Accept-Encoding.
+
+JSON and NDJSON bodies of at least COMPRESS_MIN_SIZE bytes are gzipped
+(or brotli-compressed when the optional ``brotli`` package is installed
+and the client prefers it). Streamed responses are compressed chunk by
+chunk, so exports keep their constant memory use.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE = frozenset({"application/json", "application/x-ndjson"})
+
+
+def _encoding():
+    accepted = request.accept_encodings
+    choices = [("gzip", accepted["gzip"])]
+    if brotli is not None:
+        choices.append(("br", accepted["br"]))
+    name, quality = max(choices, key=lambda c: c[1])
+    return name if quality > 0 else None
+
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _weaken_etag(response):
+    # A strong validator names one exact byte sequence
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_app(app) -> None:
+    """Compress eligible responses in an after_request hook."""
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+    level = app.config.get("COMPRESS_LEVEL", 6)
+
+    @app.after_request
+    def _compress(response):
+        if (response.mimetype not in COMPRESSIBLE or not 200 <= response.status_code < 300
+                or response.status_code == 204 or "Content-Encoding" in response.headers):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = _encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            chunks = response.response
+            response.response = (_brotli_stream(chunks, min(level, 11)) if encoding == "br"
+                                 else _gzip_stream(chunks, level))
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            if encoding == "br":
+                response.set_data(brotli.compress(body, quality=min(level, 11)))
+            else:
+                response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers["Content-Encoding"] = encoding
+        _weaken_etag(response)
+        return response
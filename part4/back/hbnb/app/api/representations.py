@@ -0,0 +1,39 @@
+"""JSON output of the API.
+
+With FAST_JSON enabled, bodies are encoded compactly (no indentation, even
+in DEBUG, and no spaces after separators) by orjson when it is installed,
+or by the standard library otherwise. Without it the flask-restx default
+encoder is used unchanged.
+"""
+import json
+from datetime import date, datetime
+
+from flask import current_app, make_response
+from flask_restx.representations import output_json as restx_output_json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data) -> str:
+    """Compact JSON text of ``data``."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+def output_json(data, code, headers=None):
+    """flask-restx representation for application/json."""
+    if not current_app.config.get("FAST_JSON"):
+        return restx_output_json(data, code, headers)
+    resp = make_response(dumps(data) + "\n", code)
+    resp.headers.extend(headers or {})
+    return resp
@@ -1,6 +1,12 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.api.v1.principal import current_principal
+from app.api.v1.pagination import page_args, page_headers
+from app.api.v1.http_cache import cache_headers, not_modified
+from app.api.v1.bulk import bulk_summary, chunk_size, ndjson_rows
+from app.api.v1.streaming import stream_response, wants_stream
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -21,14 +27,7 @@ class AmenityList(Resource):
     @jwt_required()
     def post(self):
         """Register a new amenity (admin only)"""
-        identity = get_jwt_identity()
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            current_user_obj = facade.get_user(current_user)
-            is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        is_admin = current_principal().is_admin
         if not is_admin:
             return {'error': 'Admin privileges required'}, 403
 
@@ -48,10 +47,43 @@ class AmenityList(Resource):
         return serialize_amenity(amenity), 201
 
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Catalog unchanged since the If-None-Match ETag')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.param('limit', 'Page size')
+    @api.param('cursor', 'Opaque cursor from the X-Next-Cursor header')
+    @api.param('stream', 'true to stream every amenity as one JSON array')
     def get(self):
-        """Retrieve a list of all amenities"""
-        amenities = facade.get_all_amenities()
-        return [serialize_amenity(a) for a in amenities], 200
+        """Retrieve amenities, one page at a time"""
+        if wants_stream():
+            return stream_response(facade.iter_amenities(), serialize_amenity)
+        try:
+            limit, cursor = page_args()
+            catalog = facade.get_amenity_catalog()
+            # Pages are cut from the snapshot the ETag describes
+            headers = {"ETag": f'"{catalog.etag}"'}
+            if request.if_none_match.contains_weak(catalog.etag):
+                return None, 304, headers
+            amenities, next_cursor = catalog.page(limit, cursor)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        headers.update(page_headers(next_cursor, limit))
+        return [serialize_amenity(a) for a in amenities], 200, headers
+
+
+@api.route('/bulk')
+class AmenityBulk(Resource):
+    @api.response(200, 'Import summary with per-line errors')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def post(self):
+        """Import amenities from an NDJSON body, one amenity per line (admin only)"""
+        is_admin = current_principal().is_admin
+        if not is_admin:
+            return {'error': 'Admin privileges required'}, 403
+
+        errors = []
+        created, row_errors = facade.bulk_create_amenities(ndjson_rows(errors), chunk_size())
+        return bulk_summary(created, errors + row_errors)
 
 
 @api.route('/<amenity_id>')
@@ -62,7 +94,10 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {"error": "Amenity not found"}, 404
-        return serialize_amenity(amenity), 200
+        headers = cache_headers("amenities", amenity)
+        if not_modified(headers):
+            return None, 304, headers
+        return serialize_amenity(amenity), 200, headers
 
     @api.expect(amenity_model, validate=True)
     @api.response(200, 'Amenity updated successfully')
@@ -71,14 +106,7 @@ class AmenityResource(Resource):
     @jwt_required()
     def put(self, amenity_id):
         """Update an amenity (admin only)"""
-        identity = get_jwt_identity()
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            current_user_obj = facade.get_user(current_user)
-            is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        is_admin = current_principal().is_admin
         if not is_admin:
             return {'error': 'Admin privileges required'}, 403
 
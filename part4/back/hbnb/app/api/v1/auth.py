@@ -25,11 +25,11 @@ class LoginResource(Resource):
             return {'error': 'email and password are required'}, 400
 
         user = facade.get_user_by_email(email)
-        print(user)
-        print(user.check_password(password))
         if not user or not user.check_password(password):
-            return {'error': f"{email} {password}Invalid email or password"}, 401
-
+            return {'error': 'Invalid email or password'}, 401
+        if user.needs_rehash():
+            # The password is only known here: upgrade the hash to the current cost
+            facade.update_user(user.id, {'password': password})
 
         claims = {
             'user_id': user.id,
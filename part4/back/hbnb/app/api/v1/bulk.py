@@ -0,0 +1,34 @@
+import json
+from flask import current_app, request
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def ndjson_rows(errors):
+    """Yield (line number, object) for each line of an NDJSON request body.
+
+    The body is read line by line as it streams in. Blank lines are
+    skipped; lines that are not a JSON object are appended to ``errors``.
+    """
+    for line, raw in enumerate(request.stream, 1):
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            errors.append({"line": line, "error": "invalid JSON"})
+            continue
+        if not isinstance(data, dict):
+            errors.append({"line": line, "error": "expected a JSON object"})
+            continue
+        yield line, data
+
+
+def chunk_size():
+    """Rows per INSERT statement, from the BULK_CHUNK_SIZE setting."""
+    return current_app.config.get("BULK_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def bulk_summary(created, errors):
+    """Response body of a bulk import: the count created and per-line errors."""
+    return {"created": created, "errors": sorted(errors, key=lambda e: e["line"])}, 200
@@ -0,0 +1,43 @@
+import hashlib
+from datetime import timezone
+from flask import current_app, request
+from werkzeug.http import http_date, parse_date, quote_etag, unquote_etag
+
+
+def cache_headers(namespace, *objs, last_modified=True):
+    """Validators and caching policy of a response built from ``objs``.
+
+    The weak ETag hashes the ``id`` and ``updated_at`` of every object the
+    body is made of, and Last-Modified is the newest ``updated_at``: both
+    come from columns already loaded, so they cost no serialization.
+    Cache-Control is the CACHE_CONTROL setting of ``namespace``.
+
+    Pass ``last_modified=False`` when the body also depends on objects
+    leaving it (an amenity unlinked, a review deleted): that changes the
+    set of IDs hashed into the ETag but no ``updated_at``.
+    """
+    digest = hashlib.sha1()
+    for obj in objs:
+        digest.update(f"{obj.id}:{obj.updated_at.isoformat()}\0".encode())
+    headers = {"ETag": quote_etag(digest.hexdigest()[:20], weak=True)}
+    if last_modified:
+        newest = max(obj.updated_at for obj in objs).replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = http_date(newest)
+    policy = current_app.config.get("CACHE_CONTROL", {}).get(namespace)
+    if policy:
+        headers["Cache-Control"] = policy
+    return headers
+
+
+def not_modified(headers):
+    """True when the request's conditional headers still match ``headers``.
+
+    If-None-Match wins over If-Modified-Since, as in RFC 9110: Last-Modified
+    only has a one-second resolution.
+    """
+    if request.if_none_match:
+        etag, _ = unquote_etag(headers["ETag"])
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return (since is not None and "Last-Modified" in headers
+            and parse_date(headers["Last-Modified"]) <= since)
@@ -0,0 +1,32 @@
+from urllib.parse import urlencode
+from flask import request
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def page_args():
+    """Read ``limit`` and ``cursor`` from the query string.
+
+    Raises ValueError when ``limit`` is not an integer in [1, MAX_LIMIT].
+    """
+    raw = request.args.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit, request.args.get("cursor") or None
+
+
+def page_headers(next_cursor, limit):
+    """Headers advertising the next page; empty on the last page."""
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args.update({"limit": limit, "cursor": next_cursor})
+    return {
+        "X-Next-Cursor": next_cursor,
+        "Link": f'<{request.base_url}?{urlencode(args)}>; rel="next"',
+    }
@@ -1,6 +1,12 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.api.v1.principal import current_principal
+from app.api.v1.pagination import page_args, page_headers
+from app.api.v1.http_cache import cache_headers, not_modified
+from app.api.v1.streaming import stream_response, wants_stream
+from app.api.v1.bulk import bulk_summary, chunk_size, ndjson_rows
 
 api = Namespace("places", description="Place operations")
 
@@ -35,6 +41,25 @@ def _serialize_place(p):
         "owner_id": getattr(p, "owner", None),
     }
 
+def _place_filters():
+    """Read the search filters of GET /places from the query string."""
+    filters = {}
+    for name in facade.PLACE_RANGE_FILTERS:
+        raw = request.args.get(name)
+        if raw in (None, ""):
+            continue
+        try:
+            filters[name] = float(raw)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+    amenities = request.args.get("amenities")
+    if amenities:
+        # "a,b|c": a AND (b OR c)
+        groups = [[a.strip() for a in group.split("|") if a.strip()]
+                  for group in amenities.split(",")]
+        filters["amenities"] = [group for group in groups if group]
+    return filters
+
 @api.route("/")
 class PlaceList(Resource):
     @api.expect(place_model, validate=True)
@@ -44,25 +69,7 @@ class PlaceList(Resource):
     @jwt_required()
     def post(self):
         """Create a new place (authenticated users only). Owner is set to the current user."""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
 
         data = api.payload or {}
 
@@ -80,11 +87,142 @@ class PlaceList(Resource):
             return {"error": msg}, 400
         return _serialize_place(place), 201
 
-    @api.response(200, "List of all places")
+    @api.response(200, "List of places")
+    @api.response(400, "Invalid pagination or filter parameters")
+    @api.param("limit", "Page size")
+    @api.param("cursor", "Opaque cursor from the X-Next-Cursor header")
+    @api.param("min_price", "Minimum price per night")
+    @api.param("max_price", "Maximum price per night")
+    @api.param("min_lat", "Bounding box: minimum latitude")
+    @api.param("max_lat", "Bounding box: maximum latitude")
+    @api.param("min_lng", "Bounding box: minimum longitude")
+    @api.param("max_lng", "Bounding box: maximum longitude")
+    @api.param("amenities", "Comma-separated amenity IDs the place must all have; "
+                            "a|b for either of two (a,b|c is a AND (b OR c))")
+    @api.param("sort", "rating (best average first) or reviews (most reviewed first)")
+    @api.param("stream", "true to stream every matching place as one JSON array")
+    def get(self):
+        """Search places, one page at a time"""
+        if wants_stream():
+            try:
+                places = facade.iter_places(
+                    _place_filters(), sort=request.args.get("sort") or None)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            return stream_response(places, _serialize_place)
+        try:
+            limit, cursor = page_args()
+            places, next_cursor = facade.search_places(
+                _place_filters(), limit, cursor, sort=request.args.get("sort") or None)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [_serialize_place(p) for p in places], 200, page_headers(next_cursor, limit)
+
+@api.route("/bulk")
+class PlaceBulk(Resource):
+    @api.response(200, "Import summary with per-line errors")
+    @jwt_required()
+    def post(self):
+        """Import places from an NDJSON body, one place per line (authenticated users only).
+
+        Valid lines are inserted in a single transaction; invalid ones are
+        skipped and reported by line number. The owner is the current user.
+        """
+        current_user, is_admin = current_principal()
+
+        errors = []
+
+        def rows():
+            for line, data in ndjson_rows(errors):
+                if not is_admin:
+                    if data.get('owner_id') and data.get('owner_id') != current_user:
+                        errors.append({"line": line, "error": "Unauthorized action"})
+                        continue
+                    data['owner_id'] = current_user
+                yield line, data
+
+        created, row_errors = facade.bulk_create_places(rows(), chunk_size())
+        return bulk_summary(created, errors + row_errors)
+
+@api.route("/search")
+class PlaceSearch(Resource):
+    @api.response(200, "Matching places, best match first")
+    @api.response(400, "Missing query or invalid pagination parameters")
+    @api.param("q", "Words to look for in titles and descriptions (prefixes match)",
+               required=True)
+    @api.param("limit", "Page size")
+    @api.param("cursor", "Opaque cursor from the X-Next-Cursor header")
+    def get(self):
+        """Full-text search over place titles and descriptions"""
+        try:
+            limit, cursor = page_args()
+            places, next_cursor = facade.search_places_text(
+                request.args.get("q", ""), limit, cursor)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [_serialize_place(p) for p in places], 200, page_headers(next_cursor, limit)
+
+@api.route("/suggest")
+class PlaceSuggest(Resource):
+    @api.response(200, "Suggested places, best match first")
+    @api.response(400, "Missing prefix or invalid limit")
+    @api.param("prefix", "What was typed so far; typos are tolerated", required=True)
+    @api.param("limit", "Number of suggestions (default 10, max 20)")
+    def get(self):
+        """As-you-type suggestions of place titles"""
+        try:
+            limit = int(request.args.get("limit", 10))
+        except ValueError:
+            return {"error": "limit must be an integer"}, 400
+        try:
+            suggestions = facade.suggest_place_titles(request.args.get("prefix", ""), limit)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [{"id": place_id, "title": title} for place_id, title in suggestions], 200
+
+@api.route("/top")
+class PlaceTop(Resource):
+    @api.response(200, "Best-rated places, best first")
+    @api.response(400, "Invalid limit or coordinates")
+    @api.param("limit", "Number of places (default 10, max 100)")
+    @api.param("lat", "With lng: rank the places of the region around this point")
+    @api.param("lng", "With lat: rank the places of the region around this point")
+    def get(self):
+        """Leaderboard of places by Bayesian average rating"""
+        try:
+            limit = int(request.args.get("limit", 10))
+            lat, lng = (float(request.args[k]) if request.args.get(k) else None
+                        for k in ("lat", "lng"))
+        except ValueError:
+            return {"error": "limit must be an integer, lat and lng numbers"}, 400
+        try:
+            top = facade.get_top_places(limit, lat, lng)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [dict(_serialize_place(p), score=round(s, 4)) for p, s in top], 200
+
+@api.route("/nearby")
+class PlaceNearby(Resource):
+    @api.response(200, "Places within the radius, nearest first")
+    @api.response(400, "Invalid coordinates or radius")
+    @api.param("lat", "Latitude of the center", required=True)
+    @api.param("lng", "Longitude of the center", required=True)
+    @api.param("radius_km", "Search radius in kilometers (default 10)")
+    @api.param("limit", "Maximum number of places")
     def get(self):
-        """Get all places"""
-        places = facade.get_all_places()
-        return [_serialize_place(p) for p in places], 200
+        """Get places close to a point"""
+        try:
+            lat = float(request.args["lat"])
+            lng = float(request.args["lng"])
+            radius_km = float(request.args.get("radius_km", 10))
+        except (KeyError, ValueError):
+            return {"error": "lat and lng are required and must be numbers"}, 400
+        try:
+            limit, _ = page_args()
+            nearby = facade.get_nearby_places(lat, lng, radius_km, limit)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [dict(_serialize_place(p), distance_km=round(d, 3)) for p, d in nearby], 200
 
 @api.route("/<place_id>")
 class PlaceResource(Resource):
@@ -96,12 +234,19 @@ class PlaceResource(Resource):
         if not res:
             return {"error": "Place not found"}, 404
         place = res["place"]
+        # The body embeds the owner, amenities and reviews: they are part of
+        # the ETag. Unlinking one changes no updated_at, so no Last-Modified
+        related = [res["owner"]] if res.get("owner") else []
+        headers = cache_headers("places", place, *related, *res.get("amenities", []),
+                                *res.get("reviews", []), last_modified=False)
+        if not_modified(headers):
+            return None, 304, headers
         data = _serialize_place(place)
         if res.get("owner"):
             data["owner"] = res["owner"].to_dict()
         data["amenities"] = [{"id": a.id, "name": getattr(a, "name", None)} for a in res.get("amenities", [])]
         data["reviews"] = [{"id": r.id, "text": getattr(r, "text", None)} for r in res.get("reviews", [])]
-        return data, 200
+        return data, 200, headers
 
     @api.expect(place_update_model, validate=True)
     @api.response(200, "Place updated successfully")
@@ -110,25 +255,7 @@ class PlaceResource(Resource):
     @jwt_required()
     def put(self, place_id):
         """Update an existing place (only owner can update)."""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
 
         res = facade.get_place(place_id)
         if not res:
@@ -165,6 +292,26 @@ class PlaceReviewList(Resource):
         reviews = place.get("reviews", [])
         return [{"id": r.id, "text": getattr(r, "text", None), "rating": getattr(r, "rating", None), "user_id": getattr(r, "user_id", None)} for r in reviews], 200
 
+@api.route("/<place_id>/similar")
+class PlaceSimilar(Resource):
+    @api.response(200, "Most similar places, best first")
+    @api.response(400, "Invalid limit")
+    @api.response(404, "Place not found")
+    @api.param("limit", "Number of places (default 10, max 50)")
+    def get(self, place_id):
+        """Places like this one: shared amenities, close price, nearby"""
+        try:
+            limit = int(request.args.get("limit", 10))
+        except ValueError:
+            return {"error": "limit must be an integer"}, 400
+        try:
+            similar = facade.get_similar_places(place_id, limit)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if similar is None:
+            return {"error": "Place not found"}, 404
+        return [dict(_serialize_place(p), score=round(s, 4)) for p, s in similar], 200
+
 @api.route("/<place_id>/amenities")
 class PlaceAmenityList(Resource):
     @api.response(200, "List of amenities for the place")
@@ -184,25 +331,7 @@ class PlaceAmenityList(Resource):
     @jwt_required()
     def post(self, place_id):
         """Add an amenity to a place (owner only)"""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
 
         place_res = facade.get_place(place_id)
         if not place_res:
@@ -221,13 +350,9 @@ class PlaceAmenityList(Resource):
         if not amenity:
             return {"error": "Amenity not found"}, 404
 
-        if amenity not in place.amenities:
-            place.amenities.append(amenity)
-            current_ids = [a.id for a in place.amenities]
-            current_amenities = place_res.get("amenities", [])
-            current_ids = [a.id for a in current_amenities]
-            if amenity_id not in current_ids:
-                current_ids.append(amenity_id)
-                facade.update_place(place_id, {"amenities": current_ids})
+        current_ids = [a.id for a in place.amenities]
+        if amenity_id not in current_ids:
+            # Through the facade, which keeps the amenity index in step
+            facade.update_place(place_id, {"amenities": current_ids + [amenity_id]})
 
         return {"message": "Amenity added successfully"}, 200
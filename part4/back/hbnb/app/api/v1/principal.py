@@ -0,0 +1,31 @@
+from typing import NamedTuple, Optional
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+
+class Principal(NamedTuple):
+    """The authenticated caller: ``user_id, is_admin = current_principal()``."""
+    user_id: str
+    is_admin: bool
+
+
+def current_principal() -> Optional[Principal]:
+    """The caller of a ``@jwt_required`` endpoint, or None without a token.
+
+    ``is_admin`` is read from the signed claim LoginResource.post puts in
+    the access token, so no user is loaded from the database. The result is
+    kept in ``flask.g`` for the rest of the request.
+    """
+    if "principal" not in g:
+        g.principal = _resolve_principal()
+    return g.principal
+
+
+def _resolve_principal():
+    identity = get_jwt_identity()
+    if identity is None:
+        return None
+    if isinstance(identity, dict):
+        return Principal(identity.get("id") or identity.get("user_id"),
+                         bool(identity.get("is_admin", False)))
+    return Principal(identity, bool(get_jwt().get("is_admin", False)))
@@ -1,8 +1,12 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt
+from app.api.v1.principal import current_principal
+from app.api.v1.pagination import page_args, page_headers
+from app.api.v1.http_cache import cache_headers, not_modified
+from app.api.v1.streaming import stream_response, wants_stream
+from app.api.v1.bulk import bulk_summary, chunk_size, ndjson_rows
 
 api = Namespace('reviews', description='Review operations')
 
@@ -36,47 +40,22 @@ class ReviewList(Resource):
     @jwt_required()
     def post(self):
         """Register a new review (authenticated only). Prevent self-review and duplicates."""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
         data = api.payload or {}
 
         place_id = data.get('place_id')
         if not place_id:
             return {'error': 'place_id is required'}, 400
 
-        place_res = facade.get_place(place_id)
-        if not place_res:
+        owner_id = facade.get_place_owner_id(place_id)
+        if owner_id is None:
             return {'error': 'Place not found'}, 404
 
-        place = place_res.get('place')
         # Prevent users from reviewing their own place (admins can bypass)
-        if not is_admin and getattr(place, 'owner_id', None) == current_user:
+        if not is_admin and owner_id == current_user:
             return {'error': 'You cannot review your own place'}, 400
 
-        # Prevent duplicate reviews by same user on same place (admins can bypass)
-        if not is_admin:
-            reviews = facade.get_reviews_by_place(place_id) or []
-            for r in reviews:
-                if getattr(r, 'user_id', None) == current_user:
-                    return {'error': 'You have already reviewed this place'}, 400
-
+        # One review per user and place: create_review checks it
         data['user_id'] = current_user
         try:
             new_review = facade.create_review(data)
@@ -86,9 +65,44 @@ class ReviewList(Resource):
         return serialize_review(new_review), 201
 
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.param('limit', 'Page size')
+    @api.param('cursor', 'Opaque cursor from the X-Next-Cursor header')
+    @api.param('stream', 'true to stream every review as one JSON array')
     def get(self):
-        reviews = facade.get_all_reviews()
-        return [serialize_review(r) for r in reviews], 200
+        if wants_stream():
+            return stream_response(facade.iter_reviews(), serialize_review)
+        try:
+            limit, cursor = page_args()
+            reviews, next_cursor = facade.get_reviews_page(limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return [serialize_review(r) for r in reviews], 200, page_headers(next_cursor, limit)
+
+
+@api.route('/bulk')
+class ReviewBulk(Resource):
+    @api.response(200, 'Import summary with per-line errors')
+    @jwt_required()
+    def post(self):
+        """Import reviews from an NDJSON body, one review per line (authenticated only).
+
+        Reviews are written as the current user, with the same self-review
+        and duplicate rules as single creation. Valid lines are inserted in
+        a single transaction; invalid ones are reported by line number.
+        """
+        current_user, is_admin = current_principal()
+
+        errors = []
+
+        def rows():
+            for line, data in ndjson_rows(errors):
+                data['user_id'] = current_user
+                yield line, data
+
+        created, row_errors = facade.bulk_create_reviews(
+            rows(), restricted=not is_admin, chunk_size=chunk_size())
+        return bulk_summary(created, errors + row_errors)
 
 
 @api.route('/<review_id>')
@@ -99,7 +113,10 @@ class ReviewResource(Resource):
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
-        return serialize_review(review), 200
+        headers = cache_headers('reviews', review)
+        if not_modified(headers):
+            return None, 304, headers
+        return serialize_review(review), 200, headers
 
     @jwt_required(optional=True)
     @api.expect(review_update_model, validate=True)
@@ -109,25 +126,7 @@ class ReviewResource(Resource):
     @jwt_required()
     def put(self, review_id):
         """Update a review's information (only author can update)."""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
         data = api.payload or {}
 
         review = facade.get_review(review_id)
@@ -153,25 +152,7 @@ class ReviewResource(Resource):
     @jwt_required()
     def delete(self, review_id):
         """Delete a review (only author can delete)."""
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            from flask_jwt_extended import get_jwt
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = getattr(current_user_obj, 'is_admin', False) if current_user_obj else False
+        current_user, is_admin = current_principal()
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
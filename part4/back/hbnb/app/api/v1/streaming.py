@@ -0,0 +1,49 @@
+from flask import Response, request, stream_with_context
+from app.api.representations import dumps
+
+NDJSON = "application/x-ndjson"
+# Bytes buffered before each write to the client
+FLUSH_SIZE = 64 * 1024
+
+
+def wants_stream():
+    """True when the client asked for the whole collection at once:
+    ``?stream=true`` for a JSON array, or ``Accept: application/x-ndjson``."""
+    return (request.args.get("stream", "").lower() in ("1", "true")
+            or _wants_ndjson())
+
+
+def _wants_ndjson():
+    return request.accept_mimetypes.best == NDJSON
+
+
+def stream_response(items, serialize):
+    """Response writing ``items`` as they are produced.
+
+    The body is a JSON array, or one JSON object per line when the client
+    accepts NDJSON. Only the current buffer is held in memory, so with an
+    ``items`` iterator loading rows by batch a full table export runs in
+    constant memory.
+    """
+    ndjson = _wants_ndjson()
+
+    def generate():
+        buf, size, opened = [], 0, False
+        for item in items:
+            data = dumps(serialize(item))
+            if ndjson:
+                part = data + "\n"
+            else:
+                part = ("," if opened else "[") + data
+                opened = True
+            buf.append(part)
+            size += len(part)
+            if size >= FLUSH_SIZE:
+                yield "".join(buf)
+                buf, size = [], 0
+        if not ndjson:
+            buf.append("]" if opened else "[]")
+        yield "".join(buf)
+
+    return Response(stream_with_context(generate()),
+                    mimetype=NDJSON if ndjson else "application/json")
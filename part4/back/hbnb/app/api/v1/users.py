@@ -1,7 +1,11 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_jwt_extended import get_jwt
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.api.v1.principal import current_principal
+from app.api.v1.pagination import page_args, page_headers
+from app.api.v1.http_cache import cache_headers, not_modified
+from app.api.v1.streaming import stream_response, wants_stream
+from app.api.v1.reviews import serialize_review
 
 api = Namespace('users', description='User operations')
 
@@ -32,10 +36,20 @@ class UserList(Resource):
             return {'message': str(e)}, 400
 
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.param('limit', 'Page size')
+    @api.param('cursor', 'Opaque cursor from the X-Next-Cursor header')
+    @api.param('stream', 'true to stream every user as one JSON array')
     def get(self):
-        """Retrieve all users"""
-        users = facade.get_all_users()
-        return [u.to_dict() for u in users], 200
+        """Retrieve users, one page at a time"""
+        if wants_stream():
+            return stream_response(facade.iter_users(), lambda u: u.to_dict())
+        try:
+            limit, cursor = page_args()
+            users, next_cursor = facade.get_users_page(limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return [u.to_dict() for u in users], 200, page_headers(next_cursor, limit)
 
 @api.route('/<user_id>')
 class UserResource(Resource):
@@ -46,7 +60,10 @@ class UserResource(Resource):
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
-        return user.to_dict(), 200
+        headers = cache_headers('users', user)
+        if not_modified(headers):
+            return None, 304, headers
+        return user.to_dict(), 200, headers
 
     @api.expect(user_model, validate=False)
     @api.response(200, 'User updated successfully')
@@ -59,24 +76,7 @@ class UserResource(Resource):
         Admins can update any user (including email/password).
         Non-admins can only update their own profile and cannot change email/password.
         """
-        identity = get_jwt_identity()
-        jwt_claims = None
-        try:
-            jwt_claims = get_jwt()
-        except Exception:
-            jwt_claims = None
-
-        is_admin = False
-        if isinstance(identity, dict):
-            current_user = identity.get('id') or identity.get('user_id')
-            is_admin = bool(identity.get('is_admin', False))
-        else:
-            current_user = identity
-            if jwt_claims and 'is_admin' in jwt_claims:
-                is_admin = bool(jwt_claims.get('is_admin', False))
-            else:
-                current_user_obj = facade.get_user(current_user)
-                is_admin = bool(current_user_obj and getattr(current_user_obj, 'is_admin', False))
+        current_user, is_admin = current_principal()
 
         # Non-admins can only edit themselves
         if not is_admin and user_id != current_user:
@@ -106,3 +106,23 @@ class UserResource(Resource):
             return updated_user.to_dict(), 200
         except ValueError as e:
             return {'error': str(e)}, 400
+
+
+@api.route('/<user_id>/reviews')
+class UserReviewList(Resource):
+    @api.response(200, 'Reviews written by the user')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.response(404, 'User not found')
+    @api.param('limit', 'Page size')
+    @api.param('cursor', 'Opaque cursor from the X-Next-Cursor header')
+    def get(self, user_id):
+        """Retrieve the reviews written by a user, one page at a time"""
+        try:
+            limit, cursor = page_args()
+            page = facade.get_reviews_by_user_page(user_id, limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if page is None:
+            return {'error': 'User not found'}, 404
+        reviews, next_cursor = page
+        return [serialize_review(r) for r in reviews], 200, page_headers(next_cursor, limit)
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from app import db
+from app.persistence.unit_of_work import commit
 
 
 class BaseModel(db.Model):
@@ -10,18 +11,18 @@ class BaseModel(db.Model):
     
     # Colonnes communes à tous les modèles
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     def save(self):
         """Save to database."""
         db.session.add(self)
-        db.session.commit()
+        commit(db.session)
 
     def delete(self):
         """Delete from database."""
         db.session.delete(self)
-        db.session.commit()
+        commit(db.session)
 
     def update(self, data):
         """Update attributes from dictionary."""
@@ -1,18 +1,34 @@
+from sqlalchemy import bindparam, case, select, text
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import validates
 from app import db
 from app.models.base_model import BaseModel
+from app.persistence.geo import grid_cell
+from app.persistence.migrations import added_columns
+from app.persistence.search import full_text_index
+from app.persistence.versions import track_versions
 
 class Place(BaseModel):
     """Represents a place in the HolbertonBnB application."""
 
     __tablename__ = 'places'
+    __table_args__ = (
+        db.Index('ix_places_price', 'price'),
+        db.Index('ix_places_latitude_longitude', 'latitude', 'longitude'),
+    )
 
     # Colonnes
-    title = db.Column(db.String(100), nullable=False)
+    title = db.Column(db.String(100), nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    # Spatial grid bucket of (latitude, longitude), see app.persistence.geo
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
+    # Review aggregates, maintained by the facade with every review write
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relations
     reviews = db.relationship('Review', backref='place', lazy=True, cascade='all, delete-orphan')
@@ -26,6 +42,24 @@ class Place(BaseModel):
         self.latitude = latitude
         self.longitude = longitude
         self.owner_id = owner_id
+        self.review_count = 0
+        self.rating_sum = 0
+
+    @hybrid_property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0.0
+
+    @average_rating.expression
+    def average_rating(cls):
+        return case((cls.review_count > 0, cls.rating_sum * 1.0 / cls.review_count),
+                    else_=0.0)
+
+    @validates('latitude', 'longitude')
+    def _update_geo_cell(self, key, value):
+        lat = value if key == 'latitude' else self.latitude
+        lng = value if key == 'longitude' else self.longitude
+        self.geo_cell = grid_cell(lat, lng)
+        return value
 
     def to_dict(self):
         return {
@@ -36,13 +70,45 @@ class Place(BaseModel):
             "latitude": self.latitude,
             "longitude": self.longitude,
             "owner_id": self.owner_id,
+            "review_count": self.review_count,
+            "average_rating": round(self.average_rating, 2) if self.review_count else None,
             "amenities": [amenity.id for amenity in self.amenities],
             "reviews": [review.id for review in self.reviews],
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
+# Title matches rank well above description matches
+full_text_index(Place, title=10.0, description=1.0)
+
+
+def _backfill_geo_cell(connection):
+    places = Place.__table__
+    rows = connection.execute(select(places.c.id, places.c.latitude, places.c.longitude))
+    cells = [{"place_id": place_id, "cell": grid_cell(lat, lng)}
+             for place_id, lat, lng in rows if lat is not None and lng is not None]
+    if cells:
+        connection.execute(places.update().where(places.c.id == bindparam("place_id"))
+                           .values(geo_cell=bindparam("cell")), cells)
+
+
+added_columns(Place, "geo_cell", backfill=_backfill_geo_cell)
+
+
+def _backfill_review_aggregates(connection):
+    connection.execute(text(
+        "UPDATE places SET"
+        " review_count = (SELECT COUNT(*) FROM reviews WHERE reviews.place_id = places.id),"
+        " rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews"
+        " WHERE reviews.place_id = places.id)"))
+
+
+added_columns(Place, "review_count", "rating_sum", backfill=_backfill_review_aggregates)
+
 place_amenity = db.Table('place_amenity',
     db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
     db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
-)
\ No newline at end of file
+)
+# The in-process indexes are checked against them (app.services.live_index)
+track_versions(Place.__table__)
+track_versions(place_amenity)
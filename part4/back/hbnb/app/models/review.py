@@ -21,6 +21,12 @@ class Review(BaseModel):
     """
 
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # One review per user and place; its place_id prefix serves place lookups
+        _get_db().Index('ux_reviews_place_id_user_id', 'place_id', 'user_id', unique=True),
+        # A user's reviews, already in listing order
+        _get_db().Index('ix_reviews_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     text = _get_db().Column(_get_db().String(), nullable=False)
     rating = _get_db().Column(_get_db().Integer, nullable=False)
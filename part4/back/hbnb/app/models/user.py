@@ -1,4 +1,4 @@
-from app import db, bcrypt
+from app import db, passwords
 from app.models.base_model import BaseModel
 from sqlalchemy.ext.hybrid import hybrid_property
 import re
@@ -73,10 +73,14 @@ class User(BaseModel):
         self.hash_password(value)
 
     def hash_password(self, password):
-        self._password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self._password = passwords.hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password, password)
+        return passwords.check_password(self.password, password)
+
+    def needs_rehash(self):
+        """True when the stored hash does not use the configured bcrypt cost."""
+        return passwords.needs_rehash(self.password)
 
     def to_dict(self):
         return {
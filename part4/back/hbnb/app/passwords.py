@@ -0,0 +1,65 @@
+"""bcrypt hashing with a cap on how many hashes run at once.
+
+A bcrypt hash or check costs ~250 ms of CPU at the default cost of 12 and
+runs on the request thread that needs it. The bcrypt backend releases the
+GIL, so hashes of several threads run in parallel; each app allows at most
+PASSWORD_HASH_CONCURRENCY of them at a time (default: one per CPU). A burst
+of logins then waits for a slot instead of taking every core from the other
+request threads. The waiting requests still hold their threads: this bounds
+CPU use, not the number of busy threads.
+
+The cost is BCRYPT_LOG_ROUNDS; hashes made with another cost are upgraded
+on the next successful login (see ``needs_rehash``).
+"""
+import os
+import threading
+from contextlib import nullcontext
+from typing import Any
+
+from flask import current_app, has_app_context
+
+from app import bcrypt
+
+DEFAULT_ROUNDS = 12
+
+_EXTENSION = "passwords"
+
+
+def init_app(app) -> None:
+    """Give ``app`` its own hashing slots, sized by its config."""
+    limit = app.config.get("PASSWORD_HASH_CONCURRENCY") or os.cpu_count() or 1
+    app.extensions[_EXTENSION] = threading.BoundedSemaphore(limit)
+
+
+def _config(key: str, default: Any) -> Any:
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def _slot():
+    """One of the app's hashing slots; no limit outside an app."""
+    slots = current_app.extensions.get(_EXTENSION) if has_app_context() else None
+    return slots if slots is not None else nullcontext()
+
+
+def rounds() -> int:
+    return _config("BCRYPT_LOG_ROUNDS", DEFAULT_ROUNDS)
+
+
+def hash_password(password: str) -> str:
+    with _slot():
+        hashed = bcrypt.generate_password_hash(password, rounds())
+    return hashed.decode("utf-8")
+
+
+def check_password(hashed: str, password: str) -> bool:
+    with _slot():
+        return bcrypt.check_password_hash(hashed, password)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when ``hashed`` was not made with the configured cost."""
+    try:
+        cost = int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return cost != rounds()
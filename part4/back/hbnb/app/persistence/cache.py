@@ -0,0 +1,336 @@
+"""Read-through cache for SQLAlchemy repositories.
+
+CachedRepository wraps a SQLAlchemyRepository and serves ``get`` from two
+layers before falling back to the database:
+
+* a per-request identity map kept in ``flask.g``, so looking the same id
+  up several times in one request returns the same object at no cost;
+* a process-wide LRU of column snapshots, bounded in size and age. A hit
+  is attached to the current session with ``merge(load=False)``, which
+  does not emit a SELECT; relationships still lazy-load as usual.
+
+Every ORM write flushed by this process evicts the rows it touched
+(including cascaded deletes and changes made through ``obj.save()``), once
+at flush and again when the transaction ends, and nothing is cached while
+the session holds uncommitted writes. Other processes sharing the database
+may see rows up to ``ttl`` seconds old.
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set,
+                    Tuple)
+
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.persistence.replica import primary
+from app.persistence.repository import Repository
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 60.0
+
+# session.info key: (model, id) pairs written in the open transaction
+_PENDING = "cache_pending"
+
+_repositories: "weakref.WeakSet[CachedRepository]" = weakref.WeakSet()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping whose entries expire ``ttl`` seconds after
+    being stored.
+
+    ``version`` is bumped by every ``pop``/``clear``; ``set`` given the
+    version read before loading a value drops it if an invalidation ran
+    in between, so a concurrent write cannot be overwritten by stale data.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self.version += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+
+class CachedRepository(Repository):
+    """Caching decorator around a SQLAlchemyRepository.
+
+    Only ``get`` and ``get_many`` are cached; every other call is
+    delegated unchanged, and ``update``, ``increment`` and ``delete`` evict
+    the object they touch.
+    Attributes the wrapper does not define (``model``, ``db``...) are read
+    from the wrapped repository.
+    """
+
+    def __init__(self, repository: Repository, maxsize: int = DEFAULT_MAXSIZE,
+                 ttl: float = DEFAULT_TTL) -> None:
+        self._repo = repository
+        self._cache = LRUCache(maxsize, ttl)
+        self.identity_hits = 0
+        _repositories.add(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._repo, name)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters, for monitoring the hit ratio."""
+        return {
+            "identity_hits": self.identity_hits,
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "size": len(self._cache),
+        }
+
+    def _identity_map(self) -> Optional[Dict[Tuple[Any, str], Any]]:
+        if not has_app_context():
+            return None
+        if "identity_cache" not in g:
+            g.identity_cache = {}
+        return g.identity_cache
+
+    def _snapshot(self, obj: Any) -> Optional[Dict[str, Any]]:
+        # Only clean, fully loaded rows the database has committed.
+        if self._repo.db.session.info.get(_PENDING):
+            return None
+        state = inspect(obj)
+        if state.modified or state.expired_attributes:
+            return None
+        keys = state.mapper.column_attrs.keys()
+        if any(key not in state.dict for key in keys):
+            return None
+        return {key: state.dict[key] for key in keys}
+
+    def _restore(self, snapshot: Dict[str, Any]) -> Any:
+        session = self._repo.db.session
+        mapper = inspect(self.model)
+        identity = mapper.identity_key_from_primary_key([snapshot["id"]])
+        current = session.identity_map.get(identity)
+        if current is not None:
+            return current
+        obj = mapper.class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return session.merge(obj, load=False)
+
+    def evict(self, obj_id: str) -> None:
+        """Drop an object from both cache layers."""
+        self._cache.pop(obj_id)
+        identity = self._identity_map()
+        if identity is not None:
+            identity.pop((self.model, obj_id), None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        identity = self._identity_map()
+        if identity is not None:
+            for key in [k for k in identity if k[0] is self.model]:
+                del identity[key]
+
+    def add(self, obj: Any) -> None:
+        self._repo.add(obj)
+
+    def add_many(self, objs: Iterable[Any], chunk_size: int = 1000) -> int:
+        return self._repo.add_many(objs, chunk_size)
+
+    def get(self, obj_id: str) -> Optional[Any]:
+        identity = self._identity_map()
+        key = (self.model, obj_id)
+        if identity is not None and key in identity:
+            self.identity_hits += 1
+            return identity[key]
+
+        snapshot = self._cache.get(obj_id)
+        if snapshot is not None:
+            obj = self._restore(snapshot)
+        else:
+            version = self._cache.version
+            # Fills come from the primary: a lagging replica row would stay cached
+            with primary(self._repo.db.session):
+                obj = self._repo.get(obj_id)
+            if obj is not None:
+                snapshot = self._snapshot(obj)
+                if snapshot is not None:
+                    self._cache.set(obj_id, snapshot, version)
+
+        if obj is not None and identity is not None:
+            identity[key] = obj
+        return obj
+
+    def get_many(self, obj_ids: Iterable[str]) -> Dict[str, Any]:
+        """Cached objects first, then one batched query for the rest."""
+        identity = self._identity_map()
+        found, missing = {}, []
+        for obj_id in dict.fromkeys(obj_ids):
+            if identity is not None and (self.model, obj_id) in identity:
+                self.identity_hits += 1
+                found[obj_id] = identity[(self.model, obj_id)]
+                continue
+            snapshot = self._cache.get(obj_id)
+            if snapshot is not None:
+                found[obj_id] = self._restore(snapshot)
+            else:
+                missing.append(obj_id)
+
+        if missing:
+            version = self._cache.version
+            with primary(self._repo.db.session):
+                loaded = self._repo.get_many(missing)
+            for obj_id, obj in loaded.items():
+                snapshot = self._snapshot(obj)
+                if snapshot is not None:
+                    self._cache.set(obj_id, snapshot, version)
+            found.update(loaded)
+
+        if identity is not None:
+            for obj_id, obj in found.items():
+                identity[(self.model, obj_id)] = obj
+        return found
+
+    def get_with_relations(self, obj_id: str, *relationships: str) -> Optional[Any]:
+        return self._repo.get_with_relations(obj_id, *relationships)
+
+    def get_all(self) -> List[Any]:
+        return self._repo.get_all()
+
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 relationships: Iterable[str] = (),
+                 criteria: Iterable[Tuple[str, str, Any]] = (),
+                 order_by: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        return self._repo.get_page(limit, cursor, relationships, criteria, order_by)
+
+    def iterate(self, relationships: Iterable[str] = (),
+                criteria: Iterable[Tuple[str, str, Any]] = (),
+                order_by: Optional[str] = None, batch_size: int = 1000) -> Iterator[Any]:
+        return self._repo.iterate(relationships, criteria, order_by, batch_size)
+
+    def iterate_values(self, attr_names: Iterable[str],
+                       batch_size: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        return self._repo.iterate_values(attr_names, batch_size)
+
+    def iterate_related_ids(self, relationship: str,
+                            batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        return self._repo.iterate_related_ids(relationship, batch_size)
+
+    def search(self, text: str, limit: int, cursor: Optional[str] = None,
+               relationships: Iterable[str] = ()) -> Tuple[List[Any], Optional[str]]:
+        return self._repo.search(text, limit, cursor, relationships)
+
+    def get_by_attribute(self, attr_name: str, attr_value: Any) -> Optional[Any]:
+        return self._repo.get_by_attribute(attr_name, attr_value)
+
+    def get_all_by_attribute(self, attr_name: str, attr_value: Any) -> List[Any]:
+        return self._repo.get_all_by_attribute(attr_name, attr_value)
+
+    def get_all_by_attribute_ranges(self, attr_name: str, ranges: Iterable[Tuple[Any, Any]],
+                                    relationships: Iterable[str] = ()) -> List[Any]:
+        return self._repo.get_all_by_attribute_ranges(attr_name, ranges, relationships)
+
+    def exists_by_attribute(self, attr_name: str, attr_value: Any) -> bool:
+        return self._repo.exists_by_attribute(attr_name, attr_value)
+
+    def exists(self, criteria: Iterable[Tuple[str, str, Any]]) -> bool:
+        return self._repo.exists(criteria)
+
+    def existing_values(self, attr_name: str, values: Iterable[Any]) -> Set[Any]:
+        return self._repo.existing_values(attr_name, values)
+
+    def update(self, obj_id: str, data: Dict[str, Any]) -> Optional[Any]:
+        try:
+            return self._repo.update(obj_id, data)
+        finally:
+            self.evict(obj_id)
+
+    def increment(self, obj_id: str, deltas: Dict[str, Any]) -> None:
+        # A bulk UPDATE: no flush event sees it, track it by hand.
+        self._repo.increment(obj_id, deltas)
+        self.evict(obj_id)
+        _mark_pending(self._repo.db.session, self.model, obj_id)
+
+    def delete(self, obj_id: str) -> None:
+        try:
+            self._repo.delete(obj_id)
+        finally:
+            self.evict(obj_id)
+
+
+def _evict(model: Any, obj_id: str) -> None:
+    for repo in list(_repositories):
+        if issubclass(model, repo.model):
+            repo.evict(obj_id)
+
+
+def _mark_pending(session: Session, model: Any, obj_id: str) -> None:
+    session.info.setdefault(_PENDING, set()).add((model, obj_id))
+
+
+def _written(session: Session, instance: Any) -> None:
+    obj_id = inspect(instance).identity
+    if obj_id:
+        _evict(type(instance), obj_id[0])
+        _mark_pending(session, type(instance), obj_id[0])
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    for instance in list(session.dirty) + list(session.deleted):
+        _written(session, instance)
+
+
+@event.listens_for(Session, "persistent_to_deleted")
+def _persistent_to_deleted(session, instance):
+    # Also fires for delete-orphan cascades missing from session.deleted
+    _written(session, instance)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _after_transaction(session):
+    # Rows read by other threads while the transaction was open may have
+    # been cached in between: evict again now that it is settled.
+    for model, obj_id in session.info.pop(_PENDING, ()):
+        _evict(model, obj_id)
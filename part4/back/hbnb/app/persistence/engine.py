@@ -0,0 +1,30 @@
+"""SQLite connection tuning.
+
+``init_app`` runs the SQLITE_PRAGMAS of the config on every new SQLite
+connection of the app's engines (primary and binds). The defaults switch to write-ahead logging,
+where readers no longer block on a writer (and the reverse), with
+``synchronous=NORMAL``, which is still crash-safe in WAL mode but only syncs
+at checkpoints. ``busy_timeout`` makes a writer wait for the lock instead of
+failing at once with "database is locked". Other databases are left alone.
+"""
+from sqlalchemy import event
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_app(app, db) -> None:
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if pragmas and engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _set_pragmas(pragmas))
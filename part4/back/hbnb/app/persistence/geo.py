@@ -0,0 +1,60 @@
+"""Grid-bucket spatial index helpers.
+
+The globe is cut into CELL_DEG x CELL_DEG cells numbered row by row
+(row = latitude band, column = longitude band), so a circle maps to a
+handful of contiguous cell-id ranges that an ordinary B-tree index on the
+cell column can seek.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 0.1
+ROWS = int(180 / CELL_DEG)
+COLS = int(360 / CELL_DEG)
+
+
+def _row(lat: float) -> int:
+    return min(math.floor((lat + 90) / CELL_DEG), ROWS - 1)
+
+
+def _col(lng: float) -> int:
+    return math.floor((lng + 180) / CELL_DEG) % COLS
+
+
+def grid_cell(lat: Optional[float], lng: Optional[float]) -> Optional[int]:
+    """Cell id of a coordinate, None when either coordinate is missing."""
+    if lat is None or lng is None:
+        return None
+    return _row(lat) * COLS + _col(lng)
+
+
+def cell_ranges(lat: float, lng: float, radius_km: float) -> List[Tuple[int, int]]:
+    """Inclusive cell-id ranges covering a circle around (lat, lng)."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    widest = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+    if widest <= 0 or radius_km / (EARTH_RADIUS_KM * widest) >= math.pi:
+        # The circle wraps around the globe: whole latitude bands.
+        return [(_row(lat_lo) * COLS, _row(lat_hi) * COLS + COLS - 1)]
+
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * widest))
+    col_lo, col_hi = _col(lng - dlng), _col(lng + dlng)
+    if col_lo <= col_hi:
+        spans = [(col_lo, col_hi)]
+    else:  # crosses the antimeridian
+        spans = [(col_lo, COLS - 1), (0, col_hi)]
+    return [(row * COLS + lo, row * COLS + hi)
+            for row in range(_row(lat_lo), _row(lat_hi) + 1)
+            for lo, hi in spans]
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distances from (lat, lng) to every (lats[i], lngs[i])."""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lngs - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
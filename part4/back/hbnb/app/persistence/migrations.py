@@ -0,0 +1,44 @@
+"""Columns added to existing tables.
+
+``create_all`` only creates the tables that are missing, so a database
+created before a column was declared never gets it. ``added_columns``
+records such columns, with a function that fills them in from the data
+already there, and ``upgrade_columns`` adds the ones a database lacks.
+"""
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+_migrations: List[Tuple[Any, Tuple[str, ...], Optional[Callable[[Any], None]]]] = []
+
+
+def added_columns(model: Any, *names: str,
+                  backfill: Optional[Callable[[Any], None]] = None) -> None:
+    """Declare columns of ``model`` that older databases lack.
+
+    ``backfill(connection)`` runs once after any of them was added.
+    """
+    _migrations.append((model.__table__, names, backfill))
+
+
+def upgrade_columns(engine) -> None:
+    """Add the declared columns missing from the tables of ``engine``,
+    with their indexes, and backfill them."""
+    with engine.begin() as connection:
+        for table, names, backfill in _migrations:
+            inspector = inspect(connection)
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [table.c[name] for name in names if name not in existing]
+            if not missing:
+                continue
+            for column in missing:
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            for index in table.indexes:
+                if any(column.name in index.columns for column in missing):
+                    index.create(connection, checkfirst=True)
+            if backfill is not None:
+                backfill(connection)
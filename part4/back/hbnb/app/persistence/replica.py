@@ -0,0 +1,95 @@
+"""Read-replica routing.
+
+When SQLALCHEMY_BINDS has a ``replica`` entry, the read-only methods of
+SQLAlchemyRepository run on it and every other statement on the primary.
+The primary is used for reads as well:
+
+* inside a unit of work (write requests, transactional facade methods),
+  so validation reads never see a lagging replica;
+* once the session has written (a flush or a Core INSERT/UPDATE/DELETE),
+  for the rest of the request: a request always reads its own writes;
+* inside ``primary(session)`` blocks, e.g. the cache fills of
+  CachedRepository, which would otherwise keep stale rows for their TTL.
+
+Lazy loads outside the repository methods go to the primary too.
+
+``replicate``/``Replicator`` copy one SQLite file onto another: a stand-in
+for real replication in local setups and tests.
+"""
+import threading
+from contextlib import contextmanager
+
+from flask_sqlalchemy.session import Session
+
+from app.persistence.unit_of_work import active
+
+REPLICA_BIND = "replica"
+
+# session.info keys
+_READING = "replica_reading"
+_PRIMARY = "replica_primary"
+_WROTE = "replica_wrote"
+
+
+class RoutingSession(Session):
+    """db.session class sending repository reads to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info[_WROTE] = True
+            elif self._use_replica():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self) -> bool:
+        info = self.info
+        return (info.get(_READING, 0) > 0 and not info.get(_PRIMARY)
+                and not info.get(_WROTE) and not active(self))
+
+
+@contextmanager
+def _flag(session, key):
+    session.info[key] = session.info.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        session.info[key] -= 1
+
+
+def reading(session):
+    """Statements of the block may run on the replica."""
+    return _flag(session, _READING)
+
+
+def primary(session):
+    """Statements of the block run on the primary, even inside ``reading``."""
+    return _flag(session, _PRIMARY)
+
+
+def replicate(source, target) -> None:
+    """Copy the whole ``source`` SQLite database onto ``target`` (engines)."""
+    src, dst = source.raw_connection(), target.raw_connection()
+    try:
+        src.driver_connection.backup(dst.driver_connection)
+    finally:
+        src.close()
+        dst.close()
+
+
+class Replicator(threading.Thread):
+    """Background thread calling ``replicate`` every ``interval`` seconds."""
+
+    def __init__(self, source, target, interval: float = 1.0) -> None:
+        super().__init__(name="replicator", daemon=True)
+        self.source, self.target, self.interval = source, target, interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            replicate(self.source, self.target)
+
+    def stop(self) -> None:
+        self._stopped.set()
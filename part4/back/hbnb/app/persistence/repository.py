@@ -1,8 +1,111 @@
+import base64
+import functools
+import json
+import operator
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from sqlalchemy import and_, insert, inspect, literal_column, or_
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.persistence.replica import primary, reading
+from app.persistence.search import InvertedIndex, match_expression
+from app.persistence.unit_of_work import active, commit
 # from app import db  # TEMP FIX: circular import
 
 
+# Comparison operators usable in get_page criteria. "has" matches objects
+# whose relationship collection contains an item with the given id, "has_any"
+# those containing one of a list of ids; "in" tests membership in a list.
+_OPERATORS = {"eq": operator.eq, "le": operator.le, "ge": operator.ge}
+
+
+def _read_only(method):
+    """SQLAlchemyRepository read that may run on the replica bind (see replica)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with reading(self.db.session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _on_primary(method):
+    """SQLAlchemyRepository write whose reads must see the primary."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with primary(self.db.session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _matches(obj: Any, criteria: Iterable[Tuple[str, str, Any]]) -> bool:
+    for attr_name, op, value in criteria:
+        current = getattr(obj, attr_name, None)
+        if op == "has":
+            if not any(getattr(item, "id", item) == value for item in current or ()):
+                return False
+        elif op == "has_any":
+            if not any(getattr(item, "id", item) in value for item in current or ()):
+                return False
+        elif op == "in":
+            if current not in value:
+                return False
+        elif current is None or not _OPERATORS[op](current, value):
+            return False
+    return True
+
+
+def _page_key(obj: Any, order_by: Optional[str] = None) -> Tuple[Any, ...]:
+    """Position of an object in a paginated listing.
+
+    Listings are ordered by (created_at, id), optionally preceded by a
+    numeric ``order_by`` attribute sorted in descending order.
+    """
+    key = (obj.created_at or datetime.min, obj.id)
+    if order_by:
+        key = (getattr(obj, order_by),) + key
+    return key
+
+
+def _sort_key(key: Tuple[Any, ...], order_by: Optional[str]) -> Tuple[Any, ...]:
+    # Ascending Python sort key equivalent to the listing order
+    return (-key[0],) + key[1:] if order_by else key
+
+
+def _encode_cursor(obj: Any, order_by: Optional[str] = None) -> str:
+    *sort_value, created_at, obj_id = _page_key(obj, order_by)
+    raw = json.dumps(sort_value + [created_at.isoformat(), obj_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, order_by: Optional[str] = None) -> Tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != (3 if order_by else 2):
+            raise ValueError
+        *sort_value, created_at, obj_id = values
+        return tuple(sort_value) + (datetime.fromisoformat(created_at), str(obj_id))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+def _encode_rank_cursor(rank: float, key: Any) -> str:
+    raw = json.dumps([rank, key]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_rank_cursor(cursor: str) -> Tuple[float, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rank, key = json.loads(raw)
+        return float(rank), key
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
 class Repository(ABC):
     """
     Abstract base class for a repository.
@@ -15,6 +118,15 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def add_many(self, objs, chunk_size=1000):
+        """
+        Add many new objects in a single transaction, ``chunk_size`` at a
+        time. ``objs`` may be a lazy iterable. Returns how many were added;
+        nothing is added if any chunk fails.
+        """
+        pass
+
     @abstractmethod
     def get(self, obj_id):
         """
@@ -22,6 +134,21 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        """
+        Get the objects with the given IDs, as a dict keyed by ID. IDs
+        without a matching object are left out.
+        """
+        pass
+
+    @abstractmethod
+    def get_with_relations(self, obj_id, *relationships):
+        """
+        Get an object by its ID with the given relationships preloaded.
+        """
+        pass
+
     @abstractmethod
     def get_all(self):
         """
@@ -29,6 +156,50 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_page(self, limit, cursor=None, relationships=(), criteria=(), order_by=None):
+        """
+        Get up to ``limit`` objects ordered by (created_at, id), starting
+        after ``cursor``. ``criteria`` is a sequence of
+        (attr_name, op, value) filters combined with AND, op being one of
+        "eq", "le", "ge", "in", "has" or "has_any". ``order_by`` names a numeric attribute
+        to sort on first, in descending order. Returns the objects and the
+        cursor of the next page (None on the last page).
+        """
+        pass
+
+    @abstractmethod
+    def iterate(self, relationships=(), criteria=(), order_by=None, batch_size=1000):
+        """
+        Iterate over every object matching ``criteria``, in the order of
+        get_page, loading ``batch_size`` objects at a time.
+        """
+        pass
+
+    @abstractmethod
+    def iterate_values(self, attr_names, batch_size=1000):
+        """
+        Stream a tuple of the given attributes for every object, without
+        loading whole objects.
+        """
+        pass
+
+    @abstractmethod
+    def iterate_related_ids(self, relationship, batch_size=1000):
+        """
+        Stream (object id, related id) for every link of a many-to-many
+        relationship, without loading either side.
+        """
+        pass
+
+    @abstractmethod
+    def search(self, text, limit, cursor=None, relationships=()):
+        """
+        Full-text search: objects matching every word of ``text`` (each as a
+        prefix), best BM25 match first. Returns (objects, next cursor).
+        """
+        pass
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         """
@@ -36,6 +207,42 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """
+        Get every object matching a specific attribute.
+        """
+        pass
+
+    @abstractmethod
+    def get_all_by_attribute_ranges(self, attr_name, ranges, relationships=()):
+        """
+        Get every object whose attribute lies in one of the inclusive
+        (low, high) ranges.
+        """
+        pass
+
+    @abstractmethod
+    def exists_by_attribute(self, attr_name, attr_value):
+        """
+        Check whether an object with the given attribute value exists.
+        """
+        pass
+
+    @abstractmethod
+    def exists(self, criteria):
+        """
+        Check whether an object matches every (attr_name, op, value) criterion.
+        """
+        pass
+
+    @abstractmethod
+    def existing_values(self, attr_name, values):
+        """
+        Get the subset of ``values`` already held by some object.
+        """
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         """
@@ -43,6 +250,14 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def increment(self, obj_id, deltas):
+        """
+        Add the given deltas to numeric attributes of an object. The change
+        joins the current transaction and is committed with the next write.
+        """
+        pass
+
     @abstractmethod
     def delete(self, obj_id):
         """
@@ -52,49 +267,244 @@ class Repository(ABC):
 
 
 class InMemoryRepository(Repository):
+    """Repository implementation backed by a dict.
+
+    ``indexed_attributes`` declares secondary hash indexes
+    (value -> ids of every object holding it). They are kept in sync on
+    ``add``, ``update`` and ``delete`` so lookups on those attributes are
+    O(1) instead of a scan; attributes may be shared by many objects
+    (e.g. ``place_id`` on reviews).
+
+    ``text_attributes`` maps the attributes served by ``search`` to their
+    BM25 weight; they feed an inverted index maintained the same way.
 
-    def __init__(self) -> None:
+    Listings keep the sort keys of every object in a sorted list per
+    ordering, built by the first ``get_page``/``iterate`` using it and
+    maintained the same way, so a page is a bisection and a short walk.
+    """
+
+    def __init__(self, indexed_attributes: Iterable[str] = (),
+                 text_attributes: Optional[Mapping[str, float]] = None) -> None:
         self._data: Dict[str, Any] = {}
+        # dict used as an insertion-ordered set of ids
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {
+            attr: {} for attr in indexed_attributes
+        }
+        self._text_index = InvertedIndex(text_attributes) if text_attributes else None
+        # order_by -> (sorted sort keys, id -> sort key the object is listed under)
+        self._orders: Dict[Optional[str], Tuple[List[Tuple[Any, ...]],
+                                                Dict[str, Tuple[Any, ...]]]] = {}
+
+    def _index(self, obj: Any) -> None:
+        if self._text_index is not None:
+            self._text_index.add(obj)
+        self._order(obj)
+        for attr, index in self._indexes.items():
+            value = getattr(obj, attr, None)
+            if value is not None:
+                index.setdefault(value, {})[obj.id] = None
+
+    def _unindex(self, obj: Any) -> None:
+        if self._text_index is not None:
+            self._text_index.remove(obj)
+        self._unorder(obj)
+        for attr, index in self._indexes.items():
+            value = getattr(obj, attr, None)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(obj.id, None)
+                if not bucket:
+                    del index[value]
+
+    def _order(self, obj: Any) -> None:
+        for order_by, (keys, listed) in self._orders.items():
+            key = listed[obj.id] = _sort_key(_page_key(obj, order_by), order_by)
+            insort(keys, key)
+
+    def _unorder(self, obj: Any) -> None:
+        for keys, listed in self._orders.values():
+            key = listed.pop(obj.id, None)
+            if key is not None:
+                del keys[bisect_left(keys, key)]
+
+    def _ordered(self, order_by: Optional[str]) -> List[Tuple[Any, ...]]:
+        """Sort keys of every object in listing order; each ends with the id."""
+        order = self._orders.get(order_by)
+        if order is None:
+            listed = {obj_id: _sort_key(_page_key(obj, order_by), order_by)
+                      for obj_id, obj in self._data.items()}
+            order = self._orders[order_by] = (sorted(listed.values()), listed)
+        return order[0]
+
+    def _listing(self, start: int, criteria: Iterable[Tuple[str, str, Any]],
+                 order_by: Optional[str]) -> Iterator[Any]:
+        criteria = list(criteria)
+        keys = self._ordered(order_by)
+        for i in range(start, len(keys)):
+            obj = self._data[keys[i][-1]]
+            if _matches(obj, criteria):
+                yield obj
 
     def add(self, obj: Any) -> None:
+        if obj.id in self._data:
+            self._unindex(self._data[obj.id])
         self._data[obj.id] = obj
+        self._index(obj)
+
+    def add_many(self, objs: Iterable[Any], chunk_size: int = 1000) -> int:
+        objs = list(objs)  # validate every object before adding any
+        for obj in objs:
+            self.add(obj)
+        return len(objs)
 
     def get(self, obj_id: str) -> Optional[Any]:
         return self._data.get(obj_id)
 
+    def get_many(self, obj_ids: Iterable[str]) -> Dict[str, Any]:
+        return {i: self._data[i] for i in obj_ids if i in self._data}
+
+    def get_with_relations(self, obj_id: str, *relationships: str) -> Optional[Any]:
+        # Related objects are plain attributes here, nothing to preload.
+        return self.get(obj_id)
+
     def get_all(self) -> List[Any]:
         return list(self._data.values())
 
     def list(self) -> List[Any]:
         return self.get_all()
 
+    def iterate(self, relationships: Iterable[str] = (),
+                criteria: Iterable[Tuple[str, str, Any]] = (),
+                order_by: Optional[str] = None, batch_size: int = 1000) -> Iterator[Any]:
+        return iter(list(self._listing(0, criteria, order_by)))
+
+    def iterate_values(self, attr_names: Iterable[str],
+                       batch_size: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        attr_names = tuple(attr_names)
+        return (tuple(getattr(obj, a, None) for a in attr_names)
+                for obj in list(self._data.values()))
+
+    def iterate_related_ids(self, relationship: str,
+                            batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        return ((obj.id, item.id) for obj in list(self._data.values())
+                for item in list(getattr(obj, relationship, None) or ()))
+
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 relationships: Iterable[str] = (),
+                 criteria: Iterable[Tuple[str, str, Any]] = (),
+                 order_by: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        start = 0
+        if cursor:
+            after = _sort_key(_decode_cursor(cursor, order_by), order_by)
+            start = bisect_right(self._ordered(order_by), after)
+        # One more than the page tells whether another page follows
+        items = list(islice(self._listing(start, criteria, order_by), limit + 1))
+        page = items[:limit]
+        has_more = len(items) > limit
+        return page, _encode_cursor(page[-1], order_by) if has_more else None
+
+    def search(self, text: str, limit: int, cursor: Optional[str] = None,
+               relationships: Iterable[str] = ()) -> Tuple[List[Any], Optional[str]]:
+        if self._text_index is None:
+            raise ValueError("full-text search is not enabled on this repository")
+        ranked = self._text_index.search(text)
+        start = 0
+        if cursor:
+            start = bisect_right(ranked, _decode_rank_cursor(cursor))
+        page = ranked[start:start + limit]
+        has_more = start + limit < len(ranked)
+        next_cursor = _encode_rank_cursor(*page[-1]) if has_more else None
+        return [self._data[obj_id] for _, obj_id in page], next_cursor
+
     def update(self, obj_id: str, data: Dict[str, Any]) -> Optional[Any]:
         obj = self.get(obj_id)
         if not obj:
             return None
 
-        if hasattr(obj, "update") and callable(getattr(obj, "update")):
-            obj.update(data)
-        else:
-            for key, value in data.items():
-                if hasattr(obj, key):
-                    setattr(obj, key, value)
+        self._unindex(obj)
+        try:
+            if hasattr(obj, "update") and callable(getattr(obj, "update")):
+                obj.update(data)
+            else:
+                for key, value in data.items():
+                    if hasattr(obj, key):
+                        setattr(obj, key, value)
 
-            if hasattr(obj, "save") and callable(getattr(obj, "save")):
-                obj.save()
+                if hasattr(obj, "save") and callable(getattr(obj, "save")):
+                    obj.save()
+        finally:
+            self._index(obj)
 
         return obj
 
+    def increment(self, obj_id: str, deltas: Dict[str, Any]) -> None:
+        obj = self.get(obj_id)
+        if obj:
+            self._unorder(obj)
+            for attr, delta in deltas.items():
+                setattr(obj, attr, (getattr(obj, attr, None) or 0) + delta)
+            self._order(obj)
+
     def delete(self, obj_id: str) -> None:
         if obj_id in self._data:
+            self._unindex(self._data[obj_id])
             del self._data[obj_id]
 
     def get_by_attribute(self, attr_name: str, attr_value: Any) -> Optional[Any]:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            bucket = index.get(attr_value)
+            return self._data[next(iter(bucket))] if bucket else None
         for obj in self._data.values():
             if getattr(obj, attr_name, None) == attr_value:
                 return obj
         return None
 
+    def get_all_by_attribute(self, attr_name: str, attr_value: Any) -> List[Any]:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return [self._data[i] for i in index.get(attr_value, ())]
+        return [obj for obj in self._data.values()
+                if getattr(obj, attr_name, None) == attr_value]
+
+    def get_all_by_attribute_ranges(self, attr_name: str, ranges: Iterable[Tuple[Any, Any]],
+                                    relationships: Iterable[str] = ()) -> List[Any]:
+        index = self._indexes.get(attr_name)
+        ranges = list(ranges)
+        if index is None:
+            values = ((getattr(obj, attr_name, None), obj) for obj in self._data.values())
+            return [obj for v, obj in values
+                    if v is not None and any(lo <= v <= hi for lo, hi in ranges)]
+        if all(isinstance(b, int) for r in ranges for b in r):
+            # Integer keys (e.g. grid cells): probe the buckets directly.
+            values = (v for lo, hi in ranges for v in range(lo, hi + 1))
+        else:
+            values = (v for v in index if any(lo <= v <= hi for lo, hi in ranges))
+        return [self._data[i] for v in values for i in index.get(v, ())]
+
+    def exists_by_attribute(self, attr_name: str, attr_value: Any) -> bool:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return attr_value in index
+        return self.get_by_attribute(attr_name, attr_value) is not None
+
+    def exists(self, criteria: Iterable[Tuple[str, str, Any]]) -> bool:
+        criteria = list(criteria)
+        candidates = self._data.values()
+        for attr_name, op, value in criteria:
+            index = self._indexes.get(attr_name)
+            if op == "eq" and index is not None:
+                candidates = [self._data[i] for i in index.get(value, ())]
+                break
+        return any(_matches(obj, criteria) for obj in candidates)
+
+    def existing_values(self, attr_name: str, values: Iterable[Any]) -> Set[Any]:
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return {v for v in values if v in index}
+        held = {getattr(obj, attr_name, None) for obj in self._data.values()}
+        return {v for v in values if v in held}
+
 
 class SQLAlchemyRepository(Repository):
     """Repository implementation using SQLAlchemy ORM.
@@ -111,14 +521,227 @@ class SQLAlchemyRepository(Repository):
 
     def add(self, obj: Any) -> None:
         self.db.session.add(obj)
-        self.db.session.commit()
+        commit(self.db.session)
 
+    def add_many(self, objs: Iterable[Any], chunk_size: int = 1000) -> int:
+        """Bulk INSERT: one multi-row statement per chunk, one commit.
+
+        The objects never join the session: their column values go straight
+        to the INSERT, Python-side column defaults (id, timestamps...) being
+        filled in first so callers can read them back. Many-to-many
+        collections set on the objects become rows of the association table.
+        """
+        mapper = inspect(self.model)
+        columns = [(prop.key, prop.columns[0].default) for prop in mapper.column_attrs]
+        collections = [rel for rel in mapper.relationships if rel.secondary is not None]
+        session = self.db.session
+        count = 0
+        try:
+            objs = iter(objs)
+            while True:
+                # Building the objects may assign collections, which appends
+                # them to the backrefs of persistent objects: no flush until
+                # those pending changes are dropped
+                with session.no_autoflush:
+                    chunk = list(islice(objs, chunk_size))
+                    for rel in collections:
+                        self._drop_backrefs(rel, chunk)
+                if not chunk:
+                    break
+                session.execute(insert(self.model),
+                                [self._insert_values(obj, columns) for obj in chunk])
+                for rel in collections:
+                    self._insert_links(rel, chunk)
+                count += len(chunk)
+            commit(session)
+        except Exception:
+            if not active(session):  # else the unit of work rolls back
+                session.rollback()
+            raise
+        return count
+
+    @staticmethod
+    def _insert_values(obj: Any, columns: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        state = obj.__dict__
+        values = {}
+        for key, default in columns:
+            value = state.get(key)
+            if value is None and default is not None:
+                value = default.arg(None) if default.is_callable else default.arg
+                set_committed_value(obj, key, value)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def _drop_backrefs(self, rel: Any, chunk: List[Any]) -> None:
+        """Expire the backref of ``rel`` on the persistent related objects:
+        the chunk never joins the session, the link rows replace them."""
+        if not rel.back_populates:
+            return
+        related = {id(child): child for obj in chunk
+                   for child in obj.__dict__.get(rel.key) or ()}
+        for child in related.values():
+            if inspect(child).persistent:
+                self.db.session.expire(child, [rel.back_populates])
+
+    def _insert_links(self, rel: Any, chunk: List[Any]) -> None:
+        (parent_col, parent_fk), = rel.synchronize_pairs
+        (child_col, child_fk), = rel.secondary_synchronize_pairs
+        rows = [{parent_fk.key: getattr(obj, parent_col.key),
+                 child_fk.key: getattr(child, child_col.key)}
+                for obj in chunk for child in obj.__dict__.get(rel.key) or ()]
+        if rows:
+            self.db.session.execute(rel.secondary.insert(), rows)
+
+    @_read_only
     def get(self, obj_id: str) -> Optional[Any]:
         return self.model.query.get(obj_id)
 
+    @_read_only
+    def get_many(self, obj_ids: Iterable[str]) -> Dict[str, Any]:
+        """One SELECT ... WHERE id IN (...) for the whole batch."""
+        obj_ids = set(obj_ids)
+        if not obj_ids:
+            return {}
+        rows = self.model.query.filter(self.model.id.in_(obj_ids)).all()
+        return {obj.id: obj for obj in rows}
+
+    def _load_options(self, relationships: Iterable[str]) -> List[Any]:
+        """Eager-load options for the given relationship names.
+
+        Many-to-one relationships are JOINed into the main SELECT; collections
+        use one SELECT ... IN per relationship, which avoids the row
+        explosion of joining several collections together.
+        """
+        options = []
+        for name in relationships:
+            attr = getattr(self.model, name)
+            loader = selectinload if attr.property.uselist else joinedload
+            options.append(loader(attr))
+        return options
+
+    @_read_only
+    def get_with_relations(self, obj_id: str, *relationships: str) -> Optional[Any]:
+        """Load an object and its relationships in a fixed number of queries."""
+        query = self.model.query.options(*self._load_options(relationships))
+        return query.filter_by(id=obj_id).first()
+
+    @_read_only
     def get_all(self) -> List[Any]:
         return self.model.query.all()
 
+    def _criterion(self, attr_name: str, op: str, value: Any) -> Any:
+        attr = getattr(self.model, attr_name)
+        if op == "has":
+            # EXISTS on the association table, served by its primary key
+            return attr.any(id=value)
+        if op == "has_any":
+            related = attr.property.mapper.class_
+            return attr.any(related.id.in_(list(value)))
+        if op == "in":
+            return attr.in_(list(value))
+        return _OPERATORS[op](attr, value)
+
+    def _query(self, relationships: Iterable[str],
+               criteria: Iterable[Tuple[str, str, Any]]) -> Any:
+        query = self.model.query.options(*self._load_options(relationships))
+        return query.filter(*(self._criterion(*c) for c in criteria))
+
+    def _ordering(self, order_by: Optional[str]) -> List[Any]:
+        ordering = [self.model.created_at, self.model.id]
+        if order_by:
+            ordering.insert(0, getattr(self.model, order_by).desc())
+        return ordering
+
+    @_read_only
+    def iterate(self, relationships: Iterable[str] = (),
+                criteria: Iterable[Tuple[str, str, Any]] = (),
+                order_by: Optional[str] = None, batch_size: int = 1000) -> Iterator[Any]:
+        """Stream the rows with yield_per: only one batch of objects (and of
+        their eagerly loaded collections) is held in memory at a time."""
+        query = self._query(relationships, criteria).order_by(*self._ordering(order_by))
+        return iter(query.yield_per(batch_size))
+
+    @_read_only
+    def iterate_values(self, attr_names: Iterable[str],
+                       batch_size: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        """Plain column tuples, fetched batch by batch."""
+        columns = [getattr(self.model, a) for a in attr_names]
+        return iter(self.db.session.query(*columns).yield_per(batch_size))
+
+    @_read_only
+    def iterate_related_ids(self, relationship: str,
+                            batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """Rows of the association table itself: no join, no ORM objects."""
+        rel = getattr(self.model, relationship).property
+        (_, parent_fk), = rel.synchronize_pairs
+        (_, child_fk), = rel.secondary_synchronize_pairs
+        query = self.db.session.query(parent_fk, child_fk)
+        return iter(query.yield_per(batch_size))
+
+    @_read_only
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 relationships: Iterable[str] = (),
+                 criteria: Iterable[Tuple[str, str, Any]] = (),
+                 order_by: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """Keyset pagination on ([order_by DESC,] created_at, id).
+
+        The WHERE clause seeks past the last row of the previous page, so
+        the cost of a page does not grow with its position in the table.
+        """
+        model = self.model
+        query = self._query(relationships, criteria)
+        if cursor:
+            *sort_value, created_at, last_id = _decode_cursor(cursor, order_by)
+            after = or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > last_id),
+            )
+            if order_by:
+                attr = getattr(model, order_by)
+                after = or_(attr < sort_value[0], and_(attr == sort_value[0], after))
+            query = query.filter(after)
+        rows = query.order_by(*self._ordering(order_by)).limit(limit + 1).all()
+        next_cursor = _encode_cursor(rows[limit - 1], order_by) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    @_read_only
+    def search(self, text: str, limit: int, cursor: Optional[str] = None,
+               relationships: Iterable[str] = ()) -> Tuple[List[Any], Optional[str]]:
+        """Rank the model's FTS5 index (see app.persistence.search) with BM25.
+
+        The MATCH runs inside the FTS index and rows are joined back on
+        rowid. Pages are keyed on (rank, rowid) like get_page's keyset.
+        """
+        index = getattr(self.model, "__fts__", None)
+        if index is None:
+            raise ValueError("full-text search is not enabled on this repository")
+        fts = index.table
+        rowid = literal_column(f"{self.model.__tablename__}.rowid")
+        query = (self._query(relationships, ())
+                 .join(fts, fts.c.rowid == rowid)
+                 .filter(literal_column(fts.name).op("MATCH")(match_expression(text)))
+                 .add_columns(fts.c.rank, fts.c.rowid))
+        if cursor:
+            rank, last = _decode_rank_cursor(cursor)
+            query = query.filter(or_(fts.c.rank > rank,
+                                     and_(fts.c.rank == rank, fts.c.rowid > last)))
+        rows = query.order_by(fts.c.rank, fts.c.rowid).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            _, rank, last = rows[limit - 1]
+            next_cursor = _encode_rank_cursor(rank, last)
+        return [obj for obj, _, _ in rows[:limit]], next_cursor
+
+    @_read_only
+    def existing_values(self, attr_name: str, values: Iterable[Any]) -> Set[Any]:
+        values = set(values)
+        if not values:
+            return set()
+        attr = getattr(self.model, attr_name)
+        return {v for v, in self.db.session.query(attr).filter(attr.in_(values))}
+
+    @_on_primary
     def update(self, obj_id: str, data: Dict[str, Any]) -> Optional[Any]:
         obj = self.get(obj_id)
         if not obj:
@@ -126,14 +749,49 @@ class SQLAlchemyRepository(Repository):
         for key, value in data.items():
             if hasattr(obj, key):
                 setattr(obj, key, value)
-        self.db.session.commit()
+        commit(self.db.session)
         return obj
 
+    def increment(self, obj_id: str, deltas: Dict[str, Any]) -> None:
+        # UPDATE ... SET col = col + :delta, so concurrent writers cannot
+        # lose each other's increments.
+        values = {getattr(self.model, attr): getattr(self.model, attr) + delta
+                  for attr, delta in deltas.items() if delta}
+        if values:
+            self.model.query.filter_by(id=obj_id).update(
+                values, synchronize_session="evaluate")
+
+    @_on_primary
     def delete(self, obj_id: str) -> None:
         obj = self.get(obj_id)
         if obj:
             self.db.session.delete(obj)
-            self.db.session.commit()
+            commit(self.db.session)
 
+    @_read_only
     def get_by_attribute(self, attr_name: str, attr_value: Any) -> Optional[Any]:
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
\ No newline at end of file
+        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    @_read_only
+    def get_all_by_attribute(self, attr_name: str, attr_value: Any) -> List[Any]:
+        return self.model.query.filter_by(**{attr_name: attr_value}).all()
+
+    @_read_only
+    def get_all_by_attribute_ranges(self, attr_name: str, ranges: Iterable[Tuple[Any, Any]],
+                                    relationships: Iterable[str] = ()) -> List[Any]:
+        # One index range seek per (low, high) pair
+        attr = getattr(self.model, attr_name)
+        query = self.model.query.options(*self._load_options(relationships))
+        return query.filter(or_(*(attr.between(lo, hi) for lo, hi in ranges))).all()
+
+    @_read_only
+    def exists_by_attribute(self, attr_name: str, attr_value: Any) -> bool:
+        # EXISTS (SELECT ... LIMIT 1) is answered from the column index
+        # without hydrating any row into the session.
+        query = self.model.query.filter_by(**{attr_name: attr_value})
+        return self.db.session.query(query.exists()).scalar()
+
+    @_read_only
+    def exists(self, criteria: Iterable[Tuple[str, str, Any]]) -> bool:
+        query = self.model.query.filter(*(self._criterion(*c) for c in criteria))
+        return self.db.session.query(query.exists()).scalar()
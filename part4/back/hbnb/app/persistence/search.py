@@ -0,0 +1,229 @@
+"""Full-text search over model columns.
+
+On SQLite, ``full_text_index`` attaches an FTS5 virtual table to a model's
+table. It is an external-content index, so the text is not stored twice, and
+triggers keep it in step with every INSERT, UPDATE and DELETE. That includes
+the bulk INSERTs of ``add_many``, which bypass the ORM. Results are ranked
+with BM25, and each column carries its own weight.
+The virtual table is keyed by the implicit rowid of the model's table.
+A VACUUM may renumber those rowids, so run ``rebuild`` after one.
+
+``InvertedIndex`` is the equivalent for InMemoryRepository. It uses the
+same tokenizer, prefix matching and BM25 formula.
+
+Every word of a query must match, and each one matches as a prefix
+("lux apart" finds "Luxury apartment").
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Mapping, Set, Tuple
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, Text, event, inspect, text
+
+_WORD = re.compile(r"[^\W_]+")
+
+# BM25 parameters, the ones FTS5 uses
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(value: Any) -> List[str]:
+    """Lower-cased words without diacritics, like FTS5's unicode61 tokenizer."""
+    if not value:
+        return []
+    value = str(value)
+    if value.isascii():
+        return _WORD.findall(value.lower())
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _WORD.findall(stripped)
+
+
+def match_expression(value: str) -> str:
+    """FTS5 MATCH query requiring every word of ``value``, each as a prefix.
+
+    Quoting the words keeps user input from being read as FTS5 syntax
+    (AND, NEAR, column filters...).
+    """
+    return " ".join(f'"{word}"*' for word in tokenize(value))
+
+
+class FullTextIndex:
+    """FTS5 index on some text columns of a table, with BM25 column weights."""
+
+    def __init__(self, table: Table, weights: Mapping[str, float]) -> None:
+        self.source = table.name
+        self.name = f"{table.name}_fts"
+        self.weights = dict(weights)
+        columns = list(self.weights)
+        # Queried through this Table; its own MetaData keeps create_all off it
+        self.table = Table(self.name, MetaData(),
+                           Column("rowid", Integer, primary_key=True),
+                           Column("rank", Float),
+                           *(Column(c, Text) for c in columns))
+        cols = ", ".join(columns)
+        new = ", ".join(f"new.{c}" for c in columns)
+        old = ", ".join(f"old.{c}" for c in columns)
+        delete = (f"INSERT INTO {self.name}({self.name}, rowid, {cols}) "
+                  f"VALUES ('delete', old.rowid, {old});")
+        insert = f"INSERT INTO {self.name}(rowid, {cols}) VALUES (new.rowid, {new});"
+        self.ddl = [
+            f"CREATE VIRTUAL TABLE {self.name} USING fts5({cols}, "
+            f"content='{self.source}', content_rowid='rowid', prefix='2 3', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.source} "
+            f"BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.source} "
+            f"BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF {cols} "
+            f"ON {self.source} BEGIN {delete} {insert} END",
+            # Default ranking function of the table, so ORDER BY rank uses it
+            f"INSERT INTO {self.name}({self.name}, rank) "
+            f"VALUES ('rank', 'bm25({', '.join(str(w) for w in self.weights.values())})')",
+        ]
+
+    def create(self, connection) -> None:
+        """Create the index and its triggers, then index the existing rows.
+
+        Does nothing when the index already exists.
+        """
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": self.name}).first()
+        if exists:
+            return
+        for statement in self.ddl:
+            connection.execute(text(statement))
+        self.rebuild(connection)
+
+    def rebuild(self, connection) -> None:
+        """Re-index every row of the source table."""
+        connection.execute(text(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"))
+
+    def drop(self, connection) -> None:
+        connection.execute(text(f"DROP TABLE IF EXISTS {self.name}"))
+
+
+_indexes: List[FullTextIndex] = []
+
+
+def full_text_index(model: Any, **weights: float) -> FullTextIndex:
+    """Declare an FTS5 index on ``model``, one BM25 weight per text column.
+
+    The index is created and dropped along with the model's table on
+    SQLite and is available as ``model.__fts__``.
+    """
+    index = FullTextIndex(model.__table__, weights)
+
+    @event.listens_for(model.__table__, "after_create")
+    def _create(target, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            index.create(connection)
+
+    @event.listens_for(model.__table__, "before_drop")
+    def _drop(target, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            index.drop(connection)
+
+    model.__fts__ = index
+    _indexes.append(index)
+    return index
+
+
+def create_indexes(engine) -> None:
+    """Create the full-text indexes missing from an existing SQLite database
+    (one whose tables predate them, so create_all skips their events)."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for index in _indexes:
+            if inspect(connection).has_table(index.source):
+                index.create(connection)
+
+
+class InvertedIndex:
+    """In-memory word -> postings index scored like FTS5's bm25().
+
+    Postings hold the weighted term frequency of each object, that is, the
+    sum over the indexed attributes of weight x occurrences. Together with
+    document lengths, this is what BM25 needs. The vocabulary is kept sorted,
+    so a prefix expands to a contiguous run of words found by bisection.
+    """
+
+    def __init__(self, weights: Mapping[str, float]) -> None:
+        self.weights = dict(weights)
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []
+        # id -> (number of words, distinct words) of every indexed object
+        self._documents: Dict[str, Tuple[int, Set[str]]] = {}
+        self._total_length = 0
+
+    def add(self, obj: Any) -> None:
+        self.remove(obj)
+        length = 0
+        distinct = set()
+        for attr, weight in self.weights.items():
+            words = tokenize(getattr(obj, attr, None))
+            length += len(words)
+            distinct.update(words)
+            for word in words:
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = {}
+                    insort(self._vocabulary, word)
+                postings[obj.id] = postings.get(obj.id, 0.0) + weight
+        self._documents[obj.id] = (length, distinct)
+        self._total_length += length
+
+    def remove(self, obj: Any) -> None:
+        document = self._documents.pop(obj.id, None)
+        if document is None:
+            return
+        length, words = document
+        self._total_length -= length
+        for word in words:
+            postings = self._postings[word]
+            del postings[obj.id]
+            if not postings:
+                del self._postings[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def _expand(self, prefix: str) -> Dict[str, float]:
+        """Weighted frequency of ``prefix`` (summed over the words it starts)
+        in every object containing one of them. Read-only."""
+        start = end = bisect_left(self._vocabulary, prefix)
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(prefix):
+            end += 1
+        if end - start == 1:
+            # A single word: its postings as they are, without a copy
+            return self._postings[self._vocabulary[start]]
+        frequencies: Dict[str, float] = {}
+        for word in self._vocabulary[start:end]:
+            for obj_id, tf in self._postings[word].items():
+                frequencies[obj_id] = frequencies.get(obj_id, 0.0) + tf
+        return frequencies
+
+    def search(self, value: str) -> List[Tuple[float, str]]:
+        """(rank, id) of every object matching all words of ``value``, best
+        first. Ranks are negated BM25 scores, as FTS5 reports them."""
+        words = tokenize(value)
+        if not words or not self._documents:
+            return []
+        terms = [self._expand(word) for word in words]
+        rarest = min(terms, key=len)
+        matches = [i for i in rarest if all(i in t for t in terms)]
+        total = len(self._documents)
+        average = (self._total_length / total) or 1.0
+        idfs = [max(math.log((total - len(t) + 0.5) / (len(t) + 0.5)), 1e-6) for t in terms]
+        ranked = []
+        for obj_id in matches:
+            norm = K1 * (1 - B + B * self._documents[obj_id][0] / average)
+            score = 0.0
+            for idf, frequencies in zip(idfs, terms):
+                tf = frequencies[obj_id]
+                score += idf * tf * (K1 + 1) / (tf + norm)
+            ranked.append((-score, obj_id))
+        ranked.sort()
+        return ranked
@@ -0,0 +1,99 @@
+"""Unit of work: one commit for a group of writes.
+
+Repositories and models end their writes with ``commit(session)``. Outside
+a unit of work that commits as before; inside one it only flushes (so IDs
+and constraint errors still show up immediately) and the outermost block
+commits everything at once, or rolls it all back.
+
+``init_app`` opens a unit of work around every write request, so an API
+call costs one commit however many repository calls it makes.
+"""
+from contextlib import contextmanager
+
+from flask import g, request
+
+_DEPTH = "unit_of_work_depth"
+_FAILED = "unit_of_work_failed"
+_AFTER_COMMIT = "unit_of_work_after_commit"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def active(session) -> bool:
+    return session.info.get(_DEPTH, 0) > 0
+
+
+def commit(session) -> None:
+    """Commit, or only flush inside a unit of work."""
+    if active(session):
+        session.flush()
+    else:
+        session.commit()
+
+
+def begin(session) -> None:
+    session.info[_DEPTH] = session.info.get(_DEPTH, 0) + 1
+
+
+def end(session, success: bool) -> None:
+    """Close a block opened by ``begin``. The outermost one commits, or
+    rolls back if any block failed."""
+    depth = session.info.get(_DEPTH, 0) - 1
+    if not success:
+        session.info[_FAILED] = True
+    if depth > 0:
+        session.info[_DEPTH] = depth
+        return
+    session.info.pop(_DEPTH, None)
+    callbacks = session.info.pop(_AFTER_COMMIT, [])
+    if session.info.pop(_FAILED, False):
+        session.rollback()
+    else:
+        session.commit()
+        for callback in callbacks:
+            callback()
+
+
+def after_commit(session, callback) -> None:
+    """Run ``callback`` once the current unit of work has committed, or at
+    once outside of one (the writes are committed already). Callbacks of a
+    unit of work that is rolled back are dropped."""
+    if active(session):
+        session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def unit_of_work(session):
+    """Group the writes of the block into one transaction. Nested blocks
+    join the outer one: if any of them fails, everything is rolled back."""
+    begin(session)
+    try:
+        yield
+    except BaseException:
+        end(session, success=False)
+        raise
+    end(session, success=True)
+
+
+def init_app(app, db) -> None:
+    """Wrap each write request in a unit of work, committed only when the
+    response is successful."""
+
+    @app.before_request
+    def _begin_unit_of_work():
+        if request.method in WRITE_METHODS:
+            begin(db.session)
+            g.unit_of_work = True
+
+    @app.after_request
+    def _end_unit_of_work(response):
+        if g.pop("unit_of_work", False):
+            end(db.session, success=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _abort_unit_of_work(exc):
+        # after_request is skipped when the view raised
+        if g.pop("unit_of_work", False):
+            end(db.session, success=False)
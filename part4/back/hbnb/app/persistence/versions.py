@@ -0,0 +1,151 @@
+"""Change counters of the tables behind the in-process indexes.
+
+On SQLite, ``track_versions`` gives a table a counter in ``table_versions``
+that triggers bump on every INSERT, UPDATE and DELETE, whoever makes it:
+this process, another one or raw SQL. A copy of the table that knows the
+counter it was read at can tell with one primary key lookup whether it
+still matches the database (see app.services.live_index). Counters start
+at their creation time in nanoseconds, so a database created again under
+the same name does not repeat the values of the previous one.
+
+``init_app`` makes every write transaction start with BEGIN IMMEDIATE and
+a read of the counters: holding the write lock, they are those of the last
+commit. Read again just before a session commits, they give the versions
+the commit moved each table between, which ``committed_versions`` returns
+once it is done.
+
+Other databases have no counters: ``read_versions`` returns None.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app.persistence.replica import primary
+
+TABLE = "table_versions"
+
+_tables: List[Any] = []
+
+# session.info keys
+_START = "versions_start"
+_COMMITTED = "versions_committed"
+
+
+def _create(connection, name: str) -> None:
+    bump = f"UPDATE {TABLE} SET version = version + 1 WHERE name = '{name}';"
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} "
+        f"(name TEXT PRIMARY KEY, version INTEGER NOT NULL)"))
+    connection.execute(text(
+        f"INSERT OR IGNORE INTO {TABLE} (name, version) VALUES ('{name}', {time.time_ns()})"))
+    for suffix, operation in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {name}_version_{suffix} "
+            f"AFTER {operation} ON {name} BEGIN {bump} END"))
+
+
+def track_versions(table: Any) -> None:
+    """Keep a change counter for ``table``, created along with it on SQLite."""
+
+    @event.listens_for(table, "after_create")
+    def _on_create(target, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            _create(connection, target.name)
+
+    _tables.append(table)
+
+
+def tracked_tables() -> List[str]:
+    return [table.name for table in _tables]
+
+
+def create_counters(engine) -> None:
+    """Create the counters missing from an existing SQLite database (one
+    whose tables predate them, so create_all skips their events)."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for table in _tables:
+            if inspect(connection).has_table(table.name):
+                _create(connection, table.name)
+
+
+def read_versions(connection) -> Optional[Dict[str, int]]:
+    """Every counter by table name, None without counters."""
+    if connection.dialect.name != "sqlite":
+        return None
+    try:
+        return dict(connection.exec_driver_sql(f"SELECT name, version FROM {TABLE}").all())
+    except OperationalError:  # a database created before the counters
+        return None
+
+
+@contextmanager
+def snapshot(session) -> Iterator[Optional[Dict[str, int]]]:
+    """Run the reads of the block on the primary, in one read transaction,
+    and yield the counters they see."""
+    with primary(session):
+        connection = session.connection()
+        try:
+            if connection.dialect.name == "sqlite":
+                connection.exec_driver_sql("BEGIN")
+            yield read_versions(connection)
+        finally:
+            session.rollback()
+
+
+def committed_versions(session) -> Optional[Dict[str, Tuple[int, int]]]:
+    """table name -> (version before, version after) of the last commit of
+    the session, None when unknown."""
+    return session.info.get(_COMMITTED)
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context,
+                           executemany) -> None:
+    if context is None or not (context.isinsert or context.isupdate or context.isdelete):
+        return
+    if connection.connection.driver_connection.in_transaction:
+        return
+    # The first write of a transaction: take the lock now, then read
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        versions = dict(cursor.execute(f"SELECT name, version FROM {TABLE}").fetchall())
+    except sqlite3.OperationalError:  # a database created before the counters
+        versions = None
+    connection.info[_START] = versions
+
+
+def _end(connection) -> None:
+    connection.info.pop(_START, None)
+
+
+def _before_commit(session) -> None:
+    session.info.pop(_COMMITTED, None)
+    session.flush()
+    with primary(session):
+        connection = session.connection()
+    start = connection.info.pop(_START, None)
+    if start is None:
+        return
+    end = read_versions(connection)
+    if end is not None:
+        session.info[_COMMITTED] = {name: (start[name], version)
+                                    for name, version in end.items() if name in start}
+
+
+def init_app(app, db) -> None:
+    """Record the versions each commit of ``db.session`` moves the tables
+    between."""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "commit", _end)
+            event.listen(engine, "rollback", _end)
+    if not event.contains(db.session, "before_commit", _before_commit):
+        event.listen(db.session, "before_commit", _before_commit)
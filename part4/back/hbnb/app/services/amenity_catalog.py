@@ -0,0 +1,104 @@
+"""In-process snapshot of the amenity catalog.
+
+Amenities are a small, rarely-changing list, so reads are served from an
+immutable snapshot instead of the database. Writes through the facade bump
+the catalog version and the next read rebuilds the snapshot; ``ttl`` bounds
+how long a process keeps a snapshot built before another process changed
+the table.
+"""
+import hashlib
+import threading
+import time
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from app.persistence.repository import _decode_cursor, _encode_cursor, _page_key
+
+DEFAULT_TTL = 30.0
+
+
+class AmenityEntry(NamedTuple):
+    id: str
+    name: str
+    created_at: Any
+
+
+class AmenitySnapshot:
+    """Immutable view of every amenity at a given catalog version.
+
+    ``etag`` is derived from the content, so every process serving the
+    same catalog hands out the same validator.
+    """
+
+    __slots__ = ("version", "etag", "entries", "by_id")
+
+    def __init__(self, version: int, entries: Iterable[AmenityEntry]) -> None:
+        self.version = version
+        self.entries: Tuple[AmenityEntry, ...] = tuple(sorted(entries, key=_page_key))
+        self.by_id: Mapping[str, AmenityEntry] = MappingProxyType(
+            {entry.id: entry for entry in self.entries})
+        digest = hashlib.sha1()
+        for entry in self.entries:
+            digest.update(f"{entry.id}\0{entry.name}\0".encode())
+        self.etag = digest.hexdigest()[:20]
+
+    def missing(self, amenity_ids: Iterable[str]) -> List[str]:
+        """IDs that are not in the catalog, in the order given."""
+        by_id = self.by_id
+        return [a_id for a_id in amenity_ids if a_id not in by_id]
+
+    def page(self, limit: int, cursor: Optional[str] = None
+             ) -> Tuple[List[AmenityEntry], Optional[str]]:
+        """Same ordering and cursors as Repository.get_page."""
+        start = 0
+        if cursor:
+            start = bisect_right(self.entries, _decode_cursor(cursor), key=_page_key)
+        page = list(self.entries[start:start + limit])
+        has_more = start + limit < len(self.entries)
+        return page, _encode_cursor(page[-1]) if has_more else None
+
+
+class AmenityCatalog:
+    """Lazily rebuilt AmenitySnapshot.
+
+    ``loader`` returns every amenity; it is only called when the version
+    moved or the snapshot is older than ``ttl`` seconds.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Any]], ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._loader = loader
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[AmenitySnapshot] = None
+        self._built_at = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Called after every amenity write."""
+        with self._lock:
+            self._version += 1
+
+    def snapshot(self) -> AmenitySnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+            version = self._version
+            entries = [AmenityEntry(a.id, a.name, a.created_at) for a in self._loader()]
+            snapshot = AmenitySnapshot(version, entries)
+            self._snapshot, self._built_at = snapshot, self._clock()
+            return snapshot
+
+    def _is_fresh(self, snapshot: Optional[AmenitySnapshot]) -> bool:
+        return (snapshot is not None and snapshot.version == self._version
+                and self._clock() - self._built_at < self._ttl)
@@ -0,0 +1,150 @@
+"""In-process bitmap index of place amenities.
+
+Every place with amenities gets a slot number, and every amenity a bitmap
+over the slots (a Python int with bit ``slot`` set when the place has the
+amenity). "WiFi AND Pool" is then one ``&`` of two bitmaps and "WiFi OR
+Pool" one ``|``, with no join on place_amenity, whatever the number of
+places. Each place's own amenity set is kept as a compact mask over
+amenity bit positions, so a write knows which bitmaps to update.
+
+The index is built from (place_id, amenity_id) pairs and kept up to date
+by the facade after each committed write; app.services.live_index decides
+when it is current and rebuilds it.
+"""
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _to_bitmap(slots: Sequence[int], size: int) -> int:
+    bits = np.zeros(size, dtype=np.uint8)
+    bits[np.asarray(slots, dtype=np.int64)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _slots_of(bitmap: int) -> np.ndarray:
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    return np.flatnonzero(np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little"))
+
+
+def _positions(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AmenityBitmapIndex:
+    """Place -> amenity-set bitmaps answering AND/OR amenity filters."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()) -> None:
+        self._lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        self._place_ids: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        # amenity id <-> bit position in the place masks
+        self._positions: Dict[str, int] = {}
+        self._amenity_ids: List[Optional[str]] = []
+        self._masks: Dict[str, int] = {}
+        self._bitmaps: Dict[str, int] = {}
+        self._build(pairs)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _position(self, amenity_id: str) -> int:
+        position = self._positions.get(amenity_id)
+        if position is None:
+            position = self._positions[amenity_id] = len(self._amenity_ids)
+            self._amenity_ids.append(amenity_id)
+        return position
+
+    def _slot(self, place_id: str) -> int:
+        slot = self._slots.get(place_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._place_ids[slot] = place_id
+            else:
+                slot = len(self._place_ids)
+                self._place_ids.append(place_id)
+            self._slots[place_id] = slot
+        return slot
+
+    def _build(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        slots_by_amenity: Dict[str, List[int]] = {}
+        for place_id, amenity_id in pairs:
+            slot = self._slot(place_id)
+            self._masks[place_id] = (self._masks.get(place_id, 0)
+                                     | 1 << self._position(amenity_id))
+            slots_by_amenity.setdefault(amenity_id, []).append(slot)
+        for amenity_id, slots in slots_by_amenity.items():
+            self._bitmaps[amenity_id] = _to_bitmap(slots, len(self._place_ids))
+
+    def set(self, place_id: str, amenity_ids: Iterable[str]) -> None:
+        """Record the amenities a place now has."""
+        with self._lock:
+            self._set(place_id, amenity_ids)
+
+    def _set(self, place_id: str, amenity_ids: Iterable[str]) -> None:
+        old = self._masks.get(place_id, 0)
+        new = 0
+        for amenity_id in amenity_ids:
+            new |= 1 << self._position(amenity_id)
+        if new == old:
+            return
+        bit = 1 << self._slot(place_id)
+        for position in _positions(old & ~new):
+            amenity_id = self._amenity_ids[position]
+            self._bitmaps[amenity_id] &= ~bit
+        for position in _positions(new & ~old):
+            amenity_id = self._amenity_ids[position]
+            self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+        if new:
+            self._masks[place_id] = new
+        else:
+            self._release(place_id)
+
+    def _release(self, place_id: str) -> None:
+        # Only places with amenities hold a slot; free ones are reused
+        del self._masks[place_id]
+        slot = self._slots.pop(place_id)
+        self._place_ids[slot] = None
+        self._free_slots.append(slot)
+
+    def remove(self, place_id: str) -> None:
+        """Forget a deleted place."""
+        self.set(place_id, ())
+
+    def remove_amenity(self, amenity_id: str) -> None:
+        """Forget a deleted amenity."""
+        with self._lock:
+            if amenity_id not in self._positions:
+                return
+            position = self._positions.pop(amenity_id)
+            self._amenity_ids[position] = None
+            keep = ~(1 << position)
+            for slot in _slots_of(self._bitmaps.pop(amenity_id, 0)):
+                place_id = self._place_ids[slot]
+                self._masks[place_id] &= keep
+                if not self._masks[place_id]:
+                    self._release(place_id)
+
+    def match(self, groups: Iterable[Iterable[str]],
+              limit: Optional[int] = None) -> Optional[List[str]]:
+        """IDs of the places having, for every group, one of its amenities
+        (AND of ORs). None when more than ``limit`` places match."""
+        with self._lock:
+            result = None
+            for group in groups:
+                union = 0
+                for amenity_id in group:
+                    union |= self._bitmaps.get(amenity_id, 0)
+                result = union if result is None else result & union
+            if not result:
+                return []
+            if limit is not None and result.bit_count() > limit:
+                return None
+            place_ids = self._place_ids
+            return [place_ids[slot] for slot in _slots_of(result)]
@@ -1,32 +1,222 @@
+import functools
+import threading
+import uuid
+from contextlib import nullcontext
+from itertools import islice
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy.exc import IntegrityError
 from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+from app.persistence.cache import CachedRepository
+from app.persistence.unit_of_work import after_commit, unit_of_work
+from app.persistence.replica import reading
+from app.persistence.versions import committed_versions, read_versions, snapshot, tracked_tables
+from app.persistence.geo import cell_ranges, haversine_km
+from app.persistence.search import tokenize
+from app.services.amenity_catalog import AmenityCatalog
+from app.services.amenity_index import AmenityBitmapIndex
+from app.services.leaderboard import Leaderboard, bayesian_score, region_of
+from app.services.live_index import LiveIndex
+from app.services.similar_places import SimilarPlaceIndex
+from app.services.title_index import TitleIndex
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
 
 
+def _transactional(method):
+    """Run a facade method that writes several times as one unit of work."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class HBnBFacade:
     """
     Façade pour relier l'API aux dépôts en mémoire.
     """
 
+    # rows per INSERT statement in the bulk_create_* methods
+    BULK_CHUNK_SIZE = 1000
+
     def __init__(self):
         try:
-            self.user_repo = SQLAlchemyRepository(User)
-            self.amenity_repo = SQLAlchemyRepository(Amenity)
-            self.place_repo = SQLAlchemyRepository(Place)
-            self.review_repo = SQLAlchemyRepository(Review)
+            self.user_repo = CachedRepository(SQLAlchemyRepository(User))
+            self.amenity_repo = CachedRepository(SQLAlchemyRepository(Amenity))
+            self.place_repo = CachedRepository(SQLAlchemyRepository(Place))
+            self.review_repo = CachedRepository(SQLAlchemyRepository(Review))
         except Exception:
-            self.user_repo = InMemoryRepository()
+            self.user_repo = InMemoryRepository(indexed_attributes=("email",))
             self.amenity_repo = InMemoryRepository()
-            self.place_repo = InMemoryRepository()
-            self.review_repo = InMemoryRepository()
-
+            self.place_repo = InMemoryRepository(
+                indexed_attributes=("title", "geo_cell"),
+                text_attributes=Place.__fts__.weights)
+            self.review_repo = InMemoryRepository(
+                indexed_attributes=("place_id", "user_id"))
+        self.amenity_catalog = AmenityCatalog(self.amenity_repo.get_all)
+        self.title_index = self._live_index(
+            ("places",), lambda: TitleIndex(self.place_repo.iterate_values(("id", "title"))))
+        self.amenity_index = self._live_index(
+            ("place_amenity",),
+            lambda: AmenityBitmapIndex(self.place_repo.iterate_related_ids("amenities")))
+        self.leaderboard = self._live_index(
+            ("places",), lambda: Leaderboard(self.place_repo.iterate_values(
+                ("id", "review_count", "rating_sum", "latitude", "longitude"))))
+        self.similar_index = self._live_index(
+            ("places", "place_amenity"),
+            lambda: SimilarPlaceIndex(
+                self.place_repo.iterate_values(("id", "price", "latitude", "longitude")),
+                self.place_repo.iterate_related_ids("amenities")))
+        self._live_indexes = [self.title_index, self.amenity_index, self.similar_index,
+                              self.leaderboard]
+
+    def transaction(self):
+        """Unit of work: ``with facade.transaction():`` makes the writes of
+        the block a single commit, rolled back if the block raises. Blocks
+        nest; write requests already run inside one (see unit_of_work)."""
+        db = getattr(self.user_repo, "db", None)
+        return unit_of_work(db.session) if db is not None else nullcontext()
+
+    def _after_commit(self, callback):
+        """Run ``callback`` once the current writes are committed (see
+        unit_of_work.after_commit); at once for the in-memory repositories."""
+        db = getattr(self.user_repo, "db", None)
+        if db is not None:
+            after_commit(db.session, callback)
+        else:
+            callback()
+
+    # The in-memory repositories are only written through this facade, whose
+    # writes the indexes apply: their versions never move
+    _MEMORY_VERSIONS = dict.fromkeys(tracked_tables(), 0)
+
+    def _live_index(self, tables, load):
+        """LiveIndex of ``load()``, built from one snapshot of ``tables``."""
+        return LiveIndex(tables, lambda: self._snapshot(load), self._table_versions,
+                         self._spawn)
+
+    def _snapshot(self, load):
+        db = getattr(self.user_repo, "db", None)
+        if db is None:
+            return load(), self._MEMORY_VERSIONS
+        with snapshot(db.session) as versions:
+            return load(), versions
+
+    def _table_versions(self):
+        db = getattr(self.user_repo, "db", None)
+        if db is None:
+            return self._MEMORY_VERSIONS
+        # Read where the repository reads go, replica included
+        with reading(db.session):
+            return read_versions(db.session.connection())
+
+    def _committed_versions(self):
+        db = getattr(self.user_repo, "db", None)
+        return committed_versions(db.session) if db is not None else None
+
+    def _spawn(self, target):
+        """Run ``target`` on a background thread, in an app context of the
+        current app. A :memory: SQLite database is one connection shared by
+        every thread, so there it runs at once."""
+        db = getattr(self.user_repo, "db", None)
+        if db is None or not has_app_context():
+            threading.Thread(target=target, name="index-build", daemon=True).start()
+            return
+        if db.engine.url.database in (None, "", ":memory:"):
+            target()
+            return
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                target()
+        threading.Thread(target=run, name="index-build", daemon=True).start()
+
+    def refresh_indexes(self):
+        """Build every in-process index now and wait for them (start-up
+        warm-up; requests only ever schedule builds in the background)."""
+        for index in self._live_indexes:
+            index.refresh()
+
+    def _update_indexes(self, changes):
+        """Once the writes commit, apply ``changes`` (LiveIndex -> function
+        of its index) and give every in-process index the versions the
+        commit moved the tables between; see LiveIndex.apply."""
+        self._after_commit(lambda: self._apply_to_indexes(changes))
+
+    def _apply_to_indexes(self, changes):
+        committed = self._committed_versions()
+        for index in self._live_indexes:
+            index.apply(changes.get(index), committed)
+
+    @staticmethod
+    def _place_entry(place, changes=None):
+        """What the in-process place indexes keep of a place: (id, title,
+        price, latitude, longitude, amenity ids), ``changes`` applied."""
+        changes = changes or {}
+        return (place.id,) + tuple(
+            changes.get(attr, getattr(place, attr))
+            for attr in ("title", "price", "latitude", "longitude")
+        ) + ([a.id for a in place.amenities],)
+
+    def _index_places(self, entries):
+        """Update the in-process indexes with the ``_place_entry`` of new or
+        changed places once the writes commit."""
+        def titles(index):
+            for place_id, title, *_ in entries:
+                index.add(place_id, title)
+
+        def amenities(index):
+            for place_id, *_, amenity_ids in entries:
+                index.set(place_id, amenity_ids)
+
+        def similar(index):
+            for place_id, _, price, latitude, longitude, amenity_ids in entries:
+                index.set(place_id, price, latitude, longitude, amenity_ids)
+
+        def regions(board):
+            for place_id, _, _, latitude, longitude, _ in entries:
+                board.locate(place_id, latitude, longitude)
+        self._update_indexes({self.title_index: titles, self.amenity_index: amenities,
+                              self.similar_index: similar, self.leaderboard: regions})
+
+    def _unindex_places(self, place_ids):
+        """Drop deleted places from the in-process indexes once the writes
+        commit."""
+        def remove(index):
+            for place_id in place_ids:
+                index.remove(place_id)
+        self._update_indexes({index: remove for index in self._live_indexes})
+
+    def _rerank_places(self, place_ids):
+        """Once the review writes commit, give the leaderboard the review
+        aggregates of the places they touched. Reading them back, rather
+        than applying deltas, leaves the board right whatever it missed."""
+        place_ids = set(place_ids)
+
+        def rerank():
+            aggregates = [(place.id, place.review_count, place.rating_sum)
+                          for place in self.place_repo.get_many(place_ids).values()]
+
+            def set_reviews(board):
+                for place_id, review_count, rating_sum in aggregates:
+                    board.set_reviews(place_id, review_count, rating_sum)
+            self._apply_to_indexes({self.leaderboard: set_reviews})
+        self._after_commit(rerank)
+
+    def cache_stats(self):
+        """Hit/miss counters of the cached repositories, by entity."""
+        repos = {"users": self.user_repo, "amenities": self.amenity_repo,
+                 "places": self.place_repo, "reviews": self.review_repo}
+        return {name: repo.stats for name, repo in repos.items()
+                if isinstance(repo, CachedRepository)}
 
     def create_user(self, user_data):
+        # The password setter hashes it: no second bcrypt pass here
         user = User(**user_data)
-        if "password" in user_data:
-            user.hash_password(user_data["password"])
         self.user_repo.add(user)
         return user
 
@@ -34,18 +224,23 @@ class HBnBFacade:
         return self.user_repo.get(user_id)
 
     def get_user_by_email(self, email: str):
-        return self.user_repo.model.query.filter_by(email=email).first()
+        return self.user_repo.get_by_attribute("email", email)
 
 
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit: int, cursor: str = None):
+        return self.user_repo.get_page(limit, cursor)
+
+    def iter_users(self):
+        return self.user_repo.iterate()
+
     def update_user(self, user_id: str, data: dict):
         user = self.user_repo.get(user_id)
         if not user:
             return None
-        user.update(data)
-        return user
+        return self.user_repo.update(user_id, data)
 
     def create_amenity(self, data: dict):
         from app.models.amenity import Amenity
@@ -54,69 +249,199 @@ class HBnBFacade:
             raise ValueError("name is required")
         amenity = Amenity(name)
         self.amenity_repo.add(amenity)
+        self._after_commit(self.amenity_catalog.invalidate)
         return amenity
 
+    def bulk_create_amenities(self, rows, chunk_size: int = BULK_CHUNK_SIZE):
+        """Insert amenities from an iterable of (line, data) in one
+        transaction, like bulk_create_places."""
+        errors = []
+
+        def amenities():
+            names = set()
+            rows_iter = iter(rows)
+            while chunk := list(islice(rows_iter, chunk_size)):
+                taken = self.amenity_repo.existing_values("name", {
+                    d["name"].strip() for _, d in chunk if isinstance(d.get("name"), str)})
+                for line, data in chunk:
+                    name = data.get("name")
+                    name = name.strip() if isinstance(name, str) else ""
+                    if not name:
+                        errors.append({"line": line, "error": "name is required"})
+                    elif len(name) > 50:
+                        errors.append({"line": line, "error": "name must be <= 50 characters"})
+                    elif name in taken or name in names:
+                        errors.append({"line": line, "error": "Amenity already exists"})
+                    else:
+                        names.add(name)
+                        yield Amenity(name)
+
+        created = self.amenity_repo.add_many(amenities(), chunk_size)
+        self._after_commit(self.amenity_catalog.invalidate)
+        return created, errors
+
     def get_amenity(self, amenity_id: str):
         return self.amenity_repo.get(amenity_id)
 
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenity_catalog(self):
+        """Immutable snapshot of every amenity (see AmenityCatalog)."""
+        return self.amenity_catalog.snapshot()
+
+    def get_amenities_page(self, limit: int, cursor: str = None):
+        return self.get_amenity_catalog().page(limit, cursor)
+
+    def iter_amenities(self):
+        return iter(self.get_amenity_catalog().entries)
+
     def update_amenity(self, amenity_id: str, data: dict):
         amenity = self.amenity_repo.get(amenity_id)
         if not amenity:
             return None
         amenity.update(data)
+        self._after_commit(self.amenity_catalog.invalidate)
         return amenity
 
-    def create_place(self, data: dict):
-        owner_id = data.get("owner_id")
-        if not owner_id or not self.user_repo.get(owner_id):
-            raise ValueError("owner not found")
-
+    def _resolve_amenities(self, amenity_ids):
+        """Load amenities by ID in one batch, keeping the given order.
+
+        Every unknown ID is reported in a single ValueError.
+        """
+        amenity_ids = list(dict.fromkeys(amenity_ids))
+        # The catalog snapshot rejects bad IDs before touching the database
+        missing = self.get_amenity_catalog().missing(amenity_ids)
+        if not missing:
+            found = self.amenity_repo.get_many(amenity_ids)
+            missing = [a_id for a_id in amenity_ids if a_id not in found]
+            if missing:
+                # Deleted by another process since the snapshot was built.
+                # That delete is committed already: invalidate at once, the
+                # ValueError below rolls back any unit of work we are in
+                self.amenity_catalog.invalidate()
+        if missing:
+            noun = "amenity" if len(missing) == 1 else "amenities"
+            raise ValueError(f"{noun} not found: {', '.join(missing)}")
+        return [found[a_id] for a_id in amenity_ids]
+
+    @staticmethod
+    def _is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _new_place(self, data: dict):
+        """Validate title, price and coordinates and build the Place.
+
+        Owner, duplicate-title and amenity checks are left to the caller.
+        """
         title = data.get("title")
         if title is None or not str(title).strip():
             raise ValueError("title cannot be empty")
+        if not isinstance(title, str):
+            raise ValueError("invalid title")
         if len(title) > 100:
             raise ValueError("title too long")
 
         price = data.get("price")
-        if price is not None and price <= 0:
+        if price is None:
+            raise ValueError("price is required")
+        if not self._is_number(price) or price <= 0:
             raise ValueError("invalid price")
 
-        # Check for duplicate title
-        existing_places = self.place_repo.get_all()
-        for p in existing_places:
-            if getattr(p, 'title', '') == title:
-                 raise ValueError("Place with same title already exists")
-
         latitude = data.get("latitude")
-        if latitude is not None and not (-90 <= latitude <= 90):
+        if latitude is not None and not (self._is_number(latitude) and -90 <= latitude <= 90):
             raise ValueError("invalid latitude")
 
         longitude = data.get("longitude")
-        if longitude is not None and not (-180 <= longitude <= 180):
+        if longitude is not None and not (
+                self._is_number(longitude) and -180 <= longitude <= 180):
             raise ValueError("invalid longitude")
 
-        amenity_ids = data.get("amenities", [])
-        for a_id in amenity_ids:
-            if not self.amenity_repo.get(a_id):
-                raise ValueError(f"amenity {a_id} not found")
+        description = data.get("description")
+        if description is not None and not isinstance(description, str):
+            raise ValueError("invalid description")
 
         place = Place(
             title=title,
-            description=data.get("description"),
+            description=description,
             price=price,
             latitude=latitude,
             longitude=longitude,
-            owner_id=owner_id,
+            owner_id=data.get("owner_id"),
         )
-        place.amenities = [self.amenity_repo.get(a_id) for a_id in amenity_ids]
+        # Known now rather than at INSERT: bulk_create_places indexes the
+        # places before add_many fills in the column defaults
+        place.id = str(uuid.uuid4())
+        return place
+
+    def create_place(self, data: dict):
+        owner_id = data.get("owner_id")
+        if not owner_id or not self.user_repo.get(owner_id):
+            raise ValueError("owner not found")
+
+        place = self._new_place(data)
+
+        # Check for duplicate title
+        if self.place_repo.exists_by_attribute("title", place.title):
+            raise ValueError("Place with same title already exists")
+
+        place.amenities = self._resolve_amenities(data.get("amenities", []))
         self.place_repo.add(place)
+        self._index_places([self._place_entry(place)])
         return place
 
+    def bulk_create_places(self, rows, chunk_size: int = BULK_CHUNK_SIZE):
+        """Insert places from an iterable of (line, data) in one transaction.
+
+        ``rows`` is consumed lazily; owner, duplicate-title and amenity
+        checks are batched per chunk instead of run per row. Invalid rows
+        are skipped and reported as {"line", "error"} dicts.
+        Returns (number of places created, errors).
+        """
+        errors = []
+
+        def places():
+            titles = set()  # titles taken earlier in this import
+            rows_iter = iter(rows)
+            while chunk := list(islice(rows_iter, chunk_size)):
+                owners = self.user_repo.get_many(
+                    {d.get("owner_id") for _, d in chunk if isinstance(d.get("owner_id"), str)})
+                taken = self.place_repo.existing_values(
+                    "title", {d.get("title") for _, d in chunk if isinstance(d.get("title"), str)})
+                amenity_ids = {a_id for _, d in chunk if isinstance(d.get("amenities"), list)
+                               for a_id in d["amenities"] if isinstance(a_id, str)}
+                amenities = self.amenity_repo.get_many(amenity_ids)
+                for line, data in chunk:
+                    try:
+                        if data.get("owner_id") not in owners:
+                            raise ValueError("owner not found")
+                        place = self._new_place(data)
+                        if place.title in taken or place.title in titles:
+                            raise ValueError("Place with same title already exists")
+                        ids = data.get("amenities") or []
+                        if not isinstance(ids, list) or not all(isinstance(a_id, str)
+                                                                for a_id in ids):
+                            raise ValueError("amenities must be a list of IDs")
+                        missing = [a_id for a_id in ids if a_id not in amenities]
+                        if missing:
+                            raise ValueError(f"amenities not found: {', '.join(map(str, missing))}")
+                    except ValueError as e:
+                        errors.append({"line": line, "error": str(e)})
+                        continue
+                    if ids:
+                        place.amenities = [amenities[a_id] for a_id in dict.fromkeys(ids)]
+                    titles.add(place.title)
+                    added.append(self._place_entry(place))
+                    yield place
+
+        added = []
+        created = self.place_repo.add_many(places(), chunk_size)
+        self._index_places(added)
+        return created, errors
+
     def get_place(self, place_id: str):
-        place = self.place_repo.get(place_id)
+        place = self.place_repo.get_with_relations(
+            place_id, "owner", "amenities", "reviews")
         if not place:
             return None
 
@@ -127,9 +452,202 @@ class HBnBFacade:
             "reviews": place.reviews
         }
 
+    def get_place_owner_id(self, place_id: str):
+        """Owner of a place, None for an unknown place; loads no relations."""
+        place = self.place_repo.get(place_id)
+        return place.owner_id if place else None
+
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    # filter name -> (Place attribute, comparison)
+    PLACE_RANGE_FILTERS = {
+        "min_price": ("price", "ge"),
+        "max_price": ("price", "le"),
+        "min_lat": ("latitude", "ge"),
+        "max_lat": ("latitude", "le"),
+        "min_lng": ("longitude", "ge"),
+        "max_lng": ("longitude", "le"),
+    }
+
+    # sort name -> Place attribute, sorted in descending order
+    PLACE_SORTS = {
+        "rating": "average_rating",
+        "reviews": "review_count",
+    }
+
+    def search_places(self, filters: dict, limit: int, cursor: str = None, sort: str = None):
+        """Page through places matching price, bounding-box and amenity filters.
+
+        Every filter becomes a SQL predicate (price and lat/lng are indexed
+        on Place) so only matching rows leave the database. ``amenities``
+        lists the amenities the place must all have; an item may itself be
+        a list of IDs, of which the place needs at least one. ``sort`` is one of
+        PLACE_SORTS; by default places come in creation order.
+        """
+        criteria, order_by = self._place_query(filters, sort)
+        # to_dict lists amenity and review ids: load them for the whole page
+        return self.place_repo.get_page(
+            limit, cursor, relationships=("amenities", "reviews"), criteria=criteria,
+            order_by=order_by)
+
+    def search_places_text(self, q: str, limit: int, cursor: str = None):
+        """Page through places whose title or description match ``q``, best
+        match first. Every word must match, as a prefix."""
+        if not tokenize(q):
+            raise ValueError("q must contain at least one word")
+        return self.place_repo.search(
+            q, limit, cursor, relationships=("amenities", "reviews"))
+
+    MAX_SUGGESTIONS = 20
+
+    def suggest_place_titles(self, prefix: str, limit: int = 10):
+        """(id, title) of places whose title matches what was typed so far,
+        tolerating typos; see TitleIndex.suggest.
+
+        Until the index is first built, in the background, the full-text
+        index stands in: prefixes match, typos do not.
+        """
+        if not tokenize(prefix):
+            raise ValueError("prefix must contain at least one letter or digit")
+        if not 1 <= limit <= self.MAX_SUGGESTIONS:
+            raise ValueError(f"limit must be between 1 and {self.MAX_SUGGESTIONS}")
+        index = self.title_index.latest()
+        if index is None:
+            # It also matches descriptions: keep the title matches, ranked
+            # as the index would
+            places, _ = self.place_repo.search(prefix, self.MAX_SUGGESTIONS * 5)
+            index = TitleIndex((place.id, place.title) for place in places)
+        return index.suggest(prefix, limit)
+
+    def iter_places(self, filters: dict, sort: str = None):
+        """Every place matching the search_places filters, in the same order,
+        loaded batch by batch."""
+        criteria, order_by = self._place_query(filters, sort)
+        return self.place_repo.iterate(
+            relationships=("amenities", "reviews"), criteria=criteria, order_by=order_by)
+
+    # Largest ID list the amenity filter turns into an IN (...)
+    AMENITY_MATCH_LIMIT = 5000
+
+    def _place_query(self, filters: dict, sort: str = None):
+        if sort is not None and sort not in self.PLACE_SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(self.PLACE_SORTS)}")
+        criteria = []
+        for name, (attr, op) in self.PLACE_RANGE_FILTERS.items():
+            if filters.get(name) is not None:
+                criteria.append((attr, op, filters[name]))
+        groups = [item if isinstance(item, (list, tuple)) else [item]
+                  for item in filters.get("amenities") or []]
+        if groups:
+            # The bitmap index narrows the places to a short list of IDs, but
+            # only when it holds every committed amenity link: otherwise it
+            # is being rebuilt in the background...
+            index = self.amenity_index.current()
+            place_ids = (index.match(groups, self.AMENITY_MATCH_LIMIT)
+                         if index is not None else None)
+            if place_ids is not None:
+                criteria.append(("id", "in", place_ids))
+            # ... and EXISTS filters alone, as it does past the limit. It
+            # also drops the listed places that lost an amenity since.
+            for group in groups:
+                if len(group) == 1:
+                    criteria.append(("amenities", "has", group[0]))
+                else:
+                    criteria.append(("amenities", "has_any", list(group)))
+        return criteria, self.PLACE_SORTS.get(sort)
+
+    MAX_NEARBY_RADIUS_KM = 500
+
+    def get_nearby_places(self, lat: float, lng: float, radius_km: float, limit: int = 50):
+        """Places within ``radius_km`` of (lat, lng), nearest first.
+
+        The grid index narrows the search to the cells covering the circle;
+        exact haversine distances are then computed for those candidates in
+        one vectorized pass. Returns a list of (place, distance_km).
+        """
+        if not (-90 <= lat <= 90):
+            raise ValueError("invalid latitude")
+        if not (-180 <= lng <= 180):
+            raise ValueError("invalid longitude")
+        if not (0 < radius_km <= self.MAX_NEARBY_RADIUS_KM):
+            raise ValueError(f"radius_km must be in (0, {self.MAX_NEARBY_RADIUS_KM}]")
+
+        candidates = self.place_repo.get_all_by_attribute_ranges(
+            "geo_cell", cell_ranges(lat, lng, radius_km))
+        if not candidates:
+            return []
+        distances = haversine_km(
+            lat, lng,
+            np.fromiter((p.latitude for p in candidates), float, len(candidates)),
+            np.fromiter((p.longitude for p in candidates), float, len(candidates)),
+        )
+        inside = np.flatnonzero(distances <= radius_km)
+        nearest = inside[np.argsort(distances[inside], kind="stable")][:limit]
+        return [(candidates[i], float(distances[i])) for i in nearest]
+
+    MAX_TOP = 100
+
+    def get_top_places(self, limit: int = 10, lat: float = None, lng: float = None):
+        """The ``limit`` best-rated places by Bayesian average, as (place,
+        score); with ``lat`` and ``lng``, those of the region around that
+        point. See Leaderboard."""
+        if not 1 <= limit <= self.MAX_TOP:
+            raise ValueError(f"limit must be between 1 and {self.MAX_TOP}")
+        if (lat is None) != (lng is None):
+            raise ValueError("lat and lng go together")
+        if lat is not None and not (-90 <= lat <= 90):
+            raise ValueError("invalid latitude")
+        if lng is not None and not (-180 <= lng <= 180):
+            raise ValueError("invalid longitude")
+        board = self.leaderboard.latest()
+        if board is None:  # first build still running
+            return []
+        region = region_of(lat, lng)
+        # The board may trail writes made elsewhere: score the places as
+        # loaded, so the score always matches their review counts, from
+        # a few more candidates than asked for
+        ranked = board.top(2 * limit, region)
+        places = self.place_repo.iterate(
+            relationships=("amenities", "reviews"),
+            criteria=[("id", "in", [i for i, _ in ranked])])
+        scored = [(place, bayesian_score(place.review_count, place.rating_sum))
+                  for place in places
+                  if place.review_count
+                  and (region is None or region_of(place.latitude, place.longitude) == region)]
+        scored.sort(key=lambda pair: (-pair[1], -pair[0].review_count, pair[0].id))
+        return scored[:limit]
+
+    MAX_SIMILAR = 50
+
+    def get_similar_places(self, place_id: str, limit: int = 10):
+        """The ``limit`` places most like ``place_id`` by amenities, price
+        and location, best first, as (place, score); None when the place
+        does not exist. See SimilarPlaceIndex for the score.
+
+        The place itself is read from the database, so its latest state is
+        compared; the others come from the in-process matrix. Until the
+        matrix is first built, in the background, there are none.
+        """
+        if not 1 <= limit <= self.MAX_SIMILAR:
+            raise ValueError(f"limit must be between 1 and {self.MAX_SIMILAR}")
+        place = self.place_repo.get_with_relations(place_id, "amenities")
+        if not place:
+            return None
+        index = self.similar_index.latest()
+        if index is None:
+            return []
+        ranked = index.similar(
+            place.price, place.latitude, place.longitude,
+            [a.id for a in place.amenities], limit, exclude=place_id)
+        # to_dict lists amenity and review ids: load them for every place.
+        # Places deleted by another process since the matrix was built drop out.
+        places = {p.id: p for p in self.place_repo.iterate(
+            relationships=("amenities", "reviews"),
+            criteria=[("id", "in", [i for i, _ in ranked])])}
+        return [(places[i], score) for i, score in ranked if i in places]
+
+    @_transactional
     def update_place(self, place_id: str, data: dict):
         place = self.place_repo.get(place_id)
         if not place:
@@ -173,17 +691,15 @@ class HBnBFacade:
             place.owner_id = new_owner
 
         if "amenities" in data:
-            new_ids = data.get("amenities") or []
-            for a_id in new_ids:
-                if not self.amenity_repo.get(a_id):
-                    raise ValueError(f"amenity {a_id} not found")
-            place.amenities = [self.amenity_repo.get(a_id) for a_id in new_ids]
+            place.amenities = self._resolve_amenities(data.get("amenities") or [])
 
         if updatable:
-            place.update(updatable)
+            self.place_repo.update(place_id, updatable)
+        self._index_places([self._place_entry(place, updatable)])
 
         return place
 
+    @_transactional
     def create_review(self, data: dict):
         """Créer une nouvelle review avec validation stricte."""
         user_id = data.get("user_id")
@@ -196,8 +712,27 @@ class HBnBFacade:
         if not place_id or not self.place_repo.get(place_id):
             raise ValueError("place not found")
 
+        review = self._new_review(text, rating, place_id, user_id)
+        if self.has_reviewed(user_id, place_id):
+            raise ValueError("You have already reviewed this place")
+        # Committed together with the review
+        self.place_repo.increment(place_id, {"review_count": 1, "rating_sum": review.rating})
+        try:
+            self.review_repo.add(review)
+        except IntegrityError as e:
+            # A concurrent request won the race for the unique index
+            raise ValueError("You have already reviewed this place") from e
+
+        self._rerank_places([place_id])
+
+        return review
+
+    def _new_review(self, text, rating, place_id, user_id):
+        """Validate text and rating and build the Review."""
         if text is None or not str(text).strip():
             raise ValueError("text is required")
+        if not isinstance(text, str):
+            raise ValueError("invalid text")
 
         if rating is None:
             raise ValueError("rating is required")
@@ -208,20 +743,66 @@ class HBnBFacade:
         if val < 1 or val > 5:
             raise ValueError("rating must be between 1 and 5")
 
-        review = Review(
+        return Review(
             user_id=user_id,
             place_id=place_id,
             text=text.strip(),
             rating=val
         )
-        self.review_repo.add(review)
 
-        place = self.place_repo.get(place_id)
-        if not hasattr(place, "reviews"):
-            place.reviews = []
-        place.reviews.append(review)
-
-        return review
+    def bulk_create_reviews(self, rows, restricted: bool = True,
+                            chunk_size: int = BULK_CHUNK_SIZE):
+        """Insert reviews from an iterable of (line, data) in one transaction.
+
+        Works like bulk_create_places. A user reviews a place at most once;
+        with ``restricted`` the rule of non-admin users also applies: no
+        review of one's own place. Place aggregates are updated once per
+        place and chunk, inside the same transaction.
+        """
+        errors = []
+
+        def reviews():
+            reviewed = set()  # (user_id, place_id) pairs seen so far
+            rows_iter = iter(rows)
+            while chunk := list(islice(rows_iter, chunk_size)):
+                def ids(key):
+                    return {d.get(key) for _, d in chunk if isinstance(d.get(key), str)}
+                users = self.user_repo.get_many(ids("user_id"))
+                places = self.place_repo.get_many(ids("place_id"))
+                for user_id in users.keys() - {u for u, _ in reviewed}:
+                    reviewed.update((user_id, r.place_id) for r in
+                                    self.review_repo.get_all_by_attribute("user_id", user_id))
+                batch, deltas = [], {}
+                for line, data in chunk:
+                    user_id, place_id = data.get("user_id"), data.get("place_id")
+                    try:
+                        if user_id not in users:
+                            raise ValueError("user not found")
+                        if place_id not in places:
+                            raise ValueError("place not found")
+                        review = self._new_review(
+                            data.get("text"), data.get("rating"), place_id, user_id)
+                        if restricted and places[place_id].owner_id == user_id:
+                            raise ValueError("You cannot review your own place")
+                        if (user_id, place_id) in reviewed:
+                            raise ValueError("You have already reviewed this place")
+                    except ValueError as e:
+                        errors.append({"line": line, "error": str(e)})
+                        continue
+                    reviewed.add((user_id, place_id))
+                    count, total = deltas.get(place_id, (0, 0))
+                    deltas[place_id] = (count + 1, total + review.rating)
+                    batch.append(review)
+                for place_id, (count, total) in deltas.items():
+                    self.place_repo.increment(
+                        place_id, {"review_count": count, "rating_sum": total})
+                reviewed_places.update(deltas)
+                yield from batch
+
+        reviewed_places = set()
+        created = self.review_repo.add_many(reviews(), chunk_size)
+        self._rerank_places(reviewed_places)
+        return created, errors
 
     def get_review(self, review_id: str):
         """Récupérer une review par ID."""
@@ -231,6 +812,26 @@ class HBnBFacade:
         """Lister toutes les reviews."""
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit: int, cursor: str = None):
+        """Lister les reviews page par page."""
+        return self.review_repo.get_page(limit, cursor)
+
+    def iter_reviews(self):
+        """Parcourir toutes les reviews, lot par lot."""
+        return self.review_repo.iterate()
+
+    def has_reviewed(self, user_id: str, place_id: str) -> bool:
+        """Vérifier si l'utilisateur a déjà noté la place (index unique place_id, user_id)."""
+        return self.review_repo.exists(
+            (("place_id", "eq", place_id), ("user_id", "eq", user_id)))
+
+    def get_reviews_by_user_page(self, user_id: str, limit: int, cursor: str = None):
+        """Lister les reviews d'un utilisateur page par page; None si l'utilisateur n'existe pas."""
+        if not self.user_repo.get(user_id):
+            return None
+        return self.review_repo.get_page(
+            limit, cursor, criteria=(("user_id", "eq", user_id),))
+
     def get_reviews_by_place(self, place_id: str):
         """Lister les reviews pour une place donnée."""
         place = self.place_repo.get(place_id)
@@ -238,6 +839,7 @@ class HBnBFacade:
             return None
         return getattr(place, "reviews", [])
 
+    @_transactional
     def update_review(self, review_id: str, data: dict):
         """Mettre à jour une review (text et/ou rating)."""
         review = self.review_repo.get(review_id)
@@ -258,31 +860,58 @@ class HBnBFacade:
                 raise ValueError("rating must be an integer between 1 and 5")
             if val < 1 or val > 5:
                 raise ValueError("rating must be between 1 and 5")
+            self.place_repo.increment(review.place_id, {"rating_sum": val - review.rating})
             review.rating = val
+            self._rerank_places([review.place_id])
 
         if hasattr(review, "save"):
             review.save()
 
         return review
 
+    @_transactional
     def delete_review(self, review_id: str):
         """Supprimer une review existante."""
         review = self.review_repo.get(review_id)
         if not review:
             return False
 
+        # Before touching place.reviews: that makes the review an orphan
+        # and the increment's autoflush would delete it too early.
+        self.place_repo.increment(
+            review.place_id, {"review_count": -1, "rating_sum": -review.rating})
+
         place = self.place_repo.get(review.place_id)
         if place and hasattr(place, "reviews"):
             place.reviews = [r for r in place.reviews if r.id != review_id]
 
         self.review_repo.delete(review_id)
+        self._rerank_places([review.place_id])
         return True
 
+    @_transactional
     def delete_user(self, user_id: str):
+        user = self.user_repo.get(user_id)
+        # The user's reviews are deleted with them: keep place aggregates right
+        for review in getattr(user, "reviews", None) or []:
+            self.place_repo.increment(
+                review.place_id, {"review_count": -1, "rating_sum": -review.rating})
+        self._rerank_places(review.place_id for review in getattr(user, "reviews", None) or [])
+        # ... and so are their places
+        place_ids = [place.id for place in getattr(user, "places", None) or []]
+        self._unindex_places(place_ids)
         return self.user_repo.delete(user_id)
 
     def delete_place(self, place_id: str):
-        return self.place_repo.delete(place_id)
+        result = self.place_repo.delete(place_id)
+        self._unindex_places([place_id])
+        return result
 
     def delete_amenity(self, amenity_id: str):
-        return self.amenity_repo.delete(amenity_id)
+        result = self.amenity_repo.delete(amenity_id)
+
+        def remove(index):
+            index.remove_amenity(amenity_id)
+        self._after_commit(self.amenity_catalog.invalidate)
+        self._update_indexes({self.amenity_index: remove, self.similar_index: remove})
+        return result
@@ -0,0 +1,182 @@
+"""In-process leaderboard of the best-rated places.
+
+Places are ranked by a Bayesian average of their ratings:
+
+    score = (PRIOR_REVIEWS * PRIOR_RATING + rating_sum) / (PRIOR_REVIEWS + review_count)
+
+as if every place had PRIOR_REVIEWS more reviews rated PRIOR_RATING, so a
+single 5-star review does not beat a hundred 4.8 ones. The prior is fixed:
+one review then moves one place only, where a prior following the global
+mean would move them all.
+
+Each board is a heap with lazy deletion. Moving a place pushes a new entry
+in O(log n) and leaves the old one behind, to be skipped when read and
+dropped when stale entries outnumber live ones. The top ``k`` are read
+best-first down the heap without popping anything, in O(k log k).
+
+Besides the global board, every region (a REGION_DEG x REGION_DEG tile of
+latitude/longitude) has its own. Only places with reviews are ranked.
+
+The boards are built from the review aggregates and coordinates of every
+place, then kept up to date by the facade with those of the places written
+to; app.services.live_index rebuilds them after writes from elsewhere.
+"""
+import heapq
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PRIOR_RATING = 3.0
+PRIOR_REVIEWS = 5
+REGION_DEG = 1.0
+
+Region = Tuple[int, int]
+# (-score, -review_count, place_id): best first, then most reviewed
+Entry = Tuple[float, int, str]
+
+
+def bayesian_score(review_count: int, rating_sum: int) -> float:
+    return (PRIOR_REVIEWS * PRIOR_RATING + rating_sum) / (PRIOR_REVIEWS + review_count)
+
+
+def region_of(latitude: Optional[float], longitude: Optional[float]) -> Optional[Region]:
+    """Tile containing a coordinate, None when either is missing."""
+    if latitude is None or longitude is None:
+        return None
+    return math.floor(latitude / REGION_DEG), math.floor(longitude / REGION_DEG)
+
+
+class _Board:
+    """Heap of place entries with lazy deletion."""
+
+    def __init__(self) -> None:
+        self._heap: List[Entry] = []
+        self._current: Dict[str, Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def load(self, entries: Iterable[Entry]) -> None:
+        self._current = {entry[2]: entry for entry in entries}
+        self._heap = list(self._current.values())
+        heapq.heapify(self._heap)
+
+    def push(self, entry: Entry) -> None:
+        """Rank a place, replacing its previous entry."""
+        # A new tuple: entries are told live from stale by identity
+        entry = (entry[0], entry[1], entry[2])
+        self._current[entry[2]] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def discard(self, place_id: str) -> None:
+        if self._current.pop(place_id, None) is not None:
+            self._compact()
+
+    def _compact(self) -> None:
+        if len(self._heap) > 2 * len(self._current) + 64:
+            self._heap = list(self._current.values())
+            heapq.heapify(self._heap)
+
+    def top(self, limit: int) -> List[Entry]:
+        heap, current = self._heap, self._current
+        best: List[Entry] = []
+        # Children of a heap node never rank before it: walk from the root
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(best) < limit:
+            entry, i = heapq.heappop(frontier)
+            if current.get(entry[2]) is entry:
+                best.append(entry)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return best
+
+
+class Leaderboard:
+    """Places ranked by Bayesian average rating, globally and per region."""
+
+    def __init__(self, places: Iterable[Tuple[str, int, int, float, float]] = ()) -> None:
+        """``places``: (id, review_count, rating_sum, latitude, longitude)."""
+        self._lock = threading.Lock()
+        self._global = _Board()
+        self._boards: Dict[Region, _Board] = {}
+        # place id -> (entry or None without reviews, region)
+        self._places: Dict[str, Tuple[Optional[Entry], Optional[Region]]] = {}
+        self._build(places)
+
+    def __len__(self) -> int:
+        return len(self._global)
+
+    def _build(self, places: Iterable[Tuple[str, int, int, float, float]]) -> None:
+        entries: Dict[Optional[Region], List[Entry]] = {}
+        for place_id, review_count, rating_sum, latitude, longitude in places:
+            region = region_of(latitude, longitude)
+            entry = self._entry(place_id, review_count, rating_sum)
+            self._places[place_id] = (entry, region)
+            if entry is not None:
+                entries.setdefault(region, []).append(entry)
+        self._global.load(e for board_entries in entries.values() for e in board_entries)
+        for region, board_entries in entries.items():
+            if region is not None:
+                self._board(region).load(board_entries)
+
+    @staticmethod
+    def _entry(place_id: str, review_count: int, rating_sum: int) -> Optional[Entry]:
+        if not review_count:
+            return None
+        return (-bayesian_score(review_count, rating_sum), -review_count, place_id)
+
+    def _board(self, region: Region) -> _Board:
+        board = self._boards.get(region)
+        if board is None:
+            board = self._boards[region] = _Board()
+        return board
+
+    def _place(self, place_id: str, entry: Optional[Entry], region: Optional[Region]) -> None:
+        old_entry, old_region = self._places.get(place_id, (None, None))
+        self._places[place_id] = (entry, region)
+        if entry != old_entry:
+            self._rank(self._global, place_id, entry)
+        if region != old_region:
+            if old_region is not None:
+                self._board(old_region).discard(place_id)
+            if region is not None:
+                self._rank(self._board(region), place_id, entry)
+        elif entry != old_entry and region is not None:
+            self._rank(self._board(region), place_id, entry)
+
+    @staticmethod
+    def _rank(board: _Board, place_id: str, entry: Optional[Entry]) -> None:
+        if entry is None:
+            board.discard(place_id)
+        else:
+            board.push(entry)
+
+    def set_reviews(self, place_id: str, review_count: int, rating_sum: int) -> None:
+        """Record the review aggregates a place now has."""
+        with self._lock:
+            region = self._places.get(place_id, (None, None))[1]
+            self._place(place_id, self._entry(place_id, review_count, rating_sum), region)
+
+    def locate(self, place_id: str, latitude: Optional[float],
+               longitude: Optional[float]) -> None:
+        """Record where a new or updated place is."""
+        with self._lock:
+            entry = self._places.get(place_id, (None, None))[0]
+            self._place(place_id, entry, region_of(latitude, longitude))
+
+    def remove(self, place_id: str) -> None:
+        """Forget a deleted place."""
+        with self._lock:
+            if place_id in self._places:
+                self._place(place_id, None, None)
+                del self._places[place_id]
+
+    def top(self, limit: int, region: Optional[Region] = None) -> List[Tuple[str, float]]:
+        """(id, score) of the ``limit`` best places, of ``region`` or of all."""
+        with self._lock:
+            board = self._global if region is None else self._boards.get(region)
+            if board is None:
+                return []
+            return [(entry[2], -entry[0]) for entry in board.top(limit)]
@@ -0,0 +1,179 @@
+"""In-process index kept in step with the database.
+
+The in-process indexes (title suggestions, amenity bitmaps, similar
+places, leaderboard) are copies of a few tables. ``LiveIndex`` holds the
+current copy and replaces it with a fresh build made on a background
+thread and swapped in whole, so a request never waits for a build.
+
+How current the copy is comes from the table versions of
+app.persistence.versions:
+
+* a build records the versions it read the tables at;
+* the facade applies the writes of its own process (``apply``) along with
+  the versions their commit moved the tables between: a copy at the first
+  moves to the second;
+* anything else (another process, raw SQL) leaves the copy behind the
+  database, and the next read schedules a rebuild, at most one every
+  ``interval`` seconds.
+
+``current()`` only hands out a copy that provably matches the database,
+for answers that must be exact; ``latest()`` hands out the copy as it is.
+Without version counters (other databases) no copy is provably current and
+``latest()`` rebuilds every ``interval`` seconds.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple
+
+REFRESH_INTERVAL = 30.0
+
+logger = logging.getLogger(__name__)
+
+Versions = Tuple[int, ...]
+# (versions before, versions after) of one commit
+Span = Tuple[Versions, Versions]
+
+
+def _included(span: Optional[Span], version: Optional[Versions]) -> bool:
+    """Whether a copy at ``version`` already holds the commit of ``span``."""
+    if span is None or version is None:
+        return False
+    return all(after <= read for before, after, read in zip(*span, version)
+               if before != after)
+
+
+class LiveIndex:
+    """The latest build of an index, its version and the refresh policy.
+
+    ``build()`` returns a new index and the versions (table name ->
+    counter) it was read at; ``versions()`` the current ones; ``spawn(fn)``
+    runs ``fn`` on another thread.
+    """
+
+    def __init__(self, tables: Sequence[str],
+                 build: Callable[[], Tuple[Any, Optional[Mapping[str, int]]]],
+                 versions: Callable[[], Optional[Mapping[str, int]]],
+                 spawn: Callable[[Callable[[], None]], None],
+                 interval: float = REFRESH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.tables = tuple(tables)
+        self._build = build
+        self._versions = versions
+        self._spawn = spawn
+        self._interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._built = threading.Condition(self._lock)
+        self._index: Any = None
+        self._version: Optional[Versions] = None
+        # Span of the commit that moved the version last: its other changes
+        # still apply
+        self._moved_by: Optional[Span] = None
+        self._building = False
+        self._started_at: Optional[float] = None
+        # Writes applied while a build runs, replayed on its result
+        self._journal: List[Tuple[Optional[Callable[[Any], None]], Optional[Span]]] = []
+
+    def _pick(self, versions: Optional[Mapping[str, Any]]) -> Optional[Tuple[Any, ...]]:
+        if versions is None or any(table not in versions for table in self.tables):
+            return None
+        return tuple(versions[table] for table in self.tables)
+
+    def _span(self, committed: Optional[Mapping[str, Tuple[int, int]]]) -> Optional[Span]:
+        picked = self._pick(committed)
+        return None if picked is None else tuple(zip(*picked))
+
+    def latest(self) -> Any:
+        """The index as it is, None before the first build."""
+        return self._read()[0]
+
+    def current(self) -> Any:
+        """The index if it matches the database, else None."""
+        index, current = self._read()
+        return index if current else None
+
+    def _read(self) -> Tuple[Any, bool]:
+        version = self._pick(self._versions())
+        with self._lock:
+            index, mine = self._index, self._version
+            behind = (index is None or version is None or mine is None
+                      or any(theirs > ours for theirs, ours in zip(version, mine)))
+            if behind:
+                self._schedule()
+        return index, index is not None and version is not None and version == mine
+
+    def _schedule(self) -> None:
+        if self._building:
+            return
+        if (self._index is not None and self._started_at is not None
+                and self._clock() - self._started_at < self._interval):
+            return
+        self._start()
+        self._spawn(self._run)
+
+    def _start(self) -> None:
+        self._building, self._started_at, self._journal = True, self._clock(), []
+
+    def refresh(self) -> None:
+        """Build now and wait for the result (start-up warm-up, tests)."""
+        with self._lock:
+            while self._building:
+                self._built.wait()
+            self._start()
+        self._spawn(self._run)
+        self.wait()
+
+    def wait(self) -> None:
+        """Wait for the build under way, if any."""
+        with self._lock:
+            while self._building:
+                self._built.wait()
+
+    def _run(self) -> None:
+        index = versions = None
+        try:
+            index, versions = self._build()
+        except Exception:
+            logger.exception("building the index of %s failed", ", ".join(self.tables))
+        with self._lock:
+            try:
+                if index is not None:
+                    self._index, self._version, self._moved_by = index, self._pick(versions), None
+                    for change, span in self._journal:
+                        self._apply(change, span)
+            finally:
+                self._building, self._journal = False, []
+                self._built.notify_all()
+
+    def apply(self, change: Optional[Callable[[Any], None]],
+              committed: Optional[Mapping[str, Tuple[int, int]]]) -> None:
+        """Apply ``change(index)``, a committed write of this process, and
+        move the version along: ``committed`` maps table names to the
+        versions the commit moved them between (None when unknown). With no
+        ``change``, the commit left this index's data alone."""
+        span = self._span(committed)
+        with self._lock:
+            if self._index is not None:
+                self._apply(change, span)
+            if self._building:
+                self._journal.append((change, span))
+
+    def _apply(self, change: Optional[Callable[[Any], None]], span: Optional[Span]) -> None:
+        moves = False
+        if span is None or span != self._moved_by:
+            if _included(span, self._version):
+                return  # read by the build after the commit
+            moves = self._version is not None and span is not None and self._version in span
+        if change is not None:
+            change(self._index)
+        if moves:
+            self._version, self._moved_by = span[1], span
+
+    def clear(self) -> None:
+        """Drop the index; the next read schedules a build."""
+        with self._lock:
+            while self._building:
+                self._built.wait()
+            self._index = self._version = self._moved_by = self._started_at = None
+
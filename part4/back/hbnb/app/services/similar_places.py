@@ -0,0 +1,222 @@
+"""In-process matrix of places for "similar places" recommendations.
+
+Every place is a row of NumPy arrays: its amenities as a bitset (one bit
+per amenity, 64 per uint64 word), its price and its position as a unit
+vector. Scoring one place against all the others is then a handful of
+vectorized passes (AND + popcount for the amenity overlap, a subtraction
+for the prices, the chord between unit vectors for the great-circle
+distance, five times cheaper than haversine on latitudes and longitudes)
+instead of a Python loop over ``Place.amenities``.
+
+The similarity of two places is a weighted sum of three scores in [0, 1]:
+
+* amenities: Jaccard index of the two amenity sets;
+* price: 1 - |p1 - p2| / max(p1, p2);
+* distance: exp(-d / DISTANCE_SCALE_KM).
+
+A missing price or coordinate scores 0 on that criterion.
+
+The matrix is built from the places and their amenities, then kept up to
+date row by row by the facade after each committed place write;
+app.services.live_index rebuilds it after writes from elsewhere.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.persistence.geo import EARTH_RADIUS_KM
+
+AMENITY_WEIGHT = 0.5
+PRICE_WEIGHT = 0.25
+DISTANCE_WEIGHT = 0.25
+# Distance at which the distance score falls to 1/e
+DISTANCE_SCALE_KM = 50.0
+
+
+def _number(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _unit_vectors(lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """(x, y, z) of points on the unit sphere, NaN for missing coordinates."""
+    phi, lam = np.radians(lats), np.radians(lngs)
+    return np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)
+
+
+class SimilarPlaceIndex:
+    """Amenity bitsets, prices and coordinates of every place, one row each."""
+
+    def __init__(self, places: Iterable[Tuple[str, float, float, float]] = (),
+                 amenities: Iterable[Tuple[str, str]] = ()) -> None:
+        """``places``: (id, price, latitude, longitude); ``amenities``:
+        (place id, amenity id)."""
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._bits = None
+        self._allocate(0, 1)
+        self._build(places, amenities)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _allocate(self, capacity: int, words: int) -> None:
+        """(Re)size the arrays, keeping the rows already filled."""
+        old = self._bits
+        bits = np.zeros((capacity, words), dtype=np.uint64)
+        arrays = {"_counts": np.zeros(capacity, dtype=np.int32),
+                  "_alive": np.zeros(capacity, dtype=bool),
+                  "_price": np.full(capacity, np.nan),
+                  "_x": np.full(capacity, np.nan),
+                  "_y": np.full(capacity, np.nan),
+                  "_z": np.full(capacity, np.nan)}
+        if old is not None:
+            rows = min(len(old), capacity)
+            bits[:rows, :old.shape[1]] = old[:rows]
+            for name, array in arrays.items():
+                array[:rows] = getattr(self, name)[:rows]
+        self._bits = bits
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def _position(self, amenity_id: str) -> int:
+        position = self._positions.get(amenity_id)
+        if position is None:
+            position = self._positions[amenity_id] = len(self._positions)
+            if position >= 64 * self._bits.shape[1]:
+                self._allocate(len(self._bits), self._bits.shape[1] * 2)
+        return position
+
+    def _row(self, place_id: str) -> int:
+        row = self._rows.get(place_id)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+                self._ids[row] = place_id
+            else:
+                row = len(self._ids)
+                self._ids.append(place_id)
+                if row >= len(self._bits):
+                    self._allocate(max(2 * len(self._bits), 1024), self._bits.shape[1])
+            self._rows[place_id] = row
+        return row
+
+    def _build(self, places: Iterable[Tuple[str, float, float, float]],
+               amenities: Iterable[Tuple[str, str]]) -> None:
+        prices, lats, lngs = [], [], []
+        for place_id, price, lat, lng in places:
+            self._rows[place_id] = len(self._ids)
+            self._ids.append(place_id)
+            prices.append(_number(price))
+            lats.append(_number(lat))
+            lngs.append(_number(lng))
+        rows, positions = [], []
+        for place_id, amenity_id in amenities:
+            row = self._rows.get(place_id)
+            if row is not None:
+                rows.append(row)
+                positions.append(self._position(amenity_id))
+        words = max(1, -(-len(self._positions) // 64))
+        self._allocate(len(self._ids), words)
+        self._price[:] = prices
+        self._x[:], self._y[:], self._z[:] = _unit_vectors(np.array(lats), np.array(lngs))
+        self._alive[:] = True
+        if rows:
+            rows = np.asarray(rows, dtype=np.int64)
+            positions = np.asarray(positions, dtype=np.uint64)
+            np.bitwise_or.at(self._bits, (rows, (positions >> np.uint64(6)).astype(np.int64)),
+                             np.uint64(1) << (positions & np.uint64(63)))
+            self._counts[:] = np.bitwise_count(self._bits).sum(axis=1)
+
+    def _bitset(self, amenity_ids: Iterable[str], create: bool) -> np.ndarray:
+        """Bitset row of the given amenities; without ``create``, amenities
+        no place has yet are left out."""
+        positions = [self._position(a) if create else self._positions.get(a)
+                     for a in amenity_ids]
+        bits = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        for position in positions:
+            if position is not None:
+                bits[position >> 6] |= np.uint64(1) << np.uint64(position & 63)
+        return bits
+
+    def set(self, place_id: str, price: Optional[float], latitude: Optional[float],
+            longitude: Optional[float], amenity_ids: Iterable[str]) -> None:
+        """Record the current state of a new or updated place."""
+        with self._lock:
+            amenity_ids = set(amenity_ids)
+            bits = self._bitset(amenity_ids, create=True)
+            row = self._row(place_id)
+            self._bits[row] = bits
+            self._counts[row] = len(amenity_ids)
+            self._price[row] = _number(price)
+            vector = _unit_vectors(np.array([_number(latitude)]), np.array([_number(longitude)]))
+            self._x[row], self._y[row], self._z[row] = (c[0] for c in vector)
+            self._alive[row] = True
+
+    def remove(self, place_id: str) -> None:
+        """Forget a deleted place."""
+        with self._lock:
+            row = self._rows.pop(place_id, None)
+            if row is None:
+                return
+            self._ids[row] = None
+            self._alive[row] = False
+            self._bits[row] = 0
+            self._free_rows.append(row)
+
+    def remove_amenity(self, amenity_id: str) -> None:
+        """Forget a deleted amenity. Its bit position is not reused."""
+        with self._lock:
+            position = self._positions.get(amenity_id)
+            if position is None:
+                return
+            word, bit = position >> 6, np.uint64(1) << np.uint64(position & 63)
+            had = (self._bits[:, word] & bit) != 0
+            self._bits[:, word] &= ~bit
+            self._counts[had] -= 1
+
+    def similar(self, price: Optional[float], latitude: Optional[float],
+                longitude: Optional[float], amenity_ids: Iterable[str],
+                limit: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """(id, score) of the ``limit`` places most similar to one with the
+        given attributes, best first. ``exclude`` is left out (the place
+        itself)."""
+        amenity_ids = set(amenity_ids)
+        with self._lock:
+            if not self._ids:
+                return []
+            size = len(self._ids)
+            bits = self._bitset(amenity_ids, create=False)
+            shared = np.bitwise_count(self._bits[:size] & bits).sum(axis=1)
+            union = self._counts[:size] + len(amenity_ids) - shared
+            scores = AMENITY_WEIGHT * np.divide(shared, union, out=np.zeros(size),
+                                                where=union > 0)
+            if price is not None:
+                prices = self._price[:size]
+                highest = np.maximum(prices, price)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    closeness = 1 - np.abs(prices - price) / highest
+                closeness[highest == 0] = 1.0  # both free
+                scores += PRICE_WEIGHT * np.nan_to_num(closeness, nan=0.0)
+            if latitude is not None and longitude is not None:
+                x, y, z = (c[0] for c in _unit_vectors(np.array([latitude]),
+                                                      np.array([longitude])))
+                chords = np.sqrt((self._x[:size] - x) ** 2 + (self._y[:size] - y) ** 2
+                                 + (self._z[:size] - z) ** 2)
+                distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chords / 2, 1.0))
+                scores += DISTANCE_WEIGHT * np.nan_to_num(
+                    np.exp(-distances / DISTANCE_SCALE_KM), nan=0.0)
+            scores[~self._alive[:size]] = -np.inf
+            row = self._rows.get(exclude)
+            if row is not None:
+                scores[row] = -np.inf
+            limit = min(limit, len(self._rows) - (row is not None))
+            if limit <= 0:
+                return []
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            ids = self._ids
+            return [(ids[i], float(scores[i])) for i in best]
@@ -0,0 +1,234 @@
+"""In-process index of place titles for as-you-type suggestions.
+
+Titles are split into words with the full-text tokenizer (see
+app.persistence.search). The last word of a query matches as a prefix and
+the others as whole words; every word may be misspelled (one typo from 5
+letters, two from 9). Typo candidates come from a trigram index over the
+vocabulary, which is far smaller than the titles, and are confirmed with
+an edit distance.
+
+Each word's postings are kept sorted by title rank, shortest title first,
+so the best suggestions come out of a merge of the matching postings and
+the scan stops as soon as nothing better can follow. A query costs
+O(limit) postings in the usual case instead of a pass over every title.
+
+The index is built from (id, title) pairs, then kept up to date by the
+facade (``add`` / ``remove`` after each committed place write);
+app.services.live_index rebuilds it after writes from elsewhere.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.persistence.search import tokenize
+
+# (title length, title, id): suggestion order, unique per place
+Rank = Tuple[int, str, str]
+
+
+def max_typos(word: str) -> int:
+    """Edits tolerated in a query word of this length."""
+    return 0 if len(word) < 5 else 1 if len(word) < 9 else 2
+
+
+def _grams(word: str, prefix: bool = False) -> Set[str]:
+    padded = "^" + word + ("" if prefix else "$")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(query: str, word: str, limit: int, prefix: bool = False) -> Optional[int]:
+    """Optimal string alignment distance between ``query`` and ``word``, or
+    with ``prefix`` between ``query`` and the closest prefix of ``word``.
+    None when it exceeds ``limit``.
+
+    Only the cells within ``limit`` of the diagonal can stay under the
+    limit, so only that band of the matrix is computed.
+    """
+    if prefix:
+        word = word[:len(query) + limit]
+    if abs(len(query) - len(word)) > limit:
+        return None
+    if limit == 1:
+        return _one_edit(query, word, prefix)
+    over = limit + 1
+    previous2: List[int] = []
+    previous = [min(j, over) for j in range(len(word) + 1)]
+    for i in range(1, len(query) + 1):
+        current = [over] * (len(word) + 1)
+        current[0] = min(i, over)
+        for j in range(max(1, i - limit), min(len(word), i + limit) + 1):
+            cost = query[i - 1] != word[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and query[i - 1] == word[j - 2]
+                    and query[i - 2] == word[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = min(value, over)
+        if min(current) > limit:
+            return None
+        previous2, previous = previous, current
+    distance = min(previous) if prefix else previous[-1]
+    return distance if distance <= limit else None
+
+
+def _one_edit(query: str, word: str, prefix: bool) -> Optional[int]:
+    """edit_distance for limit=1 with a few slice comparisons: past the first
+    mismatch, the rest must line up after one substitution, deletion,
+    insertion or transposition."""
+    if word.startswith(query) if prefix else word == query:
+        return 0
+    n = len(query)
+    i = 0
+    while i < n and i < len(word) and query[i] == word[i]:
+        i += 1
+
+    def aligned(length: int, query_from: int, word_from: int) -> bool:
+        # word (or its prefix of ``length`` letters) against the query
+        if len(word) < length if prefix else len(word) != length:
+            return False
+        return query[query_from:] == word[word_from:length]
+
+    if (aligned(n, i + 1, i + 1) or aligned(n - 1, i + 1, i)
+            or aligned(n + 1, i, i + 1)):
+        return 1
+    if (i + 1 < n and word[i + 1:i + 2] == query[i] and word[i:i + 1] == query[i + 1]
+            and aligned(n, i + 2, i + 2)):
+        return 1
+    return None
+
+
+class TitleIndex:
+    """Typo-tolerant prefix index of place titles."""
+
+    def __init__(self, titles: Iterable[Tuple[str, str]] = ()) -> None:
+        self._lock = threading.Lock()
+        self._ranks: Dict[str, Rank] = {}
+        # word -> ids of the titles containing it, in rank order
+        self._postings: Dict[str, List[str]] = {}
+        self._vocabulary: List[str] = []
+        # trigram -> words containing it
+        self._grams: Dict[str, Set[str]] = {}
+        self._build(titles)
+
+    def __len__(self) -> int:
+        return len(self._ranks)
+
+    def _build(self, titles: Iterable[Tuple[str, str]]) -> None:
+        for place_id, title in titles:
+            self._ranks[place_id] = (len(title), title, place_id)
+            for word in set(tokenize(title)):
+                self._postings.setdefault(word, []).append(place_id)
+        for postings in self._postings.values():
+            postings.sort(key=self._ranks.__getitem__)
+        self._vocabulary = sorted(self._postings)
+        for word in self._vocabulary:
+            for gram in _grams(word):
+                self._grams.setdefault(gram, set()).add(word)
+
+    def add(self, place_id: str, title: str) -> None:
+        """Index a new title, or the new title of an indexed place."""
+        with self._lock:
+            self._remove(place_id)
+            self._ranks[place_id] = (len(title), title, place_id)
+            for word in set(tokenize(title)):
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = []
+                    insort(self._vocabulary, word)
+                    for gram in _grams(word):
+                        self._grams.setdefault(gram, set()).add(word)
+                insort(postings, place_id, key=self._ranks.__getitem__)
+
+    def remove(self, place_id: str) -> None:
+        with self._lock:
+            self._remove(place_id)
+
+    def _remove(self, place_id: str) -> None:
+        rank = self._ranks.get(place_id)
+        if rank is None:
+            return
+        for word in set(tokenize(rank[1])):
+            postings = self._postings[word]
+            del postings[bisect_left(postings, rank, key=self._ranks.__getitem__)]
+            if not postings:
+                del self._postings[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+                for gram in _grams(word):
+                    words = self._grams[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._grams[gram]
+        del self._ranks[place_id]
+
+    def _expansions(self, query: str, prefix: bool) -> List[Tuple[int, str]]:
+        """(typos, word) for every vocabulary word ``query`` may stand for."""
+        if prefix:
+            start = end = bisect_left(self._vocabulary, query)
+            while end < len(self._vocabulary) and self._vocabulary[end].startswith(query):
+                end += 1
+            exact = self._vocabulary[start:end]
+        else:
+            exact = [query] if query in self._postings else []
+        found = [(0, word) for word in exact]
+        limit = max_typos(query)
+        if not limit:
+            return found
+        grams = _grams(query, prefix)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for word in self._grams.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        # One edit changes at most four trigrams (a transposition)
+        needed = max(1, len(grams) - 4 * limit)
+        skip = set(exact)
+        shortest = len(query) - limit
+        longest = float("inf") if prefix else len(query) + limit
+        for word, count in shared.items():
+            if count >= needed and shortest <= len(word) <= longest and word not in skip:
+                distance = edit_distance(query, word, limit, prefix)
+                if distance is not None:
+                    found.append((distance, word))
+        return found
+
+    def suggest(self, text: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """(id, title) of the best ``limit`` titles matching ``text``: fewest
+        typos first, then shortest title."""
+        words = tokenize(text)
+        if not words:
+            return []
+        # Trailing space: the last word is complete
+        last_is_prefix = not text[-1:].isspace()
+        queries = [(word, last_is_prefix and i == len(words) - 1)
+                   for i, word in enumerate(words)]
+        with self._lock:
+            expansions = [self._expansions(word, prefix) for word, prefix in queries]
+            if not all(expansions):
+                return []
+            # Stream the query word with the fewest postings; check the others
+            sizes = [sum(len(self._postings[w]) for _, w in e) for e in expansions]
+            driver = sizes.index(min(sizes))
+            # word -> typos, for each of the other query words
+            others = [{word: typos for typos, word in found}
+                      for i, found in enumerate(expansions) if i != driver]
+            ranks = self._ranks
+            stream = heapq.merge(*(((typos, ranks[i]) for i in self._postings[word])
+                                   for typos, word in expansions[driver]))
+            best: List[Tuple[int, Rank]] = []
+            seen = set()
+            for typos, rank in stream:
+                if len(best) == limit and (typos, rank) >= best[-1]:
+                    break  # every later candidate ranks after the current last
+                if rank[2] in seen:
+                    continue
+                seen.add(rank[2])
+                title_words = tokenize(rank[1])
+                for allowed in others:
+                    extra = min((allowed[w] for w in title_words if w in allowed),
+                                default=None)
+                    if extra is None:
+                        break
+                    typos += extra
+                else:
+                    insort(best, (typos, rank))
+                    del best[limit:]
+            return [(rank[2], rank[1]) for _, rank in best]
@@ -0,0 +1,582 @@
+"""Micro-benchmarks for the HBnB persistence layer.
+
+Usage: python bench.py [name ...]
+
+Benchmarks that need a database run against the in-memory ``testing``
+config so they never touch the files under instance/.
+"""
+import random
+import sys
+import time
+import types
+import uuid
+
+from app import create_app, db
+
+
+def _timed(fn, repeat=20):
+    """Return the median wall time of ``fn()`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _seed_places(owner_id, count, rng=None):
+    """Insert ``count`` places directly, bypassing the facade.
+
+    With ``rng`` the places get random coordinates (and their grid cell).
+    """
+    from app.models.place import Place
+    from app.persistence.geo import grid_cell
+    rows = []
+    for _ in range(count):
+        row = {
+            "id": str(uuid.uuid4()),
+            "title": f"seed-{uuid.uuid4().hex}",
+            "price": 100.0,
+            "owner_id": owner_id,
+        }
+        if rng:
+            lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            row.update(latitude=lat, longitude=lng, geo_cell=grid_cell(lat, lng))
+        rows.append(row)
+    db.session.execute(Place.__table__.insert(), rows)
+    db.session.commit()
+
+
+def bench_create_place(sizes=(1_000, 10_000, 100_000)):
+    """Latency of facade.create_place as the places table grows."""
+    from app.services import facade
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        seeded = 0
+        for size in sizes:
+            _seed_places(owner.id, size - seeded)
+            seeded = size
+            ms = _timed(lambda: facade.create_place({
+                "title": f"bench-{uuid.uuid4().hex}",
+                "price": 80.0,
+                "owner_id": owner.id,
+            }))
+            seeded += 20
+            print(f"create_place  rows={size:>8}  median={ms:.3f} ms")
+        db.drop_all()
+
+
+def bench_attribute_lookup(sizes=(10_000, 100_000, 1_000_000)):
+    """InMemoryRepository.get_by_attribute: linear scan vs hash index."""
+    from app.persistence.repository import InMemoryRepository
+
+    for size in sizes:
+        scan = InMemoryRepository()
+        indexed = InMemoryRepository(indexed_attributes=("email",))
+        emails = []
+        for i in range(size):
+            obj = types.SimpleNamespace(id=str(i), email=f"user{i}@example.com")
+            scan.add(obj)
+            indexed.add(obj)
+            emails.append(obj.email)
+        probe = random.Random(size).choice
+        scan_ms = _timed(lambda: scan.get_by_attribute("email", probe(emails)), repeat=5)
+        index_ms = _timed(lambda: indexed.get_by_attribute("email", probe(emails)))
+        print(f"get_by_attribute  objects={size:>8}  "
+              f"scan={scan_ms:.3f} ms  index={index_ms:.4f} ms")
+
+
+def bench_nearby(sizes=(100_000, 1_000_000), radius_km=25):
+    """facade.get_nearby_places over randomly spread places."""
+    from app.services import facade
+
+    app = create_app('testing')
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        seeded = 0
+        for size in sizes:
+            _seed_places(owner.id, size - seeded, rng)
+            seeded = size
+            probe = random.Random(size)
+            ms = _timed(lambda: facade.get_nearby_places(
+                probe.uniform(-60, 70), probe.uniform(-180, 180), radius_km))
+            print(f"get_nearby_places  rows={size:>8}  radius={radius_km} km  "
+                  f"median={ms:.3f} ms")
+        db.drop_all()
+
+
+def bench_bulk_import(sizes=(10_000, 100_000)):
+    """facade.bulk_create_places, as used by POST /api/v1/places/bulk."""
+    from app.services import facade
+
+    app = create_app('testing')
+    rng = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        for size in sizes:
+            rows = [(i, {
+                "title": f"bulk-{uuid.uuid4().hex}",
+                "price": 100.0,
+                "latitude": rng.uniform(-60, 70),
+                "longitude": rng.uniform(-180, 180),
+                "owner_id": owner.id,
+            }) for i in range(size)]
+            start = time.perf_counter()
+            created, errors = facade.bulk_create_places(iter(rows))
+            elapsed = time.perf_counter() - start
+            print(f"bulk_create_places  rows={created:>8}  errors={len(errors)}  "
+                  f"total={elapsed:.2f} s  ({created / elapsed:,.0f} rows/s)")
+        db.drop_all()
+
+
+def bench_stream_export(sizes=(10_000, 100_000)):
+    """GET /api/v1/places/?stream=true: time and peak Python memory."""
+    import tracemalloc
+    from app.services import facade
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        seeded = 0
+        client = app.test_client()
+        for size in sizes:
+            _seed_places(owner.id, size - seeded)
+            seeded = size
+            for accept in ("application/json", "application/x-ndjson"):
+                def export():
+                    response = client.get("/api/v1/places/?stream=true",
+                                          headers={"Accept": accept})
+                    return sum(len(chunk) for chunk in response.response)
+                start = time.perf_counter()
+                written = export()
+                elapsed = time.perf_counter() - start
+                # Second pass under tracemalloc, which slows it down
+                tracemalloc.start()
+                export()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"stream {accept:<22} rows={size:>8}  {written / 1e6:7.1f} MB  "
+                      f"total={elapsed:.2f} s  peak={peak / 1e6:.1f} MB")
+        db.drop_all()
+
+
+def bench_login(costs=(10, 12), threads=(1, 4), logins=40):
+    """POST /api/v1/auth/login throughput by bcrypt cost and client threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services import facade
+
+    for cost in costs:
+        app = create_app('testing')
+        app.config["BCRYPT_LOG_ROUNDS"] = cost
+        with app.app_context():
+            db.create_all()
+            emails = [f"login{i}@example.com" for i in range(logins)]
+            for email in emails:
+                facade.create_user({"first_name": "Bench", "last_name": "Login",
+                                    "email": email, "password": "benchmark"})
+
+        def login(email):
+            response = app.test_client().post(
+                "/api/v1/auth/login", json={"email": email, "password": "benchmark"})
+            assert response.status_code == 200
+
+        for workers in threads:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(login, emails))
+            elapsed = time.perf_counter() - start
+            print(f"login  cost={cost:>2}  threads={workers}  "
+                  f"{logins / elapsed:7.1f} logins/s  ({elapsed / logins * 1000:.1f} ms each)")
+        with app.app_context():
+            db.drop_all()
+
+
+def bench_sqlite_load(readers=4, writers=2, seconds=5.0):
+    """Mixed read/write HTTP load on a SQLite file, with and without SQLITE_PRAGMAS."""
+    import os
+    import tempfile
+    import threading
+    from config import CONFIG_MAP, DevelopmentConfig
+    from app.services import facade
+
+    for label, pragmas in (("default journal", {}), ("tuned (WAL)", None)):
+        with tempfile.TemporaryDirectory() as tmp:
+            class LoadConfig(DevelopmentConfig):
+                DEBUG = False
+                SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+                BCRYPT_LOG_ROUNDS = 4
+                SQLITE_PRAGMAS = DevelopmentConfig.SQLITE_PRAGMAS if pragmas is None else pragmas
+            CONFIG_MAP["bench_load"] = LoadConfig
+            app = create_app("bench_load")
+            with app.app_context():
+                db.create_all()
+                facade.create_user({"first_name": "Bench", "last_name": "Load",
+                                    "email": "load@example.com", "password": "benchmark"})
+                _seed_places(facade.get_user_by_email("load@example.com").id, 1_000)
+            token = app.test_client().post("/api/v1/auth/login", json={
+                "email": "load@example.com", "password": "benchmark"}).get_json()["access_token"]
+
+            counts = {"read": 0, "write": 0, "error": 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def run(kind):
+                client = app.test_client()
+                headers = {"Authorization": f"Bearer {token}"}
+                while time.perf_counter() < deadline:
+                    if kind == "read":
+                        status = client.get("/api/v1/places/?limit=20").status_code
+                    else:
+                        status = client.post("/api/v1/places/", headers=headers, json={
+                            "title": f"load-{uuid.uuid4().hex}", "price": 50.0,
+                            "latitude": 10.0, "longitude": 10.0}).status_code
+                    with lock:
+                        counts[kind if status < 400 else "error"] += 1
+
+            threads = ([threading.Thread(target=run, args=("read",)) for _ in range(readers)]
+                       + [threading.Thread(target=run, args=("write",)) for _ in range(writers)])
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            with app.app_context():
+                db.engine.dispose()
+            print(f"sqlite_load  {label:<15}  reads={counts['read'] / seconds:7.1f}/s  "
+                  f"writes={counts['write'] / seconds:6.1f}/s  errors={counts['error']}")
+
+
+def bench_json_output(rows=200):
+    """GET /api/v1/places/?limit=200: encoder time and bytes on the wire."""
+    import json
+    from unittest import mock
+    from app.api import representations
+    from app.services import facade
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        _seed_places(owner.id, rows, random.Random(3))
+        data = app.test_client().get(f"/api/v1/places/?limit={rows}").get_json()
+
+    encoders = [("restx (DEBUG indent)", False, None), ("FAST_JSON stdlib", True, None)]
+    if representations.orjson is not None:
+        encoders.append(("FAST_JSON orjson", True, representations.orjson))
+    client = app.test_client()
+    for label, fast, orjson in encoders:
+        app.config["FAST_JSON"] = fast
+        with mock.patch.object(representations, "orjson", orjson):
+            if fast:
+                encode_ms = _timed(lambda: representations.dumps(data))
+            else:
+                encode_ms = _timed(lambda: json.dumps(data, indent=4))
+            sizes = []
+            for encoding in ("identity", "gzip"):
+                response = client.get(f"/api/v1/places/?limit={rows}",
+                                      headers={"Accept-Encoding": encoding})
+                sizes.append(len(response.data))
+        print(f"json_output  {label:<21}  encode={encode_ms:6.2f} ms  "
+              f"plain={sizes[0]:>7} B  gzip={sizes[1]:>6} B")
+    with app.app_context():
+        db.drop_all()
+
+
+_WORDS = ("sea view cozy loft garden pool studio quiet central luxury apartment villa "
+          "beach mountain cabin lake river forest city downtown modern rustic family "
+          "terrace balcony harbour historic sunny bright spacious charming").split()
+
+
+def bench_text_search(sizes=(100_000, 1_000_000), rare_words=50_000):
+    """facade.search_places_text (FTS5) and the in-memory inverted index.
+
+    Listings mix a few common words with rarer ones (place names...): a
+    query on a rare word is the usual case, one on common words (half the
+    table matches and is ranked) the worst. The LIKE column counts the
+    matches of the first word with a table scan, the baseline for ranking.
+    """
+    from app.models.place import Place
+    from app.persistence.repository import InMemoryRepository
+    from app.services import facade
+
+    app = create_app('testing')
+    rng = random.Random(21)
+    rare = ["".join(rng.choices("bcdfghjklmnprstvz", k=3)) + "".join(rng.choices("aeiou", k=1))
+            + "".join(rng.choices("bcdfghjklmnprstvz", k=2)) for _ in range(rare_words)]
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        memory = InMemoryRepository(text_attributes=Place.__fts__.weights)
+        seeded = 0
+        for size in sizes:
+            rows = []
+            for i in range(seeded, size):
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "title": " ".join(rng.choices(_WORDS, k=2) + rng.choices(rare, k=1))
+                             + f" {i}",
+                    "description": " ".join(rng.choices(_WORDS, k=15) + rng.choices(rare, k=3)),
+                    "price": 100.0,
+                    "owner_id": owner.id,
+                })
+            start = time.perf_counter()
+            for chunk in range(0, len(rows), 10_000):
+                db.session.execute(Place.__table__.insert(), rows[chunk:chunk + 10_000])
+            db.session.commit()
+            insert_s = time.perf_counter() - start
+            for row in rows:
+                memory.add(types.SimpleNamespace(**row))
+            seeded = size
+            print(f"text_search  rows={size:>8}  insert (FTS triggers)={insert_s:.1f} s")
+            queries = [("rare word", rare[7]), ("rare prefix", rare[7][:4]),
+                       ("two words", f"{rare[7]} {_WORDS[0]}"), ("common words", "lux apart")]
+            for label, query in queries:
+                fts_ms = _timed(lambda: facade.search_places_text(query, 20), repeat=5)
+                memory_ms = _timed(lambda: memory.search(query, 20), repeat=5)
+                like = "%" + query.split()[0] + "%"
+                scan_ms = _timed(lambda: Place.query.filter(
+                    Place.title.like(like) | Place.description.like(like)).count(), repeat=3)
+                print(f"  {label:<12} q={query!r:<15} fts5={fts_ms:8.2f} ms  "
+                      f"memory={memory_ms:8.2f} ms  LIKE scan={scan_ms:8.2f} ms")
+        db.drop_all()
+
+
+def bench_suggest(sizes=(100_000, 1_000_000), rare_words=50_000):
+    """TitleIndex.suggest (GET /api/v1/places/suggest) and its upkeep."""
+    from app.services.title_index import TitleIndex
+
+    rng = random.Random(22)
+    rare = ["".join(rng.choices("bcdfghjklmnprstvz", k=3)) + "".join(rng.choices("aeiou", k=1))
+            + "".join(rng.choices("bcdfghjklmnprstvz", k=2)) for _ in range(rare_words)]
+    word = rare[7]
+    typo = word[:2] + word[3] + word[2] + word[4:]  # two letters swapped
+    queries = [("short prefix", word[:2]), ("word prefix", word[:4]), ("typo prefix", typo[:5]),
+               ("typo", typo), ("common + prefix", f"luxury {word[:4]}"),
+               ("common prefix", "apart")]
+    for size in sizes:
+        titles = [(str(uuid.uuid4()), " ".join(rng.choices(_WORDS, k=2) + rng.choices(rare, k=2)))
+                  for _ in range(size)]
+        start = time.perf_counter()
+        index = TitleIndex(titles)
+        build_s = time.perf_counter() - start
+        print(f"suggest  titles={size:>8}  build={build_s:.1f} s")
+        for label, query in queries:
+            ms = _timed(lambda: index.suggest(query, 10), repeat=50)
+            print(f"  {label:<15} q={query!r:<16} median={ms:.3f} ms  "
+                  f"hits={len(index.suggest(query, 10))}")
+        place_id = str(uuid.uuid4())
+        add_ms = _timed(lambda: index.add(place_id, f"Luxury {word} studio"), repeat=50)
+        remove_ms = _timed(lambda: (index.remove(place_id),
+                                    index.add(place_id, f"Luxury {word} studio")), repeat=50)
+        print(f"  add/rename={add_ms:.3f} ms  remove+add={remove_ms:.3f} ms")
+
+
+def bench_amenity_filter(sizes=(100_000, 1_000_000)):
+    """GET /api/v1/places/?amenities=: EXISTS subqueries alone vs narrowed
+    first by the amenity bitmap index.
+
+    Amenities range from common (WiFi on 80% of places) to rare (Sauna on
+    0.1%); the first page of 50 is timed. A selective filter is the case
+    the index is for: EXISTS alone walks the table in page order until 50
+    places qualify.
+    """
+    from app.models.amenity import Amenity
+    from app.models.place import Place, place_amenity
+    from app.services import facade
+
+    shares = {"WiFi": 0.8, "Kitchen": 0.6, "Parking": 0.3, "Pool": 0.05,
+              "Hot tub": 0.01, "Sauna": 0.001}
+    app = create_app('testing')
+    rng = random.Random(23)
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({
+            "first_name": "Bench",
+            "last_name": "Owner",
+            "email": "bench@example.com",
+            "password": "benchmark",
+        })
+        ids = {name: facade.create_amenity({"name": name}).id for name in shares}
+        # AND of OR groups, as parsed from "?amenities=a,b|c"
+        queries = [("common AND", [[ids["WiFi"]], [ids["Kitchen"]]]),
+                   ("rare AND common", [[ids["Hot tub"]], [ids["WiFi"]]]),
+                   ("rare OR rare", [[ids["Sauna"], ids["Hot tub"]]]),
+                   ("three-way", [[ids["Pool"]], [ids["Parking"]],
+                                  [ids["Sauna"], ids["Hot tub"]]])]
+        seeded = 0
+        for size in sizes:
+            for chunk in range(seeded, size, 10_000):
+                places, links = [], []
+                for _ in range(chunk, min(chunk + 10_000, size)):
+                    place_id = str(uuid.uuid4())
+                    places.append({"id": place_id, "title": f"seed-{place_id}",
+                                   "price": 100.0, "owner_id": owner.id})
+                    links.extend({"place_id": place_id, "amenity_id": ids[name]}
+                                 for name, share in shares.items() if rng.random() < share)
+                db.session.execute(Place.__table__.insert(), places)
+                db.session.execute(place_amenity.insert(), links)
+            db.session.commit()
+            seeded = size
+            start = time.perf_counter()
+            facade.amenity_index.refresh()
+            build_s = time.perf_counter() - start
+            index = facade.amenity_index.current()
+            print(f"amenity_filter  places={size:>8}  index build={build_s:.2f} s")
+            for label, groups in queries:
+                facade.AMENITY_MATCH_LIMIT = -1  # never list: EXISTS only
+                exists_ms = _timed(lambda: facade.search_places({"amenities": groups}, 50),
+                                   repeat=5)
+                del facade.AMENITY_MATCH_LIMIT
+                bitmap_ms = _timed(lambda: facade.search_places({"amenities": groups}, 50),
+                                   repeat=5)
+                match_ms = _timed(lambda: index.match(groups), repeat=5)
+                matched = len(index.match(groups))
+                print(f"  {label:<16} matches={matched:>7}  exists={exists_ms:8.2f} ms  "
+                      f"bitmap={bitmap_ms:8.2f} ms  (match alone {match_ms:.2f} ms)")
+            place_id = places[0]["id"]
+            set_ms = _timed(lambda: index.set(
+                place_id, [ids["Sauna"]] if rng.random() < 0.5 else [ids["WiFi"]]), repeat=50)
+            print(f"  set one place's amenities={set_ms:.3f} ms")
+        db.drop_all()
+
+
+def bench_similar(sizes=(100_000, 1_000_000), amenities=40):
+    """SimilarPlaceIndex.similar (GET /api/v1/places/<id>/similar) vs the
+    same scoring as a Python loop over the places, and the matrix upkeep.
+
+    The loop runs over plain tuples already in memory, a lower bound for
+    one over Place objects and their amenities.
+    """
+    import math
+    from app.persistence.geo import EARTH_RADIUS_KM
+    from app.services.similar_places import (AMENITY_WEIGHT, DISTANCE_SCALE_KM,
+                                             DISTANCE_WEIGHT, PRICE_WEIGHT, SimilarPlaceIndex)
+
+    rng = random.Random(24)
+    amenity_ids = [str(uuid.uuid4()) for _ in range(amenities)]
+    for size in sizes:
+        places = [(str(uuid.uuid4()), rng.uniform(20, 500), rng.uniform(-60, 70),
+                   rng.uniform(-180, 180), frozenset(rng.sample(amenity_ids, rng.randint(0, 12))))
+                  for _ in range(size)]
+        _, price, lat, lng, wanted = places[0]
+        start = time.perf_counter()
+        index = SimilarPlaceIndex((p[:4] for p in places),
+                                  ((p[0], a) for p in places for a in p[4]))
+        build_s = time.perf_counter() - start
+        matrix_ms = _timed(lambda: index.similar(price, lat, lng, wanted, 10,
+                                                 exclude=places[0][0]), repeat=10)
+
+        def loop():
+            phi = math.radians(lat)
+            scores = []
+            for place_id, other_price, other_lat, other_lng, other in places[1:]:
+                union = len(wanted | other)
+                score = AMENITY_WEIGHT * (len(wanted & other) / union if union else 0.0)
+                score += PRICE_WEIGHT * (1 - abs(price - other_price) / max(price, other_price))
+                other_phi = math.radians(other_lat)
+                a = (math.sin((other_phi - phi) / 2) ** 2 + math.cos(phi) * math.cos(other_phi)
+                     * math.sin(math.radians(other_lng - lng) / 2) ** 2)
+                distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+                score += DISTANCE_WEIGHT * math.exp(-distance / DISTANCE_SCALE_KM)
+                scores.append((score, place_id))
+            return sorted(scores, reverse=True)[:10]
+        loop_ms = _timed(loop, repeat=1)
+        place_id = str(uuid.uuid4())
+        set_ms = _timed(lambda: index.set(place_id, price, lat, lng, wanted), repeat=50)
+        print(f"similar  places={size:>8}  build={build_s:.1f} s  matrix={matrix_ms:.1f} ms  "
+              f"python loop={loop_ms:.0f} ms  set one place={set_ms:.3f} ms")
+
+
+def bench_leaderboard(sizes=(100_000, 1_000_000), updates=10_000):
+    """Leaderboard (GET /api/v1/places/top): review updates and top-10 reads,
+    against ranking every place on each read."""
+    import heapq
+    from app.services.leaderboard import Leaderboard, bayesian_score, region_of
+
+    rng = random.Random(25)
+    for size in sizes:
+        places = {}
+        for _ in range(size):
+            count = rng.randint(0, 40)
+            places[str(uuid.uuid4())] = [count, count * rng.randint(1, 5),
+                                         rng.uniform(-60, 70), rng.uniform(-180, 180)]
+        start = time.perf_counter()
+        board = Leaderboard((k, *v) for k, v in places.items())
+        build_s = time.perf_counter() - start
+        ids = list(places)
+        start = time.perf_counter()
+        for _ in range(updates):
+            place_id = rng.choice(ids)
+            stats = places[place_id]
+            stats[0] += 1
+            stats[1] += rng.randint(1, 5)
+            board.set_reviews(place_id, stats[0], stats[1])
+        update_us = (time.perf_counter() - start) / updates * 1e6
+        top_ms = _timed(lambda: board.top(10), repeat=50)
+        _, _, lat, lng = places[ids[0]]
+        region_ms = _timed(lambda: board.top(10, region_of(lat, lng)), repeat=50)
+        scan_ms = _timed(lambda: heapq.nsmallest(
+            10, ((-bayesian_score(c, s), -c, k) for k, (c, s, _, _) in places.items() if c)),
+            repeat=3)
+        print(f"leaderboard  places={size:>8}  build={build_s:.1f} s  "
+              f"update={update_us:.1f} us  top10={top_ms:.3f} ms  region top10={region_ms:.3f} ms  "
+              f"full ranking={scan_ms:.0f} ms")
+
+
+BENCHMARKS = {
+    "create_place": bench_create_place,
+    "attribute_lookup": bench_attribute_lookup,
+    "nearby": bench_nearby,
+    "bulk_import": bench_bulk_import,
+    "stream_export": bench_stream_export,
+    "login": bench_login,
+    "sqlite_load": bench_sqlite_load,
+    "json_output": bench_json_output,
+    "text_search": bench_text_search,
+    "suggest": bench_suggest,
+    "amenity_filter": bench_amenity_filter,
+    "similar": bench_similar,
+    "leaderboard": bench_leaderboard,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
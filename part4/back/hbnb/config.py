@@ -5,19 +5,58 @@ class Config:
     DEBUG = False
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # sans effet si tu n'utilises pas SQLAlchemy
+    BULK_CHUNK_SIZE = 1000  # rows per INSERT in the /bulk import endpoints
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))  # cost of new password hashes
+    PASSWORD_HASH_CONCURRENCY = None  # password hashes running at once; None = one per CPU
+    # Test connections before use, replace them after 30 min
+    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True, "pool_recycle": 1800}
+    # Compact JSON bodies, encoded by orjson when installed (app/api/representations.py)
+    FAST_JSON = False
+    # gzip JSON bodies of at least this many bytes when the client accepts it
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    # Cache-Control of the entity GETs, by namespace (see app/api/v1/http_cache.py)
+    CACHE_CONTROL = {
+        "users": "private, no-cache",
+        "places": "public, max-age=60",
+        "reviews": "public, max-age=60",
+        "amenities": "public, max-age=300",
+    }
+    # Repository reads go to the replica bind when set (see app/persistence/replica.py)
+    SQLALCHEMY_BINDS = ({'replica': os.environ['DATABASE_REPLICA_URL']}
+                        if os.getenv('DATABASE_REPLICA_URL') else {})
+    # Run on every new SQLite connection (see app/persistence/engine.py)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 5000,  # ms
+    }
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS,
+                                     pool_size=5, max_overflow=10)
     SQLALCHEMY_DATABASE_URI = 'sqlite:////Users/omarrouigui/Documents/Holberton/holbertonschool-hbnb/part4/back/hbnb/instance/hbnb.db'  # Absolute path
 
 class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # A single shared connection (StaticPool): no pool sizing
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    BCRYPT_LOG_ROUNDS = 4  # the minimum: keep test fixtures fast
 
 class ProductionConfig(Config):
     DEBUG = False
+    FAST_JSON = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_ENGINE_OPTIONS = dict(
+        Config.SQLALCHEMY_ENGINE_OPTIONS,
+        pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        pool_timeout=30,
+    )
 
 CONFIG_MAP = {
     'development': DevelopmentConfig,
@@ -1,10 +1,25 @@
 from app import create_app, db
+from app.persistence.migrations import upgrade_columns
+from app.persistence.replica import REPLICA_BIND, Replicator, replicate
+from app.persistence.search import create_indexes
+from app.persistence.versions import create_counters
+from app.services import facade
 from flask_cors import CORS
 
 app = create_app()
-CORS(app)  # Allow all origins for development
+CORS(app, expose_headers=["X-Next-Cursor", "Link", "ETag"])  # Allow all origins for development
 
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
+        upgrade_columns(db.engine)
+        create_indexes(db.engine)
+        create_counters(db.engine)
+        replica = db.engines.get(REPLICA_BIND)
+        if replica is not None and replica.dialect.name == "sqlite":
+            # Local stand-in for replication: copy the primary file every second
+            replicate(db.engine, replica)
+            Replicator(db.engine, replica).start()
+        # Build the in-process indexes before serving the first request
+        facade.refresh_indexes()
     app.run(debug=True)
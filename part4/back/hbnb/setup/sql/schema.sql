@@ -5,6 +5,7 @@
 DROP TABLE IF EXISTS place_amenity;
 DROP TABLE IF EXISTS reviews;
 DROP TABLE IF EXISTS amenities;
+DROP TABLE IF EXISTS places_fts;
 DROP TABLE IF EXISTS places;
 DROP TABLE IF EXISTS users;
 
@@ -22,6 +23,8 @@ CREATE TABLE users (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_users_created_at ON users (created_at);
+
 -- -----------------------------
 -- Place Table
 -- -----------------------------
@@ -33,11 +36,42 @@ CREATE TABLE places (
     latitude FLOAT,
     longitude FLOAT,
     owner_id CHAR(36),
+    geo_cell INTEGER,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id)
 );
 
+CREATE INDEX ix_places_title ON places (title);
+CREATE INDEX ix_places_created_at ON places (created_at);
+CREATE INDEX ix_places_price ON places (price);
+CREATE INDEX ix_places_latitude_longitude ON places (latitude, longitude);
+CREATE INDEX ix_places_geo_cell ON places (geo_cell);
+
+-- Full-text index on title and description (SQLite FTS5), kept in sync by
+-- triggers; see app/persistence/search.py
+CREATE VIRTUAL TABLE places_fts USING fts5(title, description,
+    content='places', content_rowid='rowid', prefix='2 3',
+    tokenize='unicode61 remove_diacritics 2');
+INSERT INTO places_fts(places_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)');
+
+CREATE TRIGGER places_fts_ai AFTER INSERT ON places BEGIN
+    INSERT INTO places_fts(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+END;
+CREATE TRIGGER places_fts_ad AFTER DELETE ON places BEGIN
+    INSERT INTO places_fts(places_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+END;
+CREATE TRIGGER places_fts_au AFTER UPDATE OF title, description ON places BEGIN
+    INSERT INTO places_fts(places_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+    INSERT INTO places_fts(rowid, title, description)
+    VALUES (new.rowid, new.title, new.description);
+END;
+
 -- -----------------------------
 -- Review Table
 -- -----------------------------
@@ -50,10 +84,13 @@ CREATE TABLE reviews (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id),
-    FOREIGN KEY (place_id) REFERENCES places(id),
-    UNIQUE (user_id, place_id)
+    FOREIGN KEY (place_id) REFERENCES places(id)
 );
 
+CREATE INDEX ix_reviews_created_at ON reviews (created_at);
+CREATE UNIQUE INDEX ux_reviews_place_id_user_id ON reviews (place_id, user_id);
+CREATE INDEX ix_reviews_user_id_created_at ON reviews (user_id, created_at);
+
 -- -----------------------------
 -- Amenity Table
 -- -----------------------------
@@ -64,6 +101,8 @@ CREATE TABLE amenities (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_amenities_created_at ON amenities (created_at);
+
 -- -----------------------------
 -- Place_Amenity Table (Many-to-Many)
 -- -----------------------------
@@ -77,13 +116,15 @@ CREATE TABLE place_amenity (
 -- =============================
 -- HBnB Initial Data
 -- =============================
+-- Timestamps use the same text format as SQLAlchemy's SQLite DateTime
+-- ('YYYY-MM-DD HH:MM:SS.ffffff') so keyset pagination compares them correctly.
 
 -- Insert administrator user
 INSERT OR REPLACE INTO users (id, first_name, last_name, email, password, is_admin, created_at, updated_at) VALUES 
-('36c9050e-ddd3-4c3b-9731-9f487208bbc1', 'Admin', 'HBnB', 'admin@hbnb.io', '$2b$12$5VkrO9ikT3ppdKqJUiI35u8GWxei6AMB/Zxa9xTZYdrfzpYkbi/MK', TRUE, datetime('now'), datetime('now'));
+('36c9050e-ddd3-4c3b-9731-9f487208bbc1', 'Admin', 'HBnB', 'admin@hbnb.io', '$2b$12$5VkrO9ikT3ppdKqJUiI35u8GWxei6AMB/Zxa9xTZYdrfzpYkbi/MK', TRUE, strftime('%Y-%m-%d %H:%M:%S.000000', 'now'), strftime('%Y-%m-%d %H:%M:%S.000000', 'now'));
 
 -- Insert initial amenities
 INSERT INTO amenities (id, name, created_at, updated_at) VALUES 
-('550e8400-e29b-41d4-a716-446655440001', 'WiFi', datetime('now'), datetime('now')),
-('550e8400-e29b-41d4-a716-446655440002', 'Swimming Pool', datetime('now'), datetime('now')),
-('550e8400-e29b-41d4-a716-446655440003', 'Air Conditioning', datetime('now'), datetime('now'));
+('550e8400-e29b-41d4-a716-446655440001', 'WiFi', strftime('%Y-%m-%d %H:%M:%S.000000', 'now'), strftime('%Y-%m-%d %H:%M:%S.000000', 'now')),
+('550e8400-e29b-41d4-a716-446655440002', 'Swimming Pool', strftime('%Y-%m-%d %H:%M:%S.000000', 'now'), strftime('%Y-%m-%d %H:%M:%S.000000', 'now')),
+('550e8400-e29b-41d4-a716-446655440003', 'Air Conditioning', strftime('%Y-%m-%d %H:%M:%S.000000', 'now'), strftime('%Y-%m-%d %H:%M:%S.000000', 'now'));
@@ -1,6 +1,8 @@
 -- =============================
 -- Initial Data for HBnB Database
 -- =============================
+-- Timestamps use the same text format as SQLAlchemy's SQLite DateTime
+-- ('YYYY-MM-DD HH:MM:SS.ffffff') so keyset pagination compares them correctly.
 
 -- Admin user
 REPLACE INTO users (id, first_name, last_name, email, password, is_admin, created_at, updated_at)
@@ -11,8 +13,8 @@ VALUES (
     'admin@hbnb.io',
     '$2b$12$/RZ2MjB6nbcpA6Std60Odu058SPgmKMhfIinpmadLtSBYcyIqR8/2', -- bcrypt hash for 'admin1234'
     TRUE,
-    datetime('now'),
-    datetime('now')
+    strftime('%Y-%m-%d %H:%M:%S.000000', 'now'),
+    strftime('%Y-%m-%d %H:%M:%S.000000', 'now')
 );
 
 -- -- Initial amenities
@@ -128,6 +128,54 @@ class TestEndpointsValidation(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 401)
 
+    def test_login_rehashes_password_after_cost_change(self):
+        """Test login upgrades a hash made with another bcrypt cost"""
+        from app.services import facade
+
+        self.app.config['BCRYPT_LOG_ROUNDS'] = 4
+        user_id, _ = self._create_user_and_login("rehash@example.com")
+        with self.app.app_context():
+            user = facade.get_user(user_id)
+            email, old_hash = user.email, user.password
+        self.assertTrue(old_hash.startswith("$2b$04$"))
+
+        self.app.config['BCRYPT_LOG_ROUNDS'] = 5
+        response = self.client.post('/api/v1/auth/login', json={
+            "email": email, "password": "password123"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            user = facade.get_user(user_id)
+            self.assertTrue(user.password.startswith("$2b$05$"))
+            self.assertTrue(user.check_password("password123"))
+            self.assertFalse(user.needs_rehash())
+
+    def test_password_hashes_wait_for_a_slot_of_their_app(self):
+        """Test each app caps its concurrent password hashes on its own"""
+        import threading
+        from app import passwords
+
+        other = create_app()
+        self.assertIsNot(other.extensions['passwords'], self.app.extensions['passwords'])
+        self.app.extensions['passwords'] = slots = threading.BoundedSemaphore(1)
+        hashed = []
+
+        def hash_in_app():
+            with self.app.app_context():
+                hashed.append(passwords.hash_password("password123"))
+
+        slots.acquire()
+        thread = threading.Thread(target=hash_in_app)
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        with other.app_context():
+            # Another app's slots are free
+            self.assertTrue(passwords.check_password(
+                passwords.hash_password("password123"), "password123"))
+        slots.release()
+        thread.join(5)
+        self.assertEqual(len(hashed), 1)
+
     def test_protected_endpoint_without_token(self):
         """Test accessing protected endpoint without JWT token"""
         response = self.client.get('/api/v1/auth/protected')
@@ -344,6 +392,36 @@ class TestEndpointsValidation(unittest.TestCase):
                                    json={"first_name": "Updated"})
         self.assertEqual(response.status_code, 401)
 
+    def test_list_users_keyset_pagination(self):
+        """Test users list is paginated with an opaque next cursor"""
+        created = [self._create_user_and_login(f"page{i}@example.com")[0]
+                   for i in range(3)]
+
+        response = self.client.get('/api/v1/users/?limit=2')
+        self.assertEqual(response.status_code, 200)
+        first_page = response.get_json()
+        self.assertEqual(len(first_page), 2)
+        cursor = response.headers.get('X-Next-Cursor')
+        self.assertIsNotNone(cursor)
+        self.assertIn('rel="next"', response.headers.get('Link'))
+
+        response = self.client.get(f'/api/v1/users/?limit=2&cursor={cursor}')
+        self.assertEqual(response.status_code, 200)
+        second_page = response.get_json()
+        self.assertEqual(len(second_page), 1)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        self.assertEqual(sorted(u['id'] for u in first_page + second_page),
+                         sorted(created))
+
+    def test_list_invalid_pagination_parameters(self):
+        """Test bad limit or cursor values return 400"""
+        for url in ('/api/v1/places/?limit=0', '/api/v1/places/?limit=abc',
+                    '/api/v1/reviews/?limit=1000', '/api/v1/amenities/?cursor=bogus'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.get_json())
+
     # ========================================================================
     # PLACE TESTS - Attribute validation
     # ========================================================================
@@ -530,6 +608,594 @@ class TestEndpointsValidation(unittest.TestCase):
                                            })
                 self.assertEqual(response.status_code, 201)
 
+    def test_search_places_by_price_bbox_and_amenities(self):
+        """Test GET /places filters by price, bounding box and amenities"""
+        from app.services import facade
+        user_id, token = self._create_user_and_login("searchowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        ids = {}
+        for title, price, lat, lng in (("Cheap Flat", 50.0, 10.0, 10.0),
+                                       ("Mid House", 120.0, 20.0, 20.0),
+                                       ("Luxury Villa", 300.0, 40.0, -70.0)):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": price, "latitude": lat, "longitude": lng})
+            self.assertEqual(response.status_code, 201)
+            ids[title] = response.get_json()['id']
+
+        with self.app.app_context():
+            pool_id = facade.create_amenity({"name": "Pool"}).id
+        self.client.put(f'/api/v1/places/{ids["Luxury Villa"]}', headers=headers,
+                        json={"title": "Luxury Villa", "amenities": [pool_id]})
+
+        def titles(query):
+            response = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(response.status_code, 200)
+            return sorted(p['title'] for p in response.get_json())
+
+        self.assertEqual(titles("max_price=150"), ["Cheap Flat", "Mid House"])
+        self.assertEqual(titles("min_price=100&max_price=150"), ["Mid House"])
+        self.assertEqual(titles("min_lat=5&max_lat=25&min_lng=15&max_lng=25"), ["Mid House"])
+        self.assertEqual(titles(f"amenities={pool_id}"), ["Luxury Villa"])
+        self.assertEqual(titles(f"amenities={pool_id}&max_price=100"), [])
+
+        response = self.client.get('/api/v1/places/?max_price=cheap')
+        self.assertEqual(response.status_code, 400)
+
+    def test_filter_places_by_amenity_bitmaps(self):
+        """Test GET /places?amenities= combines amenities with AND and OR and
+        follows amenity changes"""
+        from app.services import facade
+        user_id, token = self._create_user_and_login("bitmapowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        with self.app.app_context():
+            wifi, pool, ac = (facade.create_amenity({"name": name}).id
+                              for name in ("WiFi", "Pool", "AC"))
+        ids = {}
+        for title, amenities in (("Flat", [wifi]), ("Villa", [wifi, pool]),
+                                 ("Bungalow", [ac]), ("Tent", [])):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": 80.0, "latitude": 10.0, "longitude": 10.0,
+                "amenities": amenities})
+            self.assertEqual(response.status_code, 201)
+            ids[title] = response.get_json()['id']
+        with self.app.app_context():
+            facade.amenity_index.refresh()
+
+        def titles(amenities):
+            response = self.client.get(f'/api/v1/places/?amenities={amenities}')
+            self.assertEqual(response.status_code, 200)
+            # The writes of this process keep the bitmaps usable
+            with self.app.app_context():
+                self.assertIsNotNone(facade.amenity_index.current())
+            return sorted(p['title'] for p in response.get_json())
+
+        self.assertEqual(titles(f"{wifi},{pool}"), ["Villa"])
+        self.assertEqual(titles(f"{pool}|{ac}"), ["Bungalow", "Villa"])
+        self.assertEqual(titles(f"{wifi},{pool}|{ac}"), ["Villa"])
+
+        # Changes made after the index was built
+        response = self.client.post(f'/api/v1/places/{ids["Bungalow"]}/amenities',
+                                    headers=headers, json={"amenity_id": wifi})
+        self.assertEqual(response.status_code, 200)
+        self.client.put(f'/api/v1/places/{ids["Villa"]}', headers=headers,
+                        json={"amenities": [pool]})
+        self.assertEqual(titles(f"{wifi},{pool}|{ac}"), ["Bungalow"])
+        self.assertEqual(titles(wifi), ["Bungalow", "Flat"])
+        with self.app.app_context():
+            facade.delete_place(ids["Flat"])
+            facade.delete_amenity(ac)
+        self.assertEqual(titles(wifi), ["Bungalow"])
+        self.assertEqual(titles(f"{pool}|{ac}"), ["Villa"])
+        # With too many matches to list, EXISTS alone does the filtering
+        facade.AMENITY_MATCH_LIMIT = 0
+        try:
+            self.assertEqual(titles(f"{pool}|{wifi}"), ["Bungalow", "Villa"])
+        finally:
+            del facade.AMENITY_MATCH_LIMIT
+
+    def test_filter_places_by_amenity_outside_the_facade(self):
+        """Test GET /places?amenities= finds bulk-imported places, and places
+        given an amenity in SQL before the bitmap index is rebuilt"""
+        import json
+        from sqlalchemy import text
+        from app.services import facade
+        _, token = self._create_user_and_login("bitmapbulk@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        with self.app.app_context():
+            wifi = facade.create_amenity({"name": "WiFi"}).id
+
+        def titles():
+            response = self.client.get(f'/api/v1/places/?amenities={wifi}')
+            self.assertEqual(response.status_code, 200)
+            return sorted(p['title'] for p in response.get_json())
+
+        with self.app.app_context():
+            facade.amenity_index.refresh()
+        self.assertEqual(titles(), [])
+        lines = [json.dumps({"title": title, "price": 80.0, "amenities": amenities})
+                 for title, amenities in (("Bulk loft", [wifi]), ("Bulk barn", []))]
+        response = self.client.post('/api/v1/places/bulk', data="\n".join(lines),
+                                    headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}))
+        self.assertEqual(response.get_json()['created'], 2)
+        self.assertEqual(titles(), ["Bulk loft"])
+        with self.app.app_context():
+            self.assertIsNotNone(facade.amenity_index.current())
+
+        # As another process would: the index no longer matches the table,
+        # so EXISTS filters alone until it is rebuilt
+        with self.app.app_context():
+            barn_id = facade.place_repo.get_by_attribute("title", "Bulk barn").id
+            db.session.execute(text("INSERT INTO place_amenity VALUES (:place, :amenity)"),
+                               {"place": barn_id, "amenity": wifi})
+            db.session.commit()
+            self.assertIsNone(facade.amenity_index.current())
+        self.assertEqual(titles(), ["Bulk barn", "Bulk loft"])
+        with self.app.app_context():
+            facade.amenity_index.refresh()
+            self.assertIsNotNone(facade.amenity_index.current())
+        self.assertEqual(titles(), ["Bulk barn", "Bulk loft"])
+
+    def test_top_places_leaderboard(self):
+        """Test GET /places/top ranks by Bayesian average, per region too,
+        and follows review writes"""
+        from sqlalchemy import text
+        from app.services import facade
+        with self.app.app_context():
+            facade.leaderboard.refresh()
+        owner_id, owner_token = self._create_user_and_login("topowner@example.com")
+        reviewers = [self._create_user_and_login(f"topreviewer{i}@example.com")[1]
+                     for i in range(3)]
+        ids = {}
+        for title, lat, lng in (("Gem", 48.85, 2.35), ("Solid", 48.86, 2.34),
+                                ("Sunny", 25.76, -80.19), ("Empty", 48.85, 2.36)):
+            response = self.client.post('/api/v1/places/',
+                                        headers={'Authorization': f'Bearer {owner_token}'},
+                                        json={"title": title, "price": 100.0,
+                                              "latitude": lat, "longitude": lng})
+            ids[title] = response.get_json()['id']
+
+        def review(i, title, rating):
+            response = self.client.post('/api/v1/reviews/',
+                                        headers={'Authorization': f'Bearer {reviewers[i]}'},
+                                        json={"text": "Nice", "rating": rating,
+                                              "place_id": ids[title]})
+            self.assertEqual(response.status_code, 201)
+            return response.get_json()['id']
+
+        def top(query=""):
+            response = self.client.get(f'/api/v1/places/top{query}')
+            self.assertEqual(response.status_code, 200)
+            return [(p['title'], p['score']) for p in response.get_json()]
+
+        # One 5-star review does not beat several good ones
+        review(0, "Gem", 5)
+        solid = [review(i, "Solid", rating) for i, rating in enumerate((5, 5, 4))]
+        self.assertEqual(top(), [("Solid", 3.625), ("Gem", 3.3333)])
+        # Reviews made after the leaderboard was built
+        sunny = [review(i, "Sunny", 4) for i in range(2)]
+        self.assertEqual([t for t, _ in top()], ["Solid", "Gem", "Sunny"])
+        self.client.put(f'/api/v1/reviews/{sunny[0]}',
+                        headers={'Authorization': f'Bearer {reviewers[0]}'},
+                        json={"rating": 5})
+        for i in range(2):
+            self.client.delete(f'/api/v1/reviews/{solid[i]}',
+                               headers={'Authorization': f'Bearer {reviewers[i]}'})
+        self.assertEqual(top(), [("Sunny", 3.4286), ("Gem", 3.3333), ("Solid", 3.1667)])
+        self.assertEqual([t for t, _ in top("?limit=1")], ["Sunny"])
+        # The region around Paris
+        self.assertEqual([t for t, _ in top("?lat=48.8&lng=2.3")], ["Gem", "Solid"])
+        self.assertEqual(top("?lat=0&lng=0"), [])
+
+        # Reviews written by another process: scored as they are now, and
+        # ranked by the board once rebuilt
+        with self.app.app_context():
+            db.session.execute(text("UPDATE places SET review_count = 1, rating_sum = 1 "
+                                    "WHERE id = :id"), {"id": ids["Sunny"]})
+            db.session.commit()
+        self.assertEqual(top(), [("Gem", 3.3333), ("Solid", 3.1667), ("Sunny", 2.6667)])
+        with self.app.app_context():
+            facade.leaderboard.refresh()
+        self.assertEqual(top(), [("Gem", 3.3333), ("Solid", 3.1667), ("Sunny", 2.6667)])
+        with self.app.app_context():
+            db.session.execute(text("UPDATE places SET review_count = 9, rating_sum = 45 "
+                                    "WHERE id = :id"), {"id": ids["Empty"]})
+            db.session.commit()
+            facade.leaderboard.refresh()
+        self.assertEqual(top("?limit=1"), [("Empty", 4.2857)])
+
+        for query in ("?limit=0", "?limit=101", "?limit=x", "?lat=48.8", "?lat=91&lng=0"):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/places/top{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_similar_places(self):
+        """Test GET /places/<id>/similar ranks by amenities, price and
+        distance and follows place writes"""
+        from sqlalchemy import text
+        from app.services import facade
+        user_id, token = self._create_user_and_login("similarowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        with self.app.app_context():
+            wifi, pool, ac = (facade.create_amenity({"name": name}).id
+                              for name in ("WiFi", "Pool", "AC"))
+        ids = {}
+        for title, price, lat, amenities in (("Base", 100.0, 48.85, [wifi, pool]),
+                                             ("Twin", 100.0, 48.86, [wifi, pool]),
+                                             ("Cousin", 120.0, 48.90, [wifi]),
+                                             ("Faraway", 100.0, -33.0, [ac])):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": price, "latitude": lat, "longitude": 2.35,
+                "amenities": amenities})
+            self.assertEqual(response.status_code, 201)
+            ids[title] = response.get_json()['id']
+        with self.app.app_context():
+            facade.similar_index.refresh()
+
+        def similar(title, query=""):
+            response = self.client.get(f'/api/v1/places/{ids[title]}/similar{query}')
+            self.assertEqual(response.status_code, 200)
+            return [p['title'] for p in response.get_json()]
+
+        self.assertEqual(similar("Base"), ["Twin", "Cousin", "Faraway"])
+        response = self.client.get(f'/api/v1/places/{ids["Base"]}/similar?limit=1')
+        twin, = response.get_json()
+        self.assertEqual(twin['id'], ids["Twin"])
+        self.assertCountEqual(twin['amenities'], [wifi, pool])
+        self.assertGreater(twin['score'], 0.9)
+
+        # Writes made after the matrix was built
+        self.client.put(f'/api/v1/places/{ids["Twin"]}', headers=headers,
+                        json={"price": 400.0, "amenities": [ac]})
+        response = self.client.post('/api/v1/places/', headers=headers, json={
+            "title": "Newcomer", "price": 100.0, "latitude": 48.85, "longitude": 2.35,
+            "amenities": [wifi, pool]})
+        ids["Newcomer"] = response.get_json()['id']
+        with self.app.app_context():
+            facade.delete_place(ids["Faraway"])
+        self.assertEqual(similar("Base"), ["Newcomer", "Cousin", "Twin"])
+
+        # Changes made elsewhere show once the matrix is rebuilt
+        with self.app.app_context():
+            db.session.execute(text("UPDATE places SET price = 100 WHERE id = :id"),
+                               {"id": ids["Twin"]})
+            db.session.execute(text("DELETE FROM place_amenity WHERE place_id = :id"),
+                               {"id": ids["Twin"]})
+            db.session.execute(text("INSERT INTO place_amenity VALUES (:id, :wifi), (:id, :pool)"),
+                               {"id": ids["Twin"], "wifi": wifi, "pool": pool})
+            db.session.commit()
+        self.assertEqual(similar("Base"), ["Newcomer", "Cousin", "Twin"])
+        with self.app.app_context():
+            facade.similar_index.refresh()
+        self.assertEqual(similar("Base"), ["Newcomer", "Twin", "Cousin"])
+
+        response = self.client.get('/api/v1/places/unknown/similar')
+        self.assertEqual(response.status_code, 404)
+
+    def test_similar_bulk_imported_places(self):
+        """Test places from POST /places/bulk are recommended as similar"""
+        import json
+        from app.services import facade
+        _, token = self._create_user_and_login("bulksimilar@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        with self.app.app_context():
+            wifi = facade.create_amenity({"name": "WiFi"}).id
+        response = self.client.post('/api/v1/places/', headers=headers, json={
+            "title": "Base", "price": 100.0, "latitude": 48.85, "longitude": 2.35,
+            "amenities": [wifi]})
+        base_id = response.get_json()['id']
+        # Built before the import, so the import has to update it
+        with self.app.app_context():
+            facade.similar_index.refresh()
+        self.assertEqual(self.client.get(f'/api/v1/places/{base_id}/similar').get_json(), [])
+
+        lines = [json.dumps({"title": title, "price": 100.0, "latitude": lat,
+                             "longitude": 2.35, "amenities": [wifi]})
+                 for title, lat in (("Twin", 48.85), ("Cousin", 49.5))]
+        response = self.client.post('/api/v1/places/bulk', data="\n".join(lines),
+                                    headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}))
+        self.assertEqual(response.get_json()['created'], 2)
+        ids = {p['title']: p['id'] for p in self.client.get('/api/v1/places/').get_json()}
+
+        response = self.client.get(f'/api/v1/places/{base_id}/similar')
+        self.assertEqual([(p['id'], p['title']) for p in response.get_json()],
+                         [(ids[title], title) for title in ("Twin", "Cousin")])
+        for query in ("?limit=0", "?limit=51", "?limit=x"):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/places/{ids["Base"]}/similar{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_full_text_search_places(self):
+        """Test GET /places/search ranks prefix matches and follows updates"""
+        user_id, token = self._create_user_and_login("ftsowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        ids = {}
+        for title, description in (("Seaside Loft", "Quiet flat near the beach"),
+                                   ("Mountain Cabin", "Wood stove, sea of clouds"),
+                                   ("Café Studio", "Central and bright")):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "description": description, "price": 80.0,
+                "latitude": 10.0, "longitude": 10.0})
+            self.assertEqual(response.status_code, 201)
+            ids[title] = response.get_json()['id']
+
+        def titles(query):
+            response = self.client.get(f'/api/v1/places/search?{query}')
+            self.assertEqual(response.status_code, 200)
+            return [p['title'] for p in response.get_json()]
+
+        # Title matches outrank description matches; words match as prefixes
+        self.assertEqual(titles("q=sea"), ["Seaside Loft", "Mountain Cabin"])
+        self.assertEqual(titles("q=mount+CLOUD"), ["Mountain Cabin"])
+        self.assertEqual(titles("q=cafe"), ["Café Studio"])
+        self.assertEqual(titles("q=NEAR"), ["Seaside Loft"])
+
+        response = self.client.get('/api/v1/places/search?q=sea&limit=1')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Seaside Loft"])
+        cursor = response.headers['X-Next-Cursor']
+        self.assertEqual(titles(f"q=sea&limit=1&cursor={cursor}"), ["Mountain Cabin"])
+
+        self.client.put(f'/api/v1/places/{ids["Seaside Loft"]}', headers=headers,
+                        json={"title": "Harbour Loft"})
+        self.assertEqual(titles("q=sea"), ["Mountain Cabin"])
+        self.assertEqual(titles("q=harb"), ["Harbour Loft"])
+
+        for query in ("", "q=+-+", "q=sea&cursor=bogus"):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/places/search?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_suggest_place_titles(self):
+        """Test GET /places/suggest completes prefixes, tolerates typos and
+        follows committed place writes only"""
+        from unittest.mock import patch
+        from sqlalchemy import text
+        from app.services import facade
+        user_id, token = self._create_user_and_login("suggestowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        ids = {}
+        for title in ("Luxury Apartment Paris", "Luxury Villa", "Cozy Loft"):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": 80.0, "latitude": 10.0, "longitude": 10.0})
+            self.assertEqual(response.status_code, 201)
+            ids[title] = response.get_json()['id']
+
+        def titles(prefix):
+            response = self.client.get(f'/api/v1/places/suggest?prefix={prefix}')
+            self.assertEqual(response.status_code, 200)
+            return [p['title'] for p in response.get_json()]
+
+        # Before the first build, which requests only start, the full-text
+        # index stands in: no typos
+        builds = []
+        with self.app.app_context():
+            facade.title_index.clear()
+        with patch.object(facade.title_index, "_spawn", builds.append):
+            self.assertEqual(titles("lux"), ["Luxury Villa", "Luxury Apartment Paris"])
+            self.assertEqual(titles("luxary apa"), [])
+        self.assertEqual(len(builds), 1)
+        with self.app.app_context():
+            builds[0]()
+
+        # Shortest title first; the last word is a prefix, typos are tolerated
+        self.assertEqual(titles("lux"), ["Luxury Villa", "Luxury Apartment Paris"])
+        self.assertEqual(titles("luxary apa"), ["Luxury Apartment Paris"])
+        self.assertEqual(titles("loft"), ["Cozy Loft"])
+        response = self.client.get('/api/v1/places/suggest?prefix=lux&limit=1')
+        self.assertEqual(response.get_json(), [{"id": ids["Luxury Villa"],
+                                                "title": "Luxury Villa"}])
+
+        # Writes made after the index was built
+        self.client.put(f'/api/v1/places/{ids["Luxury Villa"]}', headers=headers,
+                        json={"title": "Seaside Villa"})
+        response = self.client.post('/api/v1/places/', headers=headers, json={
+            "title": "Luxe Studio", "price": 80.0, "latitude": 10.0, "longitude": 10.0})
+        self.assertEqual(titles("lux"), ["Luxe Studio", "Luxury Apartment Paris"])
+        self.assertEqual(titles("seas"), ["Seaside Villa"])
+        with self.app.app_context():
+            facade.delete_place(ids["Cozy Loft"])
+            # Rolled back: the index does not see it
+            with self.assertRaises(ValueError):
+                with facade.transaction():
+                    facade.update_place(ids["Luxury Villa"], {"title": "Lakeside Villa"})
+                    raise ValueError("abort")
+        self.assertEqual(titles("loft"), [])
+        self.assertEqual(titles("lake"), [])
+        self.assertEqual(titles("seas"), ["Seaside Villa"])
+
+        # A rename from elsewhere shows once the index is rebuilt
+        with self.app.app_context():
+            self.assertIsNotNone(facade.title_index.current())
+            db.session.execute(text("UPDATE places SET title = 'Lakeside Villa' WHERE id = :id"),
+                               {"id": ids["Luxury Villa"]})
+            db.session.commit()
+            self.assertIsNone(facade.title_index.current())
+            facade.title_index.refresh()
+        self.assertEqual(titles("lake"), ["Lakeside Villa"])
+
+        for query in ("", "prefix=+-", "prefix=lux&limit=0", "prefix=lux&limit=x"):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/places/suggest?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_suggest_bulk_imported_places(self):
+        """Test places from POST /places/bulk are suggested with their ids"""
+        import json
+        from app.services import facade
+        _, token = self._create_user_and_login("bulksuggest@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        # Built before the import, so the import has to update it
+        with self.app.app_context():
+            facade.title_index.refresh()
+        lines = [json.dumps({"title": title, "price": 80.0})
+                 for title in ("Seaview loft", "Seaview loft 2")]
+        response = self.client.post('/api/v1/places/bulk', data="\n".join(lines),
+                                    headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}))
+        self.assertEqual(response.get_json()['created'], 2)
+        ids = {p['title']: p['id'] for p in self.client.get('/api/v1/places/').get_json()}
+
+        response = self.client.get('/api/v1/places/suggest?prefix=seav')
+        self.assertEqual(response.get_json(), [{"id": ids[title], "title": title}
+                                               for title in ("Seaview loft", "Seaview loft 2")])
+
+    def test_nearby_places_sorted_by_distance(self):
+        """Test GET /places/nearby returns places in radius, nearest first"""
+        user_id, token = self._create_user_and_login("nearbyowner@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        for title, lat, lng in (("Orlando", 28.5384, -81.3789),
+                                ("Fort Lauderdale", 26.1224, -80.1373),
+                                ("Miami", 25.7617, -80.1918),
+                                ("Fiji East", -17.0, 179.99)):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": 100.0, "latitude": lat, "longitude": lng})
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/api/v1/places/nearby?lat=25.77&lng=-80.19&radius_km=50')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([p['title'] for p in data], ["Miami", "Fort Lauderdale"])
+        self.assertLess(data[0]['distance_km'], data[1]['distance_km'])
+
+        # The search area wraps around the antimeridian
+        response = self.client.get('/api/v1/places/nearby?lat=-17&lng=-179.99&radius_km=10')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Fiji East"])
+
+        for query in ("lat=25", "lat=100&lng=0", "lat=0&lng=0&radius_km=0"):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/v1/places/nearby?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_upgrade_adds_geo_cell(self):
+        """Test upgrade_columns adds geo_cell to an older database and fills it in"""
+        from sqlalchemy import inspect, text
+        from app.persistence.migrations import upgrade_columns
+        from app.services import facade
+        _, token = self._create_user_and_login("upgradegeo@example.com")
+        for title, lat, lng in (("Miami", 25.7617, -80.1918), ("Nowhere", None, None)):
+            self.client.post('/api/v1/places/', headers={'Authorization': f'Bearer {token}'},
+                             json={"title": title, "price": 100.0,
+                                   "latitude": lat, "longitude": lng})
+        with self.app.app_context():
+            engine = db.engine
+            with engine.begin() as connection:
+                connection.execute(text("DROP INDEX ix_places_geo_cell"))
+                connection.execute(text("ALTER TABLE places DROP COLUMN geo_cell"))
+            upgrade_columns(engine)
+            upgrade_columns(engine)
+            self.assertIn("ix_places_geo_cell",
+                          [index["name"] for index in inspect(engine).get_indexes("places")])
+            facade.place_repo.clear()
+
+        response = self.client.get('/api/v1/places/nearby?lat=25.77&lng=-80.19&radius_km=50')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Miami"])
+
+    def test_upgrade_adds_review_aggregates(self):
+        """Test upgrade_columns adds review_count and rating_sum to an older
+        database and computes them from the reviews"""
+        from sqlalchemy import text
+        from app.persistence.migrations import upgrade_columns
+        from app.services import facade
+        _, owner_token = self._create_user_and_login("upgradereviews@example.com")
+        place_ids = []
+        for title in ("Reviewed", "Unreviewed"):
+            response = self.client.post('/api/v1/places/',
+                                        headers={'Authorization': f'Bearer {owner_token}'},
+                                        json={"title": title, "price": 100.0,
+                                              "latitude": 10.0, "longitude": 10.0})
+            place_ids.append(response.get_json()['id'])
+        for rating in (3, 4):
+            token = self._create_user_and_login("upgradereviewer@example.com")[1]
+            self.client.post('/api/v1/reviews/', headers={'Authorization': f'Bearer {token}'},
+                             json={"text": "Fine", "rating": rating, "place_id": place_ids[0]})
+        with self.app.app_context():
+            engine = db.engine
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE places DROP COLUMN review_count"))
+                connection.execute(text("ALTER TABLE places DROP COLUMN rating_sum"))
+            upgrade_columns(engine)
+            facade.place_repo.clear()
+
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        places = {p['title']: p for p in response.get_json()}
+        self.assertEqual(places["Reviewed"]['review_count'], 2)
+        self.assertEqual(places["Reviewed"]['average_rating'], 3.5)
+        self.assertEqual(places["Unreviewed"]['review_count'], 0)
+
+    def test_bulk_import_places_and_reviews(self):
+        """Test NDJSON bulk import inserts valid lines and reports the others"""
+        import json
+        owner_id, owner_token = self._create_user_and_login("bulkowner@example.com")
+        _, reviewer_token = self._create_user_and_login("bulkreviewer@example.com")
+
+        lines = [
+            json.dumps({"title": "Bulk Loft", "price": 90.0, "latitude": 48.85,
+                        "longitude": 2.35}),
+            "{not json",
+            json.dumps({"title": "Bulk Loft", "price": 70.0}),
+            json.dumps({"title": "Bulk Cabin", "price": -5}),
+            "",
+            json.dumps({"title": "Bulk Barn", "price": 50.0, "owner_id": "someone-else"}),
+            json.dumps({"title": "Bulk Villa", "price": 300.0, "amenities": ["missing"]}),
+            json.dumps({"title": "Bulk Hut", "price": 20.0}),
+            json.dumps({"title": "Bulk Tent", "price": 10.0, "amenities": [["nested"]]}),
+            json.dumps({"title": "Bulk Shed", "price": 10.0, "amenities": "not-a-list"}),
+        ]
+        response = self.client.post('/api/v1/places/bulk', data="\n".join(lines),
+                                    headers={'Authorization': f'Bearer {owner_token}',
+                                             'Content-Type': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual([e['line'] for e in data['errors']], [2, 3, 4, 6, 7, 9, 10])
+        self.assertEqual([e['error'] for e in data['errors'][-2:]],
+                         ["amenities must be a list of IDs"] * 2)
+
+        places = self.client.get('/api/v1/places/').get_json()
+        self.assertEqual(sorted(p['title'] for p in places), ["Bulk Hut", "Bulk Loft"])
+        self.assertTrue(all(p['owner_id'] == owner_id for p in places))
+        loft = next(p for p in places if p['title'] == "Bulk Loft")
+
+        lines = [
+            json.dumps({"place_id": loft['id'], "text": "Lovely", "rating": 5}),
+            json.dumps({"place_id": loft['id'], "text": "Again", "rating": 1}),
+            json.dumps({"place_id": "nope", "text": "Where?", "rating": 3}),
+        ]
+        response = self.client.post('/api/v1/reviews/bulk', data="\n".join(lines),
+                                    headers={'Authorization': f'Bearer {reviewer_token}',
+                                             'Content-Type': 'application/x-ndjson'})
+        data = response.get_json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['errors'], [
+            {"line": 2, "error": "You have already reviewed this place"},
+            {"line": 3, "error": "place not found"},
+        ])
+        place = self.client.get(f"/api/v1/places/{loft['id']}").get_json()
+        self.assertEqual((place['review_count'], place['average_rating']), (1, 5.0))
+
+        response = self.client.post('/api/v1/amenities/bulk', data='{"name": "Bulk Wifi"}',
+                                    headers={'Authorization': f'Bearer {owner_token}'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_import_places_with_amenities_emits_no_warnings(self):
+        """Test bulk-imported places get their amenities without SQLAlchemy
+        warnings, and the amenities see their new places"""
+        import warnings
+        from app.services import facade
+        owner_id, _ = self._create_user_and_login("bulkamenities@example.com")
+        with self.app.app_context():
+            wifi = facade.create_amenity({"name": "Bulk WiFi"})
+            self.assertEqual(wifi.places, [])
+            rows = [(i, {"title": f"Linked {i}", "price": 50.0, "owner_id": owner_id,
+                         "amenities": [wifi.id]}) for i in range(1, 6)]
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                with facade.transaction():
+                    created, errors = facade.bulk_create_places(rows, chunk_size=2)
+            self.assertEqual((created, errors), (5, []))
+            self.assertEqual([str(w.message) for w in caught], [])
+            self.assertEqual(sorted(p.title for p in facade.get_amenity(wifi.id).places),
+                             [f"Linked {i}" for i in range(1, 6)])
+
     def test_update_place_owner_only(self):
         """Test only place owner can update place"""
         owner_id, owner_token = self._create_user_and_login("placeowner1@example.com")
@@ -854,6 +1520,86 @@ class TestEndpointsValidation(unittest.TestCase):
                                            })
                 self.assertEqual(response.status_code, 400)
 
+    def test_sqlite_connections_use_configured_pragmas(self):
+        """Test new SQLite connections run the SQLITE_PRAGMAS of the config"""
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                def pragma(name):
+                    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                self.assertEqual(pragma("journal_mode"), "wal")
+                self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+                self.assertEqual(pragma("busy_timeout"), 5000)
+
+    def test_write_request_commits_once(self):
+        """Test a write request is one unit of work with a single commit"""
+        from sqlalchemy import event
+        from app.services import facade
+
+        _, owner_token = self._create_user_and_login("uowowner@example.com")
+        _, reviewer_token = self._create_user_and_login("uowreviewer@example.com")
+        place_id = self.client.post('/api/v1/places/',
+                                    headers={'Authorization': f'Bearer {owner_token}'},
+                                    json={"title": "UoW Place", "price": 80.0,
+                                          "latitude": 10.0, "longitude": 10.0}).get_json()['id']
+
+        commits = []
+
+        def on_commit(conn):
+            commits.append(conn)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "commit", on_commit)
+        try:
+            response = self.client.post('/api/v1/reviews/',
+                                        headers={'Authorization': f'Bearer {reviewer_token}'},
+                                        json={"text": "Tidy", "rating": 4, "place_id": place_id})
+        finally:
+            event.remove(engine, "commit", on_commit)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(commits), 1)
+
+        with self.app.app_context():
+            with self.assertRaises(RuntimeError):
+                with facade.transaction():
+                    facade.create_amenity({"name": "Rolled Back"})
+                    raise RuntimeError("abort")
+            self.assertEqual(facade.amenity_repo.existing_values("name", {"Rolled Back"}), set())
+
+    def test_admin_claim_trusted_without_user_query(self):
+        """Test admin checks read the token claim instead of loading the user"""
+        from sqlalchemy import event
+        from app.services import facade
+
+        admin_id, _ = self._create_user_and_login("claimadmin@example.com")
+        with self.app.app_context():
+            facade.update_user(admin_id, {"is_admin": True})
+            email = facade.get_user(admin_id).email
+        admin_token = self.client.post('/api/v1/auth/login', json={
+            "email": email, "password": "password123"}).get_json()['access_token']
+        _, user_token = self._create_user_and_login("claimuser@example.com")
+
+        statements = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            created = self.client.post('/api/v1/amenities/',
+                                       headers={'Authorization': f'Bearer {admin_token}'},
+                                       json={"name": "Claim Pool"})
+            denied = self.client.post('/api/v1/amenities/',
+                                      headers={'Authorization': f'Bearer {user_token}'},
+                                      json={"name": "Claim Spa"})
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(denied.status_code, 403)
+        self.assertFalse([s for s in statements if "FROM users" in s])
+
     def test_update_review_owner_only(self):
         """Test only review author can update review"""
         reviewer_id, reviewer_token = self._create_user_and_login("reviewauthor@example.com")
@@ -934,6 +1680,54 @@ class TestEndpointsValidation(unittest.TestCase):
                                      headers={'Authorization': f'Bearer {reviewer_token}'})
         self.assertEqual(response.status_code, 200)
 
+    def test_place_review_aggregates_follow_review_writes(self):
+        """Test review_count/average_rating track create, update and delete"""
+        owner_id, owner_token = self._create_user_and_login("aggowner@example.com")
+        reviewers = [self._create_user_and_login(f"aggreviewer{i}@example.com")[1]
+                     for i in range(2)]
+        headers = {'Authorization': f'Bearer {owner_token}'}
+        place_ids = []
+        for title in ("Aggregate Place", "Top Place"):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": title, "price": 100.0, "latitude": 25.0, "longitude": -80.0})
+            place_ids.append(response.get_json()['id'])
+        place_id, top_id = place_ids
+
+        def place():
+            return self.client.get(f'/api/v1/places/{place_id}').get_json()
+
+        self.assertEqual(place()['review_count'], 0)
+        self.assertIsNone(place()['average_rating'])
+
+        review_ids = []
+        for token, rating in zip(reviewers, (4, 2)):
+            response = self.client.post('/api/v1/reviews/',
+                                        headers={'Authorization': f'Bearer {token}'},
+                                        json={"text": "ok", "rating": rating,
+                                              "place_id": place_id})
+            self.assertEqual(response.status_code, 201)
+            review_ids.append(response.get_json()['id'])
+        self.assertEqual((place()['review_count'], place()['average_rating']), (2, 3.0))
+
+        self.client.put(f'/api/v1/reviews/{review_ids[1]}',
+                        headers={'Authorization': f'Bearer {reviewers[1]}'},
+                        json={"rating": 5})
+        self.assertEqual((place()['review_count'], place()['average_rating']), (2, 4.5))
+
+        self.client.delete(f'/api/v1/reviews/{review_ids[0]}',
+                           headers={'Authorization': f'Bearer {reviewers[0]}'})
+        self.assertEqual((place()['review_count'], place()['average_rating']), (1, 5.0))
+
+        self.client.post('/api/v1/reviews/',
+                         headers={'Authorization': f'Bearer {reviewers[0]}'},
+                         json={"text": "meh", "rating": 3, "place_id": top_id})
+        response = self.client.get('/api/v1/places/?sort=rating&limit=1')
+        self.assertEqual(response.get_json()[0]['id'], place_id)
+        cursor = response.headers['X-Next-Cursor']
+        response = self.client.get(f'/api/v1/places/?sort=rating&limit=1&cursor={cursor}')
+        self.assertEqual(response.get_json()[0]['id'], top_id)
+        self.assertEqual(self.client.get('/api/v1/places/?sort=price').status_code, 400)
+
     # ========================================================================
     # AMENITY TESTS - Attribute validation
     # ========================================================================
@@ -989,6 +1783,185 @@ class TestEndpointsValidation(unittest.TestCase):
         })
         self.assertIn(response.status_code, [400, 401, 403])
 
+    def test_list_amenities_etag_revalidation(self):
+        """Test amenity list ETag gives 304 until the catalog changes"""
+        from app.services import facade
+
+        with self.app.app_context():
+            sauna_id = facade.create_amenity({"name": "ETag Sauna"}).id
+        response = self.client.get('/api/v1/amenities/')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertIn(sauna_id, [a['id'] for a in response.get_json()])
+
+        response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        with self.app.app_context():
+            facade.update_amenity(sauna_id, {"name": "ETag Hammam"})
+        response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn("ETag Hammam", [a['name'] for a in response.get_json()])
+
+    def test_amenity_catalog_invalidated_on_commit(self):
+        """Test amenity writes move the catalog version once committed only"""
+        from app.services import facade
+
+        with self.app.app_context():
+            version = facade.amenity_catalog.version
+            with facade.transaction():
+                facade.create_amenity({"name": "Pending Sauna"})
+                # A snapshot rebuilt now would not see the amenity yet
+                self.assertEqual(facade.amenity_catalog.version, version)
+            self.assertGreater(facade.amenity_catalog.version, version)
+            self.assertIn("Pending Sauna",
+                          [a.name for a in facade.get_amenity_catalog().entries])
+
+            version = facade.amenity_catalog.version
+            with self.assertRaises(RuntimeError):
+                with facade.transaction():
+                    facade.create_amenity({"name": "Rolled Back Sauna"})
+                    raise RuntimeError
+            self.assertEqual(facade.amenity_catalog.version, version)
+
+    def test_entity_get_conditional_requests(self):
+        """Test entity GETs send validators and answer 304 until the row changes"""
+        import time
+
+        user_id, token = self._create_user_and_login("conditional@example.com")
+        response = self.client.get(f'/api/v1/users/{user_id}')
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+        self.assertTrue(etag.startswith('W/'))
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+
+        response = self.client.get(f'/api/v1/users/{user_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        response = self.client.get(f'/api/v1/users/{user_id}',
+                                   headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        place_id = self.client.post('/api/v1/places/',
+                                    headers={'Authorization': f'Bearer {token}'},
+                                    json={"title": "Conditional Place", "price": 10.0,
+                                          "latitude": 1.0, "longitude": 1.0}).get_json()['id']
+        response = self.client.get(f'/api/v1/places/{place_id}')
+        place_etag = response.headers['ETag']
+        self.assertIn('max-age', response.headers['Cache-Control'])
+
+        time.sleep(0.01)
+        self.client.put(f'/api/v1/users/{user_id}', headers={'Authorization': f'Bearer {token}'},
+                        json={"first_name": "Changed"})
+        response = self.client.get(f'/api/v1/users/{user_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['first_name'], 'Changed')
+        # The place body embeds its owner
+        response = self.client.get(f'/api/v1/places/{place_id}',
+                                   headers={'If-None-Match': place_etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_place_get_validated_by_etag_only(self):
+        """Test GET /places/<id> has no Last-Modified, whose dates miss
+        unlinked amenities, and If-Modified-Since alone never gets a 304"""
+        from app.services import facade
+
+        _, token = self._create_user_and_login("conditionalamenities@example.com")
+        headers = {'Authorization': f'Bearer {token}'}
+        with self.app.app_context():
+            wifi, pool = (facade.create_amenity({"name": name}).id
+                          for name in ("Conditional WiFi", "Conditional Pool"))
+        place_id = self.client.post('/api/v1/places/', headers=headers, json={
+            "title": "Conditional Villa", "price": 10.0, "latitude": 1.0,
+            "longitude": 1.0, "amenities": [wifi, pool]}).get_json()['id']
+        response = self.client.get(f'/api/v1/places/{place_id}')
+        etag = response.headers['ETag']
+        self.assertNotIn('Last-Modified', response.headers)
+        since = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+        self.client.put(f'/api/v1/places/{place_id}', headers=headers,
+                        json={"amenities": [wifi]})
+        response = self.client.get(f'/api/v1/places/{place_id}',
+                                   headers={'If-Modified-Since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['id'] for a in response.get_json()['amenities']], [wifi])
+        response = self.client.get(f'/api/v1/places/{place_id}',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/v1/places/{place_id}', headers={
+            'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+    def test_json_compression_and_fast_encoder(self):
+        """Test gzip is negotiated above the size threshold and FAST_JSON is compact"""
+        import gzip
+        import json
+
+        for i in range(20):
+            self.client.post('/api/v1/users/', json={
+                "first_name": "Gzip", "last_name": str(i),
+                "email": f"gzip{i}@example.com", "password": "password123"})
+        plain = self.client.get('/api/v1/users/')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+
+        zipped = self.client.get('/api/v1/users/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(zipped.headers['Content-Encoding'], 'gzip')
+        self.assertLess(len(zipped.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(zipped.data)), plain.get_json())
+
+        small = self.client.get('/api/v1/users/?limit=1', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', small.headers)
+
+        streamed = self.client.get('/api/v1/users/?stream=true',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(streamed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(streamed.data))), 20)
+
+        self.app.config['FAST_JSON'] = True
+        compact = self.client.get('/api/v1/users/')
+        self.assertEqual(compact.get_json(), plain.get_json())
+        self.assertNotIn(b'\n    ', compact.data)
+        self.assertLess(len(compact.data), len(plain.data))
+
+    def test_list_streaming_json_and_ndjson(self):
+        """Test list endpoints stream the whole collection as JSON or NDJSON"""
+        import json
+        from app.api.v1 import streaming
+
+        for i in range(3):
+            self.client.post('/api/v1/users/', json={
+                "first_name": "Stream", "last_name": str(i),
+                "email": f"stream{i}@example.com", "password": "password123"})
+
+        paged = self.client.get('/api/v1/users/?limit=1')
+        self.assertIn('X-Next-Cursor', paged.headers)
+
+        original = streaming.FLUSH_SIZE
+        streaming.FLUSH_SIZE = 1  # one write per user
+        try:
+            response = self.client.get('/api/v1/users/?stream=true&limit=1')
+            self.assertTrue(response.is_streamed)
+            users = json.loads(response.get_data(as_text=True))
+        finally:
+            streaming.FLUSH_SIZE = original
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        emails = [u['email'] for u in users]
+        for i in range(3):
+            self.assertIn(f"stream{i}@example.com", emails)
+
+        response = self.client.get('/api/v1/users/',
+                                   headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['email'] for line in lines], emails)
+
+        response = self.client.get('/api/v1/places/?stream=true')
+        self.assertEqual(json.loads(response.get_data(as_text=True)), [])
+        response = self.client.get('/api/v1/places/?stream=true&min_price=abc')
+        self.assertEqual(response.status_code, 400)
+
     # ========================================================================
     # RELATIONSHIP TESTS - Testing entity relationships
     # ========================================================================
@@ -1021,6 +1994,180 @@ class TestEndpointsValidation(unittest.TestCase):
         self.assertIsInstance(data['amenities'], list)
         self.assertIsInstance(data['reviews'], list)
 
+    def test_get_place_detail_query_count(self):
+        """Test place details load owner, amenities and reviews eagerly"""
+        from contextlib import contextmanager
+        from sqlalchemy import event
+        from app.services import facade
+
+        owner_id, owner_token = self._create_user_and_login("eagerowner@example.com")
+        place_response = self.client.post('/api/v1/places/',
+                                         headers={'Authorization': f'Bearer {owner_token}'},
+                                         json={
+                                             "title": "Eager Loading Place",
+                                             "price": 100.0,
+                                             "latitude": 25.0,
+                                             "longitude": -80.0
+                                         })
+        self.assertEqual(place_response.status_code, 201)
+        place_id = place_response.get_json()['id']
+
+        with self.app.app_context():
+            amenity_ids = [facade.create_amenity({"name": f"Eager {i}"}).id
+                           for i in range(3)]
+        self.client.put(f'/api/v1/places/{place_id}',
+                        headers={'Authorization': f'Bearer {owner_token}'},
+                        json={"amenities": amenity_ids, "title": "Eager Loading Place"})
+        for i in range(3):
+            _, token = self._create_user_and_login(f"eagerreviewer{i}@example.com")
+            self.client.post('/api/v1/reviews/',
+                             headers={'Authorization': f'Bearer {token}'},
+                             json={"text": "Nice", "rating": 4, "place_id": place_id})
+
+        @contextmanager
+        def count_queries():
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            with self.app.app_context():
+                engine = db.engine
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                yield statements
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        with count_queries() as statements:
+            response = self.client.get(f'/api/v1/places/{place_id}')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data['amenities']), 3)
+        self.assertEqual(len(data['reviews']), 3)
+        # place + owner (joined), amenities (selectin), reviews (selectin)
+        self.assertLessEqual(len(statements), 3)
+
+    def test_create_place_amenities_resolved_in_one_query(self):
+        """Test place amenities load with one IN query, unknown IDs reported together"""
+        from sqlalchemy import event
+        from app.services import facade
+
+        owner_id, owner_token = self._create_user_and_login("batchowner@example.com")
+        with self.app.app_context():
+            amenity_ids = [facade.create_amenity({"name": f"Batch {i}"}).id
+                           for i in range(20)]
+            facade.get_amenity_catalog()
+
+        headers = {'Authorization': f'Bearer {owner_token}'}
+        response = self.client.post('/api/v1/places/', headers=headers, json={
+            "title": "Batch Place", "price": 100.0, "latitude": 25.0,
+            "longitude": -80.0, "amenities": amenity_ids + ["x", "y"]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['error'], "amenities not found: x, y")
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            # ignores the serializer reading place.amenities back
+            if "FROM amenities" in statement and "place_amenity" not in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+            facade.amenity_repo.clear()
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                "title": "Batch Place", "price": 100.0, "latitude": 25.0,
+                "longitude": -80.0, "amenities": amenity_ids})
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.get_json()['amenities']), 20)
+        self.assertEqual(len(statements), 1)
+
+    def test_create_review_does_not_load_place_reviews(self):
+        """Test POST /reviews costs the same however many reviews the place has"""
+        from sqlalchemy import event
+
+        owner_id, owner_token = self._create_user_and_login("reviewloadowner@example.com")
+        response = self.client.post('/api/v1/places/',
+                                    headers={'Authorization': f'Bearer {owner_token}'},
+                                    json={"title": "Busy Place", "price": 100.0,
+                                          "latitude": 25.0, "longitude": -80.0})
+        place_id = response.get_json()['id']
+        tokens = [self._create_user_and_login(f"reviewload{i}@example.com")[1]
+                  for i in range(4)]
+        for token in tokens[:3]:
+            self.client.post('/api/v1/reviews/', headers={'Authorization': f'Bearer {token}'},
+                             json={"text": "Fine", "rating": 4, "place_id": place_id})
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.startswith("SELECT") and "FROM reviews" in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.post('/api/v1/reviews/',
+                                        headers={'Authorization': f'Bearer {tokens[3]}'},
+                                        json={"text": "Fine", "rating": 4,
+                                              "place_id": place_id})
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        self.assertEqual(response.status_code, 201)
+        # Only the one-review-per-user check
+        self.assertEqual(len(statements), 1)
+        self.assertIn("EXISTS", statements[0])
+
+        response = self.client.post('/api/v1/reviews/',
+                                    headers={'Authorization': f'Bearer {owner_token}'},
+                                    json={"text": "Mine", "rating": 5, "place_id": place_id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_get_skips_database_and_follows_writes(self):
+        """Test repository cache hits run no SQL and writes evict entries"""
+        from sqlalchemy import event
+        from app.services import facade
+
+        owner_id, _ = self._create_user_and_login("cacheowner@example.com")
+        with self.app.app_context():
+            amenity = facade.create_amenity({"name": "Cached Sauna"})
+            amenity_id = amenity.id
+            facade.get_amenity(amenity_id)  # fills the cache
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            hits = facade.amenity_repo.stats["hits"]
+            with self.app.app_context():
+                first = facade.get_amenity(amenity_id)
+                self.assertIs(facade.get_amenity(amenity_id), first)
+                self.assertEqual(first.name, "Cached Sauna")
+            self.assertEqual(statements, [])
+            self.assertEqual(facade.amenity_repo.stats["hits"], hits + 1)
+
+            with self.app.app_context():
+                facade.update_amenity(amenity_id, {"name": "Cached Hammam"})
+            with self.app.app_context():
+                self.assertEqual(facade.get_amenity(amenity_id).name, "Cached Hammam")
+                self.assertIsNotNone(facade.get_user(owner_id))
+                facade.delete_user(owner_id)
+            with self.app.app_context():
+                self.assertIsNone(facade.get_user(owner_id))
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
     def test_get_reviews_for_place(self):
         """Test getting all reviews for a specific place"""
         reviewer_id, reviewer_token = self._create_user_and_login("placereviewer@example.com")
@@ -1053,6 +2200,42 @@ class TestEndpointsValidation(unittest.TestCase):
         data = response.get_json()
         self.assertIsInstance(data, list)
 
+    def test_get_reviews_by_user(self):
+        """Test listing a user's reviews and the one-review-per-place rule"""
+        from app.services import facade
+
+        reviewer_id, reviewer_token = self._create_user_and_login("userreviews@example.com")
+        _, owner_token = self._create_user_and_login("userreviewsowner@example.com")
+        place_ids = []
+        for i in range(3):
+            place_ids.append(self.client.post(
+                '/api/v1/places/', headers={'Authorization': f'Bearer {owner_token}'},
+                json={"title": f"User Reviews Place {i}", "price": 50.0,
+                      "latitude": 1.0, "longitude": 1.0}).get_json()['id'])
+            response = self.client.post(
+                '/api/v1/reviews/', headers={'Authorization': f'Bearer {reviewer_token}'},
+                json={"text": f"Review {i}", "rating": 4, "place_id": place_ids[-1]})
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(f'/api/v1/users/{reviewer_id}/reviews?limit=2')
+        self.assertEqual(response.status_code, 200)
+        first_page = response.get_json()
+        self.assertEqual(len(first_page), 2)
+        response = self.client.get(f'/api/v1/users/{reviewer_id}/reviews'
+                                   f'?limit=2&cursor={response.headers["X-Next-Cursor"]}')
+        reviews = first_page + response.get_json()
+        self.assertEqual(sorted(r['place_id'] for r in reviews), sorted(place_ids))
+        self.assertTrue(all(r['user_id'] == reviewer_id for r in reviews))
+        self.assertEqual(self.client.get('/api/v1/users/nope/reviews').status_code, 404)
+
+        with self.app.app_context():
+            self.assertTrue(facade.has_reviewed(reviewer_id, place_ids[0]))
+            # The unique index also holds for callers that skip the API checks
+            with self.assertRaises(ValueError):
+                facade.create_review({"text": "Again", "rating": 1,
+                                      "user_id": reviewer_id, "place_id": place_ids[0]})
+            self.assertEqual(facade.get_place(place_ids[0])["place"].review_count, 1)
+
     def test_get_amenities_for_place(self):
         """Test getting all amenities for a specific place"""
         owner_id, owner_token = self._create_user_and_login("amenitylist@example.com")
@@ -1076,5 +2259,284 @@ class TestEndpointsValidation(unittest.TestCase):
         self.assertIsInstance(data, list)
 
 
+class TestReadReplica(unittest.TestCase):
+    """Repository reads on a replica bind, kept in sync by replicate()"""
+
+    def setUp(self):
+        import tempfile
+        from config import CONFIG_MAP, DevelopmentConfig
+
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class ReplicaConfig(DevelopmentConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'primary.db')}"
+            SQLALCHEMY_BINDS = {"replica": f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}"}
+            BCRYPT_LOG_ROUNDS = 4
+
+        CONFIG_MAP['replica_test'] = ReplicaConfig
+        self.app = create_app('replica_test')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            self.sync()
+
+    def tearDown(self):
+        from config import CONFIG_MAP
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        del CONFIG_MAP['replica_test']
+        self.tmp.cleanup()
+
+    def sync(self):
+        from app.persistence.replica import replicate
+        with self.app.app_context():
+            replicate(db.engine, db.engines['replica'])
+
+    def test_reads_use_replica_until_the_request_writes(self):
+        from app.services import facade
+
+        email = "replica@example.com"
+        with self.app.app_context():
+            facade.create_user({"first_name": "Re", "last_name": "Plica",
+                                "email": email, "password": "password123"})
+            # Read-your-writes: the session wrote, later reads use the primary
+            self.assertIsNotNone(facade.get_user_by_email(email))
+
+        with self.app.app_context():
+            # A new request reads the replica, which has not caught up yet
+            self.assertIsNone(facade.get_user_by_email(email))
+            with facade.transaction():
+                # Reads inside a unit of work always see the primary
+                self.assertIsNotNone(facade.get_user_by_email(email))
+        listed = [u['email'] for u in self.client.get('/api/v1/users/').get_json()]
+        self.assertNotIn(email, listed)
+
+        self.sync()
+        listed = [u['email'] for u in self.client.get('/api/v1/users/').get_json()]
+        self.assertIn(email, listed)
+
+
+class TestInMemoryRepository(unittest.TestCase):
+    """Tests for the hash indexes of InMemoryRepository"""
+
+    def _obj(self, **attrs):
+        import types
+        import uuid
+        return types.SimpleNamespace(id=str(uuid.uuid4()), **attrs)
+
+    def test_exists_by_attribute_uses_index(self):
+        """Indexed lookups follow add, update and delete"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository(indexed_attributes=("title",))
+        obj = self._obj(title="Loft")
+        repo.add(obj)
+        self.assertTrue(repo.exists_by_attribute("title", "Loft"))
+
+        repo.update(obj.id, {"title": "Cabin"})
+        self.assertFalse(repo.exists_by_attribute("title", "Loft"))
+        self.assertTrue(repo.exists_by_attribute("title", "Cabin"))
+
+        repo.delete(obj.id)
+        self.assertFalse(repo.exists_by_attribute("title", "Cabin"))
+
+    def test_get_all_by_attribute_non_unique_index(self):
+        """Non-unique indexes return every object sharing the value"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository(indexed_attributes=("place_id",))
+        first = self._obj(place_id="p1")
+        second = self._obj(place_id="p1")
+        repo.add(first)
+        repo.add(second)
+        self.assertIs(repo.get_by_attribute("place_id", "p1"), first)
+        self.assertEqual(repo.get_all_by_attribute("place_id", "p1"), [first, second])
+
+        repo.delete(first.id)
+        self.assertEqual(repo.get_all_by_attribute("place_id", "p1"), [second])
+
+    def test_get_page_walks_all_objects_once(self):
+        """Cursor pages cover every object in (created_at, id) order"""
+        from datetime import datetime, timedelta
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository()
+        base = datetime(2024, 1, 1)
+        objs = [self._obj(created_at=base + timedelta(minutes=i // 2)) for i in range(5)]
+        for obj in reversed(objs):
+            repo.add(obj)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = repo.get_page(2, cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+        key = lambda o: (o.created_at, o.id)
+        self.assertEqual(seen, sorted(objs, key=key))
+
+    def test_get_page_order_follows_writes(self):
+        """Sorted listings follow add, update, increment and delete"""
+        from datetime import datetime, timedelta
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository()
+        base = datetime(2024, 1, 1)
+        a, b, c = (self._obj(created_at=base + timedelta(minutes=i), review_count=n,
+                             price=10.0 * n)
+                   for i, n in enumerate((1, 2, 3)))
+        for obj in (a, b, c):
+            repo.add(obj)
+
+        def listing(order_by=None, criteria=()):
+            seen, cursor = [], None
+            while True:
+                page, cursor = repo.get_page(1, cursor, criteria=criteria,
+                                             order_by=order_by)
+                seen.extend(page)
+                if cursor is None:
+                    return seen
+
+        self.assertEqual(listing("review_count"), [c, b, a])
+        repo.increment(a.id, {"review_count": 5})
+        d = self._obj(created_at=base - timedelta(minutes=1), review_count=4, price=5.0)
+        repo.add(d)
+        repo.update(c.id, {"review_count": 0})
+        self.assertEqual(listing("review_count"), [a, d, b, c])
+        self.assertEqual(listing(), [d, a, b, c])
+        self.assertEqual(listing("review_count", [("price", "le", 15.0)]), [a, d])
+        repo.delete(d.id)
+        self.assertEqual(listing("review_count"), [a, b, c])
+        self.assertEqual(list(repo.iterate(order_by="review_count")), [a, b, c])
+
+    def test_existing_values_and_add_many(self):
+        """Batch helpers used by the bulk imports"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository(indexed_attributes=("title",))
+        objs = [self._obj(title=t) for t in ("Loft", "Cabin")]
+        self.assertEqual(repo.add_many(iter(objs), chunk_size=1), 2)
+        self.assertEqual(repo.existing_values("title", {"Loft", "Barn"}), {"Loft"})
+        self.assertEqual(repo.existing_values("id", {objs[1].id}), {objs[1].id})
+
+    def test_search_uses_inverted_index(self):
+        """Full-text search ranks like FTS5 and follows add, update and delete"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository(text_attributes={"title": 10.0, "description": 1.0})
+        loft = self._obj(title="Seaside Loft", description="Quiet")
+        cabin = self._obj(title="Cabin", description="Sea view")
+        villa = self._obj(title="Villa", description=None)
+        for obj in (loft, cabin, villa):
+            repo.add(obj)
+
+        self.assertEqual(repo.search("sea", 10), ([loft, cabin], None))
+        page, cursor = repo.search("sea", 1)
+        self.assertEqual(page, [loft])
+        self.assertEqual(repo.search("sea", 1, cursor), ([cabin], None))
+
+        repo.update(loft.id, {"title": "Loft"})
+        self.assertEqual(repo.search("sea", 10)[0], [cabin])
+        repo.delete(cabin.id)
+        self.assertEqual(repo.search("sea", 10)[0], [])
+        with self.assertRaises(ValueError):
+            InMemoryRepository().search("sea", 10)
+
+    def test_get_many_skips_unknown_ids(self):
+        """Batch lookups return only the IDs that exist"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository()
+        first, second = self._obj(), self._obj()
+        repo.add(first)
+        repo.add(second)
+        self.assertEqual(repo.get_many([second.id, "nope", first.id]),
+                         {first.id: first, second.id: second})
+        self.assertEqual(repo.get_many([]), {})
+
+    def test_exists_matches_every_criterion(self):
+        """Multi-attribute existence checks narrow through an index"""
+        from app.persistence.repository import InMemoryRepository
+        repo = InMemoryRepository(indexed_attributes=("user_id",))
+        repo.add(self._obj(user_id="u1", place_id="p1"))
+        repo.add(self._obj(user_id="u2", place_id="p2"))
+        self.assertTrue(repo.exists((("place_id", "eq", "p1"), ("user_id", "eq", "u1"))))
+        self.assertFalse(repo.exists((("place_id", "eq", "p2"), ("user_id", "eq", "u1"))))
+        self.assertFalse(repo.exists((("user_id", "eq", "u3"),)))
+
+
+class TestLiveIndex(unittest.TestCase):
+    """Tests for the refresh policy of LiveIndex, against a fake table"""
+
+    def setUp(self):
+        from app.services.live_index import LiveIndex
+        self.rows, self.version, self.now = {"a"}, 1, 0.0
+        self.builds = []  # spawned builds, run by the test
+        self.during_build = None
+        self.index = LiveIndex(("t",), self._build, lambda: {"t": self.version},
+                               self.builds.append, clock=lambda: self.now)
+
+    def _build(self):
+        read = set(self.rows), {"t": self.version}
+        if self.during_build:
+            self.during_build()
+        return read
+
+    def _commit(self, row):
+        before = self.version
+        self.rows.add(row)
+        self.version += 1
+        return {"t": (before, self.version)}
+
+    def _run_builds(self):
+        while self.builds:
+            self.builds.pop(0)()
+
+    def test_builds_in_the_background(self):
+        """Reads never build; one build runs at a time"""
+        self.assertIsNone(self.index.latest())
+        self.assertIsNone(self.index.current())
+        self.assertEqual(len(self.builds), 1)
+        self._run_builds()
+        self.assertEqual(self.index.current(), {"a"})
+        self.assertFalse(self.builds)
+
+    def test_own_commits_keep_it_current(self):
+        """Commits applied with their versions keep the index current"""
+        self.index.latest()
+        self._run_builds()
+        committed = self._commit("b")
+        self.index.apply(lambda rows: rows.add("b"), committed)
+        # A second change of the same commit still applies
+        self.index.apply(lambda rows: rows.add("b2"), committed)
+        self.assertEqual(self.index.current(), {"a", "b", "b2"})
+        self.assertFalse(self.builds)
+
+    def test_other_commits_schedule_a_rebuild(self):
+        """Commits it was not given make the index stale until rebuilt, at
+        most once per interval"""
+        self.index.latest()
+        self._run_builds()
+        self._commit("b")  # another process
+        self.assertIsNone(self.index.current())
+        self.assertEqual(self.index.latest(), {"a"})
+        self.assertFalse(self.builds)
+        self.now += 30
+        self.assertEqual(self.index.latest(), {"a"})
+        self._run_builds()
+        self.assertEqual(self.index.current(), {"a", "b"})
+
+    def test_commits_during_a_build_are_replayed(self):
+        """Own commits made while a build runs reach the new index once,
+        whether the build read them or not"""
+        self.index.latest()
+        before = self._commit("b")  # read by the build
+        self.index.apply(lambda rows: rows.add("b"), before)
+
+        def commit_after_the_read():
+            self.index.apply(lambda rows: rows.add("c"), self._commit("c"))
+        self.during_build = commit_after_the_read
+        self._run_builds()
+        self.assertEqual(self.index.current(), {"a", "b", "c"})
+        # Applied late, a commit the build read changes nothing
+        self.index.apply(lambda rows: rows.discard("b"), before)
+        self.assertEqual(self.index.current(), {"a", "b", "c"})
+
+
 if __name__ == '__main__':
     unittest.main()
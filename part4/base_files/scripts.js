@@ -81,11 +81,11 @@ function checkAuthentication() {
 /* =============================
      INDEX — DISPLAY PLACES
 ============================= */
-function displayPlaces(places) {
+function displayPlaces(places, append = false) {
     const placesList = document.getElementById('places-list');
     if (!placesList) return;
 
-    placesList.innerHTML = "";
+    if (!append) placesList.innerHTML = "";
 
     places.forEach(place => {
         const card = document.createElement('div');
@@ -107,16 +107,26 @@ function displayPlaces(places) {
 /* =============================
      INDEX — FETCH PLACES
 ============================= */
-async function fetchPlaces(token) {
+async function fetchPlaces(token, cursor = null) {
     try {
-        const response = await fetch('http://127.0.0.1:5000/api/v1/places', {
+        // The API returns one page at a time; the next page's cursor
+        // comes back in the X-Next-Cursor header.
+        let url = 'http://127.0.0.1:5000/api/v1/places?limit=50';
+        const priceFilter = document.getElementById('price-filter');
+        if (priceFilter && priceFilter.value !== 'All') {
+            url += `&max_price=${encodeURIComponent(priceFilter.value)}`;
+        }
+        if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+
+        const response = await fetch(url, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
 
         if (!response.ok) throw new Error("Failed to fetch");
 
         const places = await response.json();
-        displayPlaces(places);
+        displayPlaces(places, cursor !== null);
+        displayLoadMore(token, response.headers.get('X-Next-Cursor'));
     } catch (error) {
         console.error(error);
         console.log("Showing fallback sample data.");
@@ -124,6 +134,24 @@ async function fetchPlaces(token) {
     }
 }
 
+function displayLoadMore(token, nextCursor) {
+    const placesList = document.getElementById('places-list');
+    if (!placesList) return;
+
+    let button = document.getElementById('load-more');
+    if (!nextCursor) {
+        if (button) button.remove();
+        return;
+    }
+    if (!button) {
+        button = document.createElement('button');
+        button.id = 'load-more';
+        button.textContent = 'Load more';
+        placesList.after(button);
+    }
+    button.onclick = () => fetchPlaces(token, nextCursor);
+}
+
 /* =============================
      INDEX — PRICE FILTER
 ============================= */
@@ -131,6 +159,14 @@ document.addEventListener('DOMContentLoaded', () => {
     const priceFilter = document.getElementById('price-filter');
     if (priceFilter) {
         priceFilter.addEventListener('change', (event) => {
+            // Logged in: let the API filter so only matching places are sent
+            const token = getCookie('token');
+            if (token) {
+                fetchPlaces(token);
+                return;
+            }
+
+            // Sample data: filter the cards already on the page
             const maxPrice = event.target.value;
             const cards = document.querySelectorAll('.place-card');
 